@@ -33,6 +33,7 @@ import functools
 import os
 import subprocess
 import sys
+from typing import List, Optional
 
 try:
     from dotenv import load_dotenv
@@ -59,13 +60,13 @@ from navio_tasks.commands.cli_go_gitleaks import run_gitleaks
 from navio_tasks.dependency_commands.cli_installs import do_dependency_installs
 from navio_tasks.mutating_commands.cli_precommit import do_precommit
 from navio_tasks.commands.cli_npm_pyright import do_pyright
-from pebble import ProcessPool
 
 from navio.builder import task
 
 # on some shells print doesn't flush!
 # pylint: disable=redefined-builtin,invalid-name
 from navio_tasks.build_state import (
+    changed_files,
     timed,
     skip_if_no_change,
     skip_if_this_file_does_not_change,
@@ -81,7 +82,11 @@ from navio_tasks.commands.cli_get_secrets import do_git_secrets
 from navio_tasks.commands.cli_mypy import do_mypy, evaluated_mypy_results
 from navio_tasks.commands.cli_pylint import do_lint, evaluated_lint_results
 from navio_tasks.commands.cli_pyt import do_python_taint
-from navio_tasks.commands.cli_pytest import do_pytest, do_pytest_coverage
+from navio_tasks.commands.cli_pytest import (
+    do_pytest,
+    do_pytest_coverage,
+    fast_tests_only,
+)
 from navio_tasks.commands.cli_tox import do_tox
 from navio_tasks.commands.lib_dodgy import do_dodgy
 from navio_tasks.dependency_commands.cli_liccheck import do_liccheck
@@ -119,14 +124,12 @@ from navio_tasks.settings import (
     PROBLEMS_FOLDER,
     IS_GITLAB,
     PYTHON,
-    IS_INTERNAL_NETWORK,
     SMALL_CODE_BASE_CUTOFF,
     MAXIMUM_LINT,
     MAXIMUM_MYPY,
     IS_INTERACTIVE,
     PACKAGE_WITH,
     IS_SHELL_SCRIPT_LIKE,
-    RUN_ALL_TESTS_REGARDLESS_TO_NETWORK,
 )
 
 print = functools.partial(print, flush=True)  # noqa
@@ -144,6 +147,16 @@ NODE_EXISTS = check_command_exists(
 clean_old_files()
 
 
+def just_changed(task_name: str) -> Optional[List[str]]:
+    """
+    Files changed since task last succeeded, None means everything
+    """
+    changes = changed_files(task_name)
+    if changes is None:
+        return None
+    return changes.changed
+
+
 @task()
 @timed()
 def check_python_version() -> None:
@@ -152,10 +165,10 @@ def check_python_version() -> None:
     """
     print(sys.version_info)
     if sys.version_info[0] < 3:
-        print("Must be using Python 3.7")
+        print("Must be using Python 3.8")
         sys.exit(-1)
-    if sys.version_info[1] < 7:
-        print("Must be using Python 3.7 or greater")
+    if sys.version_info[1] < 8:
+        print("Must be using Python 3.8 or greater")
         sys.exit(-1)
 
 
@@ -167,7 +180,7 @@ def compile_py() -> None:
     Basic syntax check with compileall flag
     """
     # policy decision, which python version to use.
-    do_compile_py(PYTHON)
+    do_compile_py(PYTHON, just_changed("compile_py"))
 
 
 @task()
@@ -228,7 +241,7 @@ def reset() -> None:
     reset_build_state()
 
 
-@task(pipenv_installs)
+@task(pipenv_installs, mutates=True)
 @skip_if_no_change("pyupgrade")
 @timed()
 def pyupgrade() -> str:
@@ -238,10 +251,10 @@ def pyupgrade() -> str:
     # supported py3, py36, py37, py38
     # Should be logically consistent with other minimum python version
     # tools (vermin, compile_py, tox)
-    return do_pyupgrade(IS_INTERACTIVE, "py38")
+    return do_pyupgrade(IS_INTERACTIVE, "py38", just_changed("pyupgrade"))
 
 
-@task()
+@task(mutates=True)
 @timed()
 def isort() -> None:
     """Sort the imports to discover import order bugs and prevent import order bugs"""
@@ -252,17 +265,17 @@ def isort() -> None:
     do_isort()
 
 
-@task(pipenv_installs, pyupgrade, compile_py, isort)
+@task(pipenv_installs, pyupgrade, compile_py, isort, mutates=True)
 @skip_if_no_change("formatting")
 @timed()
 def formatting() -> None:
     """
     Format main project with black
     """
-    do_formatting("", BLACK_STATE)
+    do_formatting("", BLACK_STATE, just_changed("formatting"))
 
 
-@task()
+@task(mutates=True)
 @skip_if_no_change("format_tests")
 @timed()
 def format_tests() -> None:
@@ -329,7 +342,8 @@ def yaml_lint() -> str:
     return do_yamllint()
 
 
-@task()
+# other tasks assume there will be a LOC file by now, on GitLab make it so
+@task(mutates=IS_GITLAB)
 @skip_if_no_change("count_lines_of_code")
 @timed()
 def count_lines_of_code() -> None:
@@ -366,7 +380,7 @@ def flake8() -> None:
     """
     Lint with flake8
     """
-    do_flake8()
+    do_flake8(just_changed("flake8"))
 
 
 @task(formatting, compile_py)
@@ -380,7 +394,7 @@ def bandit() -> None:
     # These two exist for running shell commands.
     # /scripts/ folder
     # build.py itself
-    do_bandit(IS_SHELL_SCRIPT_LIKE)
+    do_bandit(IS_SHELL_SCRIPT_LIKE, just_changed("bandit"))
 
 
 @task(formatting, compile_py)
@@ -424,7 +438,7 @@ def detect_secrets() -> None:
     do_detect_secrets()
 
 
-@task(formatting_check)
+@task(formatting_check, mutates=True)
 @skip_if_no_change("precommit")
 @timed()
 def precommit() -> None:
@@ -448,7 +462,7 @@ def lint() -> None:
     """
     Lint with pylint
     """
-    lint_file = do_lint(PROJECT_NAME)
+    lint_file = do_lint(PROJECT_NAME, changed_files("lint"))
 
     fatals = ["no-member", "no-name-in-module", "import-error"]
     evaluated_lint_results(
@@ -502,11 +516,7 @@ def coverage_report() -> None:
     # Integration vs non integration
     # slow vs fast
     # on network vs not on network
-    if IS_INTERNAL_NETWORK or RUN_ALL_TESTS_REGARDLESS_TO_NETWORK:
-        fast_only = False
-    else:
-        fast_only = True
-    do_pytest_coverage(fast_only=fast_only)
+    do_pytest_coverage(fast_only=fast_tests_only())
 
 
 @task()
@@ -613,7 +623,7 @@ def check_manifest() -> None:
         do_check_manifest()
 
 
-@task()
+@task(mutates=True)
 @timed()
 def jiggle_version() -> None:
     """
@@ -623,8 +633,7 @@ def jiggle_version() -> None:
 
 
 @task(
-    formatting,  # changes source
-    # TODO: switch to parallel
+    formatting,  # changes source, runs alone & first with nb -j N
     mypy,
     detect_secrets,
     git_secrets,
@@ -658,65 +667,9 @@ def package() -> None:
     do_package()
 
 
-@task()
-@timed()
-@skip_if_no_change("parallel_checks")
-def parallel_checks() -> None:
-    """
-    Do all the checks that don't change code and can run in parallel.
-    """
-    chores = [
-        do_mypy,
-        do_detect_secrets,
-        do_git_secrets,
-        vulture,
-        do_compile_py,
-        do_lint,
-        do_flake8,
-        do_dodgy,
-        do_bandit,
-        do_python_taint,
-        do_mccabe,
-        do_check_manifest,
-        do_liccheck,
-    ]
-    if IS_GITLAB:
-        # other tasks assume there will be a LOC file by now.
-        do_count_lines_of_code()
-        for chore in chores:
-            print(chore())
-        return
-
-    # can't do pyroma because that needs a package, which might not exist yet.
-
-    pool = ProcessPool(12)  # max_workers=len(chores))  # cpu_count())
-    # log_to_stderr(logging.DEBUG)
-    tasks = []
-    for chore in chores:
-        tasks.append(pool.schedule(chore, args=()))
-
-    print("close & join")
-    pool.close()
-    pool.join()
-
-    for current_task in tasks:
-        # pylint: disable=broad-except
-        try:
-            result = current_task.result()
-            exception = current_task.exception()
-            if exception:
-                print(current_task.exception())
-            print(result)
-            if "Abnormal" in str(result):
-                print("One or more parallel tasks failed.")
-                sys.exit(-1)
-        except Exception as ex:
-            print(ex)
-            sys.exit(-1)
-
-
 @task(
-    mypy,  #
+    count_lines_of_code,
+    mypy,
     detect_secrets,
     git_secrets,
     vulture,
@@ -728,13 +681,16 @@ def parallel_checks() -> None:
     python_taint,
     mccabe,
     check_manifest,
-    liccheck,  #
+    liccheck,
 )  # docs ... later
+@skip_if_no_change("parallel_checks")
 @timed()
-def slow() -> None:
+def parallel_checks() -> None:
     """
-    Same tasks as parallel checks but in serial. For perf comparisons
+    Checks that don't change code. Run with `nb -j N parallel_checks` to run
+    them in parallel, plain `nb parallel_checks` runs them in serial.
     """
+    # can't do pyroma because that needs a package, which might not exist yet.
 
 
 @task(
@@ -749,7 +705,7 @@ def slow() -> None:
 @timed()
 def fast_package() -> None:
     """
-    Run most tasks in parallel
+    Run most tasks, in parallel if run with `nb -j N fast_package`
     """
     do_package()
 
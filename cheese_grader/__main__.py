@@ -2,7 +2,9 @@
 """
 Entrypoint for python -m
 """
+import sys
+
 from cheese_grader.main import process_docopts
 
 if __name__ == "__main__":
-    process_docopts()
+    sys.exit(process_docopts())
@@ -0,0 +1,274 @@
+"""
+Fetch PyPI JSON metadata and download stats for many packages at once.
+
+One keep-alive session (so one TLS handshake per worker, not per package),
+a bounded number of requests in flight, each name fetched once, and when
+the server says 429/503 with Retry-After *all* workers wait that long.
+
+Given an IndexMirror, every PyPI json fetched is kept there. Release json
+doesn't change, so it is read from the mirror first. Project json does (the
+latest version moves), online it always comes from the network, offline
+from the mirror. offline=True never goes to the network for PyPI json,
+download counts or wheel metadata. What the mirror doesn't have raises
+Offline, not PackageNotFound, "not mirrored" isn't "not on PyPI", and a
+DownloadCountCache keeps what it has.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cheese_grader.api_clients.wheel_metadata import (
+    WheelMetadata,
+    fetch_wheel_metadata,
+)
+from cheese_grader.storage.artifacts import ArtifactStore
+from cheese_grader.storage.download_counts import (
+    MAX_RETRY_AFTER,
+    DownloadCountCache,
+    Offline,
+    PackageNotFound,
+    RateLimited,
+    parse_retry_after,
+)
+from cheese_grader.storage.index_mirror import IndexMirror
+from cheese_grader.utils import normalize_name
+
+LOGGER = logging.getLogger(__name__)
+
+PYPI_URL = "https://pypi.org"
+PYPISTATS_URL = "https://pypistats.org"
+
+
+class PackageInfo(NamedTuple):
+    """
+    What we could find out about one package
+    """
+
+    name: str
+    # None if PyPI doesn't know it
+    metadata: Optional[Dict[str, Any]]
+    downloads: Optional[int]
+    # "" if all went well
+    error: str
+
+
+class MetadataFetcher:
+    """
+    Pooled, rate limit aware client for PyPI JSON API & pypistats
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        pypi_url: str = PYPI_URL,
+        pypistats_url: str = PYPISTATS_URL,
+        max_workers: int = 8,
+        retries: int = 5,
+        timeout: float = 30,
+        backoff: float = 1.0,
+        mirror: Optional[IndexMirror] = None,
+        offline: bool = False,
+    ) -> None:
+        self.pypi_url = pypi_url.rstrip("/")
+        self.pypistats_url = pypistats_url.rstrip("/")
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.mirror = mirror
+        self.offline = offline
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
+    def __enter__(self) -> "MetadataFetcher":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _wait_turn(self) -> None:
+        """Don't send anything while the server has asked us to back off"""
+        while True:
+            with self._lock:
+                delay = self._not_before - time.time()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _back_off(self, seconds: float) -> None:
+        """Make every worker wait"""
+        with self._lock:
+            self._not_before = max(self._not_before, time.time() + seconds)
+
+    def get_json(self, url: str, retries: Optional[int] = None) -> Dict[str, Any]:
+        """
+        GET json, retrying on 429 & 503, self.retries times unless told
+        otherwise. Raises PackageNotFound on 404, RateLimited if retries run
+        out.
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self._wait_turn()
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code == 404:
+                raise PackageNotFound(url)
+            if response.status_code in (429, 503):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if attempt == retries:
+                    raise RateLimited(retry_after)
+                if retry_after is None:
+                    # jitter, so workers don't come back in lock step
+                    jitter = random.uniform(0, self.backoff)  # nosec
+                    retry_after = min(self.backoff * (2 ** attempt), MAX_RETRY_AFTER)
+                    retry_after += jitter
+                LOGGER.debug(f"{response.status_code} from {url}, {retry_after}s")
+                self._back_off(retry_after)
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise RateLimited()
+
+    def _mirrored(
+        self, kind: str, key: str, local: Optional[Dict[str, Any]], url: str
+    ) -> Dict[str, Any]:
+        """Mirror copy if there is one, else network & remember it"""
+        if local is not None:
+            return local
+        if self.offline:
+            raise Offline(f"Not in the index mirror: {url}")
+        found = self.get_json(url)
+        if self.mirror:
+            self.mirror.put(kind, key, found)
+        return found
+
+    def fetch_metadata(self, package: str) -> Dict[str, Any]:
+        """PyPI JSON for latest release. Raises PackageNotFound or Offline"""
+        name = normalize_name(package)
+        # online, always the current latest version, kept for offline runs
+        local = None
+        if self.mirror and self.offline:
+            local = self.mirror.project_json(name)
+        url = f"{self.pypi_url}/pypi/{name}/json"
+        return self._mirrored("project", name, local, url)
+
+    def fetch_release(self, package: str, version: str) -> Dict[str, Any]:
+        """PyPI JSON for one release. Raises PackageNotFound or Offline"""
+        name = normalize_name(package)
+        local = self.mirror.release_json(name, version) if self.mirror else None
+        url = f"{self.pypi_url}/pypi/{name}/{version}/json"
+        return self._mirrored("release", f"{name}=={version}", local, url)
+
+    def find_project(self, package: str) -> Optional[Dict[str, Any]]:
+        """PyPI JSON for latest release, None if no such package, or Offline"""
+        try:
+            return self.fetch_metadata(package)
+        except PackageNotFound:
+            return None
+
+    def find_release(self, package: str, version: str) -> Optional[Dict[str, Any]]:
+        """PyPI JSON for one release, None if no such release, or Offline"""
+        try:
+            return self.fetch_release(package, version)
+        except PackageNotFound:
+            return None
+
+    def fetch_wheel_metadata(
+        self,
+        file: Dict[str, Any],
+        members: Sequence[str] = ("METADATA",),
+        store: Optional[ArtifactStore] = None,
+    ) -> WheelMetadata:
+        """
+        dist-info members of a wheel, without downloading it if possible.
+        Offline, only from a wheel already in store.
+        """
+        if not self.offline:
+            self._wait_turn()
+        return fetch_wheel_metadata(
+            file, self.session, members, store, self.timeout, self.offline
+        )
+
+    def fetch_downloads(
+        self, package: str, retries: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Downloads without mirrors, same number as pypistats.overall. Raises
+        Offline when offline
+        """
+        if self.offline:
+            raise Offline(package)
+        name = normalize_name(package)
+        item = self.get_json(
+            f"{self.pypistats_url}/api/packages/{name}/overall?mirrors=false",
+            retries,
+        )
+        rows = [
+            row for row in item.get("data", []) if row["category"] == "without_mirrors"
+        ]
+        if not rows:
+            return None
+        return sum(row["downloads"] for row in rows)
+
+    def fetch_downloads_once(self, package: str) -> Optional[int]:
+        """fetch_downloads for a DownloadCountCache, which does the retrying"""
+        return self.fetch_downloads(package, retries=0)
+
+    def fetch_one(
+        self,
+        package: str,
+        downloads: bool = True,
+        counts: Optional[DownloadCountCache] = None,
+    ) -> PackageInfo:
+        """Metadata & downloads for one package, errors end up in result"""
+        name = normalize_name(package)
+        try:
+            metadata = self.fetch_metadata(name)
+        except PackageNotFound:
+            return PackageInfo(name, None, None, "")
+        except (Offline, RateLimited, requests.RequestException) as ex:
+            return PackageInfo(name, None, None, str(ex))
+
+        count = None
+        if downloads:
+            try:
+                if counts:
+                    count = counts.get(name, self.fetch_downloads_once)
+                else:
+                    count = self.fetch_downloads(name)
+            except (PackageNotFound, Offline):
+                count = None
+            except (RateLimited, requests.RequestException) as ex:
+                return PackageInfo(name, metadata, None, str(ex))
+        return PackageInfo(name, metadata, count, "")
+
+    def fetch_many(
+        self,
+        packages: Iterable[str],
+        downloads: bool = True,
+        counts: Optional[DownloadCountCache] = None,
+    ) -> Iterator[PackageInfo]:
+        """
+        Fetch each distinct package once, yield results as they complete.
+        """
+        names = list(dict.fromkeys(normalize_name(package) for package in packages))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.fetch_one, name, downloads, counts)
+                for name in names
+            ]
+            for future in as_completed(futures):
+                yield future.result()
@@ -4,10 +4,11 @@ are down today & at risk of going away altogether. The HTML API is ugly.
 
 So I'm using a stats API. As a side effect, I can add a cut off for
 unpopular packages.
+
+Counts are cached on disk, see storage/download_counts.py
 """
 
 import json
-from functools import lru_cache
 from typing import Optional
 
 import pypistats
@@ -19,19 +20,39 @@ import pypistats
 # major, minor, system, downloads by minor version, system, etc
 import requests
 
+from cheese_grader.storage.download_counts import (
+    DownloadCountCache,
+    PackageNotFound,
+    RateLimited,
+    parse_retry_after,
+)
+
+_CACHE: Optional[DownloadCountCache] = None
+
 
-@lru_cache(maxsize=1000)
 def get_download_count(module: str) -> Optional[int]:
-    """Get download count and cache it"""
+    """Get download count and cache it
+
+    None if package doesn't exist. Raises RateLimited if pypistats keeps saying 429
+    """
+    # pylint: disable=global-statement
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = DownloadCountCache()
+    return _CACHE.get(module, fetch_download_count)
+
+
+def fetch_download_count(module: str) -> Optional[int]:
+    """Get download count, no caching"""
     try:
         item_string = pypistats.overall(module.strip(), format="json")
     except requests.exceptions.HTTPError as error:
         if error.response.status_code == 404:
-            return None
+            raise PackageNotFound(module) from error
         if error.response.status_code == 429:
             # too many requests
-            # BUG: This is wrong
-            return None
+            retry_after = error.response.headers.get("Retry-After")
+            raise RateLimited(parse_retry_after(retry_after)) from error
         raise
     # print(item_string)
     item = json.loads(item_string)
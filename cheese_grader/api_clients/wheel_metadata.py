@@ -0,0 +1,329 @@
+"""
+Read METADATA (and RECORD, top_level.txt...) out of a wheel without
+downloading the wheel.
+
+In order of preference
+
+    pep658      the index serves METADATA next to the wheel as url + ".metadata"
+    range       HTTP range requests for the zip central directory, then for
+                just the members we want, a few KB out of a few hundred MB
+    download    the whole wheel, only when the other two fail
+
+Offline, members come only from a wheel already in the artifact store, else
+Offline is raised.
+
+    file = pick_file(release, prefer=("bdist_wheel",))
+    found = fetch_wheel_metadata(file, session)
+    requires_dist(found.metadata)
+"""
+import email.parser
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import zipfile
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from cheese_grader.archives import ZipTree
+from cheese_grader.storage.artifacts import ArtifactStore
+from cheese_grader.storage.download_counts import Offline
+
+LOGGER = logging.getLogger(__name__)
+
+BLOCK_SIZE = 64 * 1024
+# end of central directory + the central directory itself, for most wheels
+TAIL_SIZE = 64 * 1024
+
+# PEP 691 json calls it core-metadata, older indexes the other two
+METADATA_KEYS = ("core-metadata", "data-dist-info-metadata", "dist-info-metadata")
+
+
+class RangeNotSupported(Exception):
+    """Server sent the whole file (or nothing useful) when asked for a range"""
+
+
+class RemoteNotExtracted(Exception):
+    """A remote wheel was asked for a real folder, download it first"""
+
+
+class WheelMetadata(NamedTuple):
+    """
+    dist-info files read from one wheel
+    """
+
+    filename: str
+    # METADATA as text, "" if the wheel has none
+    metadata: str
+    # member name relative to the dist-info folder -> bytes, missing ones left out
+    members: Dict[str, bytes]
+    # "pep658", "range", "download" or "store" (offline)
+    source: str
+    bytes_transferred: int
+
+
+def _content_range(value: Optional[str]) -> Tuple[int, int, int]:
+    """'bytes 100-199/1000' -> (100, 199, 1000)"""
+    try:
+        unit, rest = (value or "").split(" ", 1)
+        span, total = rest.split("/", 1)
+        start, end = span.split("-", 1)
+        if unit != "bytes":
+            raise ValueError(unit)
+        return int(start), int(end), int(total)
+    except ValueError as ex:
+        raise RangeNotSupported(f"Bad Content-Range {value!r}") from ex
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    Read only, seekable file over HTTP range requests.
+
+    Blocks are cached, neighbouring missing blocks are fetched with one
+    request. bytes_transferred counts body bytes actually received.
+    """
+
+    def __init__(
+        self, url: str, session: Any = None, timeout: float = 30, tail: int = TAIL_SIZE
+    ) -> None:
+        super().__init__()
+        self.url = url
+        self.session = session or requests
+        self.timeout = timeout
+        self.bytes_transferred = 0
+        self.requests = 0
+        self._position = 0
+        self._blocks: Dict[int, bytes] = {}
+        # suffix range, tells us the size and usually gets the whole
+        # central directory in the same round trip
+        data, start, self.size = self._get(f"bytes=-{tail}")
+        self._tail_start = start
+        self._tail = data
+
+    def _get(self, byte_range: str) -> Tuple[bytes, int, int]:
+        """One range request -> (data, offset of data, size of file)"""
+        self.requests += 1
+        with self.session.get(
+            self.url, headers={"Range": byte_range}, stream=True, timeout=self.timeout
+        ) as response:
+            if response.status_code != 206:
+                # a 200 would be the whole file, don't read it
+                raise RangeNotSupported(f"{response.status_code} from {self.url}")
+            start, _, total = _content_range(response.headers.get("Content-Range"))
+            data = response.content
+        self.bytes_transferred += len(data)
+        return data, start, total
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._position = offset
+        return offset
+
+    def _fetch_blocks(self, first: int, last: int) -> None:
+        """Make sure blocks first..last are cached, one request for the gap"""
+        missing = [_ for _ in range(first, last + 1) if _ not in self._blocks]
+        if not missing:
+            return
+        start = missing[0] * BLOCK_SIZE
+        end = min((missing[-1] + 1) * BLOCK_SIZE, self.size) - 1
+        data, offset, _ = self._get(f"bytes={start}-{end}")
+        if offset != start:
+            raise RangeNotSupported(f"Asked for {start}, got {offset}")
+        for block in range(missing[0], missing[-1] + 1):
+            begin = (block - missing[0]) * BLOCK_SIZE
+            self._blocks[block] = data[begin : begin + BLOCK_SIZE]
+
+    def _read_at(self, start: int, end: int) -> bytes:
+        """Bytes start..end-1"""
+        if start >= self._tail_start:
+            return self._tail[start - self._tail_start : end - self._tail_start]
+        first, last = start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE
+        self._fetch_blocks(first, last)
+        data = b"".join(self._blocks[_] for _ in range(first, last + 1))
+        return data[start - first * BLOCK_SIZE : end - first * BLOCK_SIZE]
+
+    def readinto(self, buffer: Any) -> int:
+        start = self._position
+        end = min(start + len(buffer), self.size)
+        if start >= end:
+            return 0
+        data = self._read_at(start, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def open_remote_wheel(
+    url: str, session: Any = None, timeout: float = 30
+) -> Tuple[ZipTree, HttpRangeFile]:
+    """
+    ZipTree over a wheel on a server, so top_level_modules() & friends work
+    without a download. Raises RangeNotSupported. The tree's real_path()
+    raises RemoteNotExtracted, there is no local file to unpack.
+    """
+    remote = HttpRangeFile(url, session, timeout)
+
+    def not_extracted() -> str:
+        raise RemoteNotExtracted(f"Remote wheel, nothing to extract: {url}")
+
+    try:
+        return ZipTree(url, not_extracted, remote), remote
+    except zipfile.BadZipFile as ex:
+        raise RangeNotSupported(f"Not a zip: {url}") from ex
+
+
+def _dist_info_members(
+    archive: zipfile.ZipFile, members: Iterable[str]
+) -> Dict[str, bytes]:
+    """Read wanted members of the (one) .dist-info folder"""
+    wanted = set(members)
+    found = {}
+    for name in archive.namelist():
+        parts = name.split("/")
+        if len(parts) != 2 or not parts[0].endswith(".dist-info"):
+            continue
+        if parts[1] in wanted and parts[1] not in found:
+            found[parts[1]] = archive.read(name)
+    return found
+
+
+def _core_metadata_digest(file: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """(offered, sha256) for the PEP 658 file"""
+    for key in METADATA_KEYS:
+        value = file.get(key)
+        if isinstance(value, dict):
+            return True, value.get("sha256")
+        if value:
+            return True, None
+    return False, None
+
+
+def _from_pep658(file: Dict[str, Any], session: Any, timeout: float) -> Optional[bytes]:
+    """METADATA from url + '.metadata', None if not offered or not right"""
+    offered, sha256 = _core_metadata_digest(file)
+    if not offered:
+        return None
+    url = file["url"] + ".metadata"
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException as ex:
+        LOGGER.debug(f"{url} failed: {ex}")
+        return None
+    if response.status_code != 200:
+        LOGGER.debug(f"{response.status_code} from {url}")
+        return None
+    data = response.content
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256.lower():
+        LOGGER.warning(f"{url} does not match its published sha256")
+        return None
+    return bytes(data)
+
+
+def _from_range(
+    file: Dict[str, Any], members: Iterable[str], session: Any, timeout: float
+) -> Optional[Tuple[Dict[str, bytes], int]]:
+    """Members via range requests, None if the server won't do ranges"""
+    try:
+        remote = HttpRangeFile(file["url"], session, timeout)
+        with zipfile.ZipFile(remote) as archive:  # type: ignore
+            found = _dist_info_members(archive, members)
+    except (RangeNotSupported, zipfile.BadZipFile, requests.RequestException) as ex:
+        LOGGER.debug(f"Range requests for {file['url']} failed: {ex}")
+        return None
+    return found, remote.bytes_transferred
+
+
+def _from_download(
+    file: Dict[str, Any],
+    members: Iterable[str],
+    session: Any,
+    timeout: float,
+    store: Optional[ArtifactStore],
+) -> Tuple[Dict[str, bytes], int]:
+    """Members from the whole wheel, kept in store if there is one"""
+    sha256 = (file.get("digests") or {}).get("sha256")
+    if store and sha256:
+        transferred = 0 if store.has(sha256) else file.get("size", 0)
+        with zipfile.ZipFile(store.fetch(file["url"], sha256, session)) as archive:
+            return _dist_info_members(archive, members), transferred
+
+    with tempfile.TemporaryFile() as temporary:
+        with session.get(file["url"], stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for block in response.iter_content(1024 * 1024):
+                temporary.write(block)
+        transferred = temporary.tell()
+        temporary.seek(0, os.SEEK_SET)
+        with zipfile.ZipFile(temporary) as archive:
+            return _dist_info_members(archive, members), transferred
+
+
+# pylint: disable=too-many-arguments
+def fetch_wheel_metadata(
+    file: Dict[str, Any],
+    session: Any = None,
+    members: Iterable[str] = ("METADATA",),
+    store: Optional[ArtifactStore] = None,
+    timeout: float = 30,
+    offline: bool = False,
+) -> WheelMetadata:
+    """
+    dist-info members of one wheel, fetched as cheaply as the index allows.
+
+    file is a file entry from PyPI json ("urls") or PEP 691 json ("files").
+    """
+    session = session or requests
+    wanted = list(dict.fromkeys(members))
+    if offline:
+        sha256 = (file.get("digests") or {}).get("sha256")
+        if not (store and sha256 and store.has(sha256)):
+            raise Offline(f"{file['filename']} not in the artifact store")
+        found, _ = _from_download(file, wanted, session, timeout, store)
+        text = found.get("METADATA", b"").decode("utf-8", errors="replace")
+        return WheelMetadata(file["filename"], text, found, "store", 0)
+    found: Dict[str, bytes] = {}
+    transferred = 0
+    source = "pep658"
+
+    if "METADATA" in wanted:
+        metadata = _from_pep658(file, session, timeout)
+        if metadata is not None:
+            found["METADATA"] = metadata
+            transferred += len(metadata)
+
+    rest = [_ for _ in wanted if _ not in found]
+    if rest:
+        ranged = _from_range(file, rest, session, timeout)
+        if ranged is None:
+            source = "download"
+            more, used = _from_download(file, rest, session, timeout, store)
+        else:
+            source = "range"
+            more, used = ranged
+        found.update(more)
+        transferred += used
+
+    text = found.get("METADATA", b"").decode("utf-8", errors="replace")
+    return WheelMetadata(file["filename"], text, found, source, transferred)
+
+
+def requires_dist(metadata: str) -> List[str]:
+    """Requires-Dist lines of a METADATA file"""
+    message = email.parser.HeaderParser().parsestr(metadata)
+    return [str(_) for _ in message.get_all("Requires-Dist") or []]
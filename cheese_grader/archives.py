@@ -0,0 +1,229 @@
+"""
+Read wheels & sdists without unpacking them.
+
+    with open_archive("pkg-1.0.tar.gz") as tree:
+        for name, data in tree.walk(lambda name: name.endswith(".py")):
+            ...
+        setup_py = tree.read_text("setup.py")
+
+Zips (wheels, zip sdists) are read member by member, in any order. Tars
+can only be read front to back cheaply, so use walk() to visit many members
+in one pass, read_bytes() is fine for a handful.
+
+Member names are relative to the archive's single top folder if it has one,
+so "pkg-1.0/setup.py" in an sdist is "setup.py".
+
+Tools that need a real folder (the external_commands shell outs) call
+real_path(), which extracts on first use only.
+"""
+import abc
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from cheese_grader.storage.artifacts import unpack_archive
+
+
+def _common_root(names: List[str]) -> str:
+    """'pkg-1.0/' if every member is inside that one folder, else ''"""
+    tops = {name.split("/", 1)[0] for name in names}
+    if len(tops) == 1 and all("/" in name for name in names):
+        return tops.pop() + "/"
+    return ""
+
+
+class ArchiveTree(abc.ABC):
+    """
+    Read only, file system like view of an archive's files
+    """
+
+    def __init__(
+        self, path: str, extractor: Optional[Callable[[], str]] = None
+    ) -> None:
+        self.path = path
+        self._extractor = extractor
+        self._extracted: Optional[str] = None
+        self._temporary: Optional[str] = None
+        self._members: Dict[str, Any] = {}
+        self.root = ""
+
+    def _index(self, members: Dict[str, Any]) -> None:
+        """Remember members by name relative to top folder"""
+        self.root = _common_root(list(members))
+        self._members = {
+            name[len(self.root) :]: member
+            for name, member in members.items()
+            if name[len(self.root) :]
+        }
+
+    def names(self) -> List[str]:
+        """Every file, relative to top folder"""
+        return sorted(self._members)
+
+    def exists(self, name: str) -> bool:
+        """Is there a file with this name"""
+        return name in self._members
+
+    @abc.abstractmethod
+    def size(self, name: str) -> int:
+        """Uncompressed size"""
+
+    @abc.abstractmethod
+    def open(self, name: str) -> IO[bytes]:
+        """Stream one member"""
+
+    def read_bytes(self, name: str) -> bytes:
+        """Whole member"""
+        with self.open(name) as handle:
+            return handle.read()
+
+    def read_text(self, name: str) -> str:
+        """Whole member as text, undecodable bytes replaced"""
+        return self.read_bytes(name).decode("utf-8", errors="replace")
+
+    def walk(
+        self, wanted: Callable[[str], bool] = lambda name: True
+    ) -> Iterator[Tuple[str, bytes]]:
+        """(name, bytes) for each wanted member, in archive order, one pass"""
+        for name in self._members:
+            if wanted(name):
+                yield name, self.read_bytes(name)
+
+    def real_path(self) -> str:
+        """
+        Folder with the archive's top level content, extracted on first call
+        """
+        if self._extracted is None:
+            if self._extractor:
+                folder = self._extractor()
+            else:
+                self._temporary = tempfile.mkdtemp(prefix="cheese_grader_")
+                unpack_archive(self.path, self._temporary)
+                folder = self._temporary
+            self._extracted = os.path.join(folder, self.root.rstrip("/"))
+        return self._extracted
+
+    def close(self) -> None:
+        """Release file handles & any temporary extraction"""
+        if self._temporary:
+            shutil.rmtree(self._temporary, ignore_errors=True)
+            self._temporary = None
+            self._extracted = None
+
+    def __enter__(self) -> "ArchiveTree":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class ZipTree(ArchiveTree):
+    """
+    Wheel or zip sdist, members found via the central directory
+
+    file_object, if given, is read instead of path, e.g. a remote wheel read
+    with HTTP range requests.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        extractor: Optional[Callable[[], str]] = None,
+        file_object: Optional[IO[bytes]] = None,
+    ) -> None:
+        super().__init__(path, extractor)
+        # pylint: disable=consider-using-with
+        self._zip = zipfile.ZipFile(file_object or path)
+        self._index(
+            {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+        )
+
+    def size(self, name: str) -> int:
+        return int(self._members[name].file_size)
+
+    def open(self, name: str) -> IO[bytes]:
+        return self._zip.open(self._members[name])
+
+    def close(self) -> None:
+        self._zip.close()
+        super().close()
+
+
+class TarTree(ArchiveTree):
+    """tar, tar.gz, tar.bz2 sdist"""
+
+    def __init__(
+        self, path: str, extractor: Optional[Callable[[], str]] = None
+    ) -> None:
+        super().__init__(path, extractor)
+        self._tar = tarfile.open(path)  # pylint: disable=consider-using-with
+        members = self._tar.getmembers()
+        self._index({member.name: member for member in members if member.isfile()})
+
+    def size(self, name: str) -> int:
+        return int(self._members[name].size)
+
+    def open(self, name: str) -> IO[bytes]:
+        handle = self._tar.extractfile(self._members[name])
+        assert handle
+        return handle
+
+    def walk(
+        self, wanted: Callable[[str], bool] = lambda name: True
+    ) -> Iterator[Tuple[str, bytes]]:
+        # fresh front to back pass, no seeking backwards in a compressed stream
+        with tarfile.open(self.path, mode="r|*") as stream:
+            for member in stream:
+                if not member.isfile():
+                    continue
+                name = member.name[len(self.root) :]
+                if name and wanted(name):
+                    handle = stream.extractfile(member)
+                    assert handle
+                    yield name, handle.read()
+
+    def close(self) -> None:
+        self._tar.close()
+        super().close()
+
+
+class FolderTree(ArchiveTree):
+    """Already unpacked source, same interface"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        members = {}
+        for folder, _, files in os.walk(path):
+            for file in files:
+                full = os.path.join(folder, file)
+                members[os.path.relpath(full, path).replace(os.sep, "/")] = full
+        self._members = members
+        self._extracted = path
+
+    def size(self, name: str) -> int:
+        return os.path.getsize(self._members[name])
+
+    def open(self, name: str) -> IO[bytes]:
+        # pylint: disable=consider-using-with
+        return open(self._members[name], "rb")
+
+
+def open_archive(
+    path: str, extractor: Optional[Callable[[], str]] = None
+) -> ArchiveTree:
+    """
+    Tree for a wheel, sdist or folder
+
+    extractor, if given, returns a folder with the archive already unpacked,
+    e.g. ArtifactStore.unpack, for when real_path() is needed.
+    """
+    if os.path.isdir(path):
+        return FolderTree(path)
+    if zipfile.is_zipfile(path):
+        return ZipTree(path, extractor)
+    if tarfile.is_tarfile(path):
+        return TarTree(path, extractor)
+    raise TypeError(f"Not a wheel, sdist or folder: {path}")
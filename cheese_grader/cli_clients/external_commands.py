@@ -15,22 +15,45 @@ Shell out to run a few commands
 - pylint
 - pypinfo
 - vermin
+
+pyflakes, pylint and vermin also have *_lines variants that stream output
+line by line instead of returning one big string.
+
+run_analyzers runs the read only tools against one folder all at once, the
+ones a WarmPool knows (pylint, black, isort) in already warm workers if given one.
 """
+import concurrent.futures
 import logging
 import os
 import shlex
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-from so_pip import settings as settings
-from so_pip.cli_clients.subprocess_utils import execute_get_text
-from so_pip.utils import guards as guards
-from so_pip.utils.files_utils import find_file
+from cheese_grader.cli_clients.subprocess_utils import (
+    CommandResult,
+    execute_get_text,
+    execute_many,
+    execute_stream_lines,
+)
+from cheese_grader.cli_clients.warm_pool import WarmPool
 
 LOGGER = logging.getLogger(__name__)
 
+# Prefix for every tool, e.g. "pipx run" or "pipenv run", empty for PATH
+SHELL = os.environ.get("CHEESE_GRADER_SHELL", "")
+
+PYLINTRC = os.path.join(os.path.dirname(__file__), "pylintrc.ini")
+
+
+def must_be_truthy(value: Any, message: str) -> None:
+    """Refuse to build a command around an empty file or folder name"""
+    if not value:
+        raise TypeError(message)
+
 
 def pytest_detect(file: str) -> str:
     """How many tests in this file"""
-    guards.must_be_truthy(file, "file required")
+    must_be_truthy(file, "file required")
     # so few SO questions have executable unit tests
 
     command_text = f"pytest {file} --collect-only".strip().replace("  ", " ")
@@ -46,7 +69,7 @@ def pip_upgrade(file: str) -> str:
     """
     Get latest versions & pip
     """
-    guards.must_be_truthy(file, "file required")
+    must_be_truthy(file, "file required")
     # pip-upgrade
     command_text = f"pip-upgrade --default-index-url --file {file}".strip().replace(
         "  ", " "
@@ -61,7 +84,7 @@ def pur(file: str) -> str:
     """
     Get latest versions & pip
     """
-    guards.must_be_truthy(file, "file required")
+    must_be_truthy(file, "file required")
     # alternative... this one upgrades pinned, too
     # https://github.com/alanhamlett/pip-update-requirements
 
@@ -74,29 +97,47 @@ def pur(file: str) -> str:
 
 def safety(file: str) -> str:
     """Check if dep is malicious/insecure"""
-    guards.must_be_truthy(file, "file required")
+    must_be_truthy(file, "file required")
     command = shlex.split(f"safety check --file {file}".strip().replace("  ", " "))
     LOGGER.debug(command)
     result = execute_get_text(command)
     return result
 
 
-def pyflakes(file: str) -> str:
-    """Just run pyflakes"""
-    guards.must_be_truthy(file, "file required")
+def _pyflakes_command(file: str) -> List[str]:
+    """Build pyflakes command"""
+    must_be_truthy(file, "file required")
     command = shlex.split(
-        f"{settings.SHELL} pyflakes {file}".strip().replace("  ", " ")
+        f"{SHELL} pyflakes {file}".strip().replace("  ", " ")
     )
     LOGGER.debug(command)
-    result = execute_get_text(command)
+    return command
+
+
+def pyflakes(file: str) -> str:
+    """Just run pyflakes"""
+    result = execute_get_text(_pyflakes_command(file))
     return result
 
 
+def pyflakes_lines(
+    file: str, timeout: Optional[float] = None, max_bytes: Optional[int] = None
+) -> Iterator[str]:
+    """Just run pyflakes, yield lines as they arrive"""
+    # pyflakes exits 1 when it finds anything
+    return execute_stream_lines(
+        _pyflakes_command(file),
+        ignore_error=True,
+        timeout=timeout,
+        max_bytes=max_bytes,
+    )
+
+
 def generate_requirements(folder: str) -> str:
     """Make more installable"""
-    guards.must_be_truthy(folder, "folder required")
+    must_be_truthy(folder, "folder required")
     command = shlex.split(
-        f"{settings.SHELL} pipreqs {folder} --force".strip().replace("  ", " ")
+        f"{SHELL} pipreqs {folder} --force".strip().replace("  ", " ")
     )
     LOGGER.debug(command)
     result = execute_get_text(command)
@@ -105,8 +146,8 @@ def generate_requirements(folder: str) -> str:
 
 def futurize(file_name: str) -> str:
     """Yet another py2 to 3 converter"""
-    guards.must_be_truthy(file_name, "file_name required")
-    text = f"{settings.SHELL} futurize --stage1 -w {file_name}"
+    must_be_truthy(file_name, "file_name required")
+    text = f"{SHELL} futurize --stage1 -w {file_name}"
     LOGGER.debug(text)
     command = shlex.split(text)
     result = execute_get_text(command)
@@ -116,8 +157,8 @@ def futurize(file_name: str) -> str:
 
 def black(folder_name: str) -> str:
     """Format files to keep pylint happy"""
-    guards.must_be_truthy(folder_name, "folder_name required")
-    text = f"{settings.SHELL} black {folder_name} --target-version=py38"
+    must_be_truthy(folder_name, "folder_name required")
+    text = f"{SHELL} black {folder_name} --target-version=py38"
     LOGGER.debug(text)
     command = shlex.split(text)
     result = execute_get_text(command, ignore_error=True)
@@ -127,8 +168,8 @@ def black(folder_name: str) -> str:
 
 def two_to_three(file_name: str) -> str:
     """fix print"""
-    guards.must_be_truthy(file_name, "file_name required")
-    text = f"{settings.SHELL} 2to3 -w {file_name}"
+    must_be_truthy(file_name, "file_name required")
+    text = f"{SHELL} 2to3 -w {file_name}"
     LOGGER.debug(text)
     command = shlex.split(text)
     result = execute_get_text(command)
@@ -138,9 +179,9 @@ def two_to_three(file_name: str) -> str:
 
 def pyupgrade(file_name: str) -> str:
     """Bump to 3.7+"""
-    guards.must_be_truthy(file_name, "file_name required")
+    must_be_truthy(file_name, "file_name required")
     command = (
-        f"{settings.SHELL} pyupgrade "
+        f"{SHELL} pyupgrade "
         f"--py37-plus "
         f"--exit-zero-even-if-changed {file_name}".strip().replace("  ", " ")
     )
@@ -155,13 +196,13 @@ def pyupgrade(file_name: str) -> str:
 def isort(folder: str) -> str:
     """Sort the imports to discover import order bugs and prevent import order bugs"""
 
-    guards.must_be_truthy(folder, "folder required")
+    must_be_truthy(folder, "folder required")
     # This must run before black. black doesn't change import order but it wins
     # any arguments about formatting.
     # isort MUST be installed with pipx! It is not compatible with pylint in the same
     # venv. Maybe someday, but it just isn't worth the effort.
 
-    command = f"{settings.SHELL} isort --profile black {folder}"
+    command = f"{SHELL} isort --profile black {folder}"
     LOGGER.debug(command)
     parts = shlex.split(command)
     try:
@@ -174,23 +215,27 @@ def isort(folder: str) -> str:
     return ""
 
 
-def pylint(folder: str) -> str:
-    """Sort the imports to discover import order bugs and prevent import order bugs"""
-    guards.must_be_truthy(folder, "folder required")
-    # This must run before black. black doesn't change import order but it wins
-    # any arguments about formatting.
-    # isort MUST be installed with pipx! It is not compatible with pylint in the same
-    # venv. Maybe someday, but it just isn't worth the effort.
-    rcfile = find_file("pylintrc.ini", __file__)
+def _pylint_command(folder: str) -> List[str]:
+    """Build pylint command"""
+    must_be_truthy(folder, "folder required")
+    rcfile = PYLINTRC
 
     command = (
-        f"{settings.SHELL} pylint "
+        f"{SHELL} pylint "
         "--msg-template='{path}:{line}: [{msg_id}({symbol}), {obj}] {msg}' "
         f"--exit-zero --rcfile='{rcfile}' {folder}".strip().replace("  ", " ")
     )
-    "".strip().replace("  ", " ")
     LOGGER.debug(command)
-    parts = shlex.split(command)
+    return shlex.split(command)
+
+
+def pylint(folder: str) -> str:
+    """Sort the imports to discover import order bugs and prevent import order bugs"""
+    # This must run before black. black doesn't change import order but it wins
+    # any arguments about formatting.
+    # isort MUST be installed with pipx! It is not compatible with pylint in the same
+    # venv. Maybe someday, but it just isn't worth the effort.
+    parts = _pylint_command(folder)
     try:
         result = execute_get_text(parts)
         LOGGER.debug(result)
@@ -201,18 +246,27 @@ def pylint(folder: str) -> str:
     return ""
 
 
+def pylint_lines(
+    folder: str, timeout: Optional[float] = None, max_bytes: Optional[int] = None
+) -> Iterator[str]:
+    """Lint, yield lines as they arrive. Raises FileNotFoundError if no pylint"""
+    return execute_stream_lines(
+        _pylint_command(folder), timeout=timeout, max_bytes=max_bytes
+    )
+
+
 def pypinfo(package: str) -> str:
     """
     Pypi info
     """
-    guards.must_be_truthy(package, "package required")
+    must_be_truthy(package, "package required")
     # https://pypi.org/project/pypinfo/
     if not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", None):
         return (
             "You must set up credentials "
             "to run pypinfo https://pypi.org/project/pypinfo/"
         )
-    command = f"{settings.SHELL} pypinfo {package}"
+    command = f"{SHELL} pypinfo {package}"
     LOGGER.debug(command)
     parts = shlex.split(command)
     result = execute_get_text(parts, ignore_error=True)
@@ -220,15 +274,128 @@ def pypinfo(package: str) -> str:
     return result
 
 
+def _vermin_command(package: str) -> List[str]:
+    """Build vermin command"""
+    must_be_truthy(package, "package required")
+
+    command = f"{SHELL} vermin {package}"
+    LOGGER.debug(command)
+    return shlex.split(command)
+
+
 def vermin(package: str) -> str:
     """
     vermin info
     """
-    guards.must_be_truthy(package, "package required")
-
-    command = f"{settings.SHELL} vermin {package}"
-    LOGGER.debug(command)
-    parts = shlex.split(command)
-    result = execute_get_text(parts, ignore_error=True)
+    result = execute_get_text(_vermin_command(package), ignore_error=True)
     LOGGER.debug(result)
     return result
+
+
+def vermin_lines(
+    package: str, timeout: Optional[float] = None, max_bytes: Optional[int] = None
+) -> Iterator[str]:
+    """
+    vermin info, yield lines as they arrive
+    """
+    return execute_stream_lines(
+        _vermin_command(package),
+        ignore_error=True,
+        timeout=timeout,
+        max_bytes=max_bytes,
+    )
+
+
+def _pytest_detect_command(folder: str) -> List[str]:
+    """Collect, but don't run, tests"""
+    must_be_truthy(folder, "folder required")
+    return shlex.split(f"pytest {folder} --collect-only")
+
+
+def _black_check_command(folder: str) -> List[str]:
+    """Would black reformat? Doesn't write files"""
+    must_be_truthy(folder, "folder required")
+    return shlex.split(
+        f"{SHELL} black --check {folder} --target-version=py38".strip()
+    )
+
+
+def _isort_check_command(folder: str) -> List[str]:
+    """Would isort reorder? Doesn't write files"""
+    must_be_truthy(folder, "folder required")
+    return shlex.split(
+        f"{SHELL} isort --check-only --profile black {folder}".strip()
+    )
+
+
+def _two_to_three_dry_run_command(folder: str) -> List[str]:
+    """Would 2to3 change anything? Without -w it only prints a diff"""
+    must_be_truthy(folder, "folder required")
+    return shlex.split(f"{SHELL} 2to3 {folder}".strip())
+
+
+def _pipreqs_print_command(folder: str) -> List[str]:
+    """What does it import, printed instead of written to requirements.txt"""
+    must_be_truthy(folder, "folder required")
+    return shlex.split(f"{SHELL} pipreqs {folder} --print".strip())
+
+
+# Tools that only read the source, so they can safely run at the same time.
+READ_ONLY_ANALYZERS: Dict[str, Callable[[str], List[str]]] = {
+    "pytest_detect": _pytest_detect_command,
+    "pyflakes": _pyflakes_command,
+    "pylint": _pylint_command,
+    "vermin": _vermin_command,
+    "black": _black_check_command,
+    "isort": _isort_check_command,
+    "two_to_three": _two_to_three_dry_run_command,
+    "pipreqs": _pipreqs_print_command,
+}
+
+
+def run_analyzers(
+    folder: str,
+    tools: Optional[List[str]] = None,
+    max_concurrency: int = 4,
+    timeout: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    pool: Optional[WarmPool] = None,
+) -> Dict[str, CommandResult]:
+    """
+    Run read only analyzers against unpacked source concurrently.
+
+    Result per tool has exit code, output, timing and "missing"/"timeout" errors.
+    """
+    must_be_truthy(folder, "folder required")
+    tools = list(READ_ONLY_ANALYZERS) if tools is None else tools
+    unknown = [tool for tool in tools if tool not in READ_ONLY_ANALYZERS]
+    if unknown:
+        raise ValueError(f"Not a read only analyzer: {', '.join(unknown)}")
+    commands = {tool: READ_ONLY_ANALYZERS[tool](folder) for tool in tools}
+    # one deadline for both kinds, warm jobs run while execute_many does
+    deadline = None if timeout is None else time.monotonic() + timeout
+    warm = {}
+    if pool is not None:
+        for tool in [_ for _ in commands if _ in pool.tools]:
+            command = commands.pop(tool)
+            # the job runs in folder, so it is "." in the arguments, drop the
+            # shell prefix & program name
+            in_folder = READ_ONLY_ANALYZERS[tool](".")
+            arguments = in_folder[in_folder.index(tool) + 1 :]
+            future = pool.submit(tool, arguments, cwd=folder, sys_path=[folder])
+            warm[tool] = (command, future)
+    results = execute_many(
+        commands, max_concurrency=max_concurrency, timeout=timeout, max_bytes=max_bytes
+    )
+    for tool, (command, future) in warm.items():
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            results[tool] = future.result(remaining)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            results[tool] = CommandResult(
+                tool, command, None, "", timeout or 0, "timeout"
+            )
+    for result in results.values():
+        LOGGER.debug(f"{result.name} took {result.seconds:.2f}s {result.error}")
+    return results
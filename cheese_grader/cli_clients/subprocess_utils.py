@@ -1,12 +1,22 @@
 """
 Reduce friction of working with subprocess
 """
+import asyncio
 import logging
 import subprocess  # nosec
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional
 
 LOGGER = logging.getLogger(__name__)
 
+# longer lines are yielded in pieces
+LINE_LIMIT = 64 * 1024
+
+TRUNCATION_MARKER = (
+    "[output truncated after {max_bytes} bytes, {dropped} bytes not shown]"
+)
+
 
 def execute_get_text(
     command: List[str],
@@ -35,3 +45,204 @@ def execute_get_text(
         raise
     else:
         return completed.stdout.decode("utf-8") + completed.stderr.decode("utf-8")
+
+
+def execute_stream_lines(
+    command: List[str],
+    ignore_error: bool = False,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Execute shell command and yield stdout+stderr lines as they arrive
+
+    Never holds more than one line (at most LINE_LIMIT bytes of it) in memory.
+    Once a line would go past max_bytes nothing more is yielded, the rest is
+    read & counted only, and a truncation marker is yielded at the end.
+    Process is killed after timeout seconds.
+    """
+    # pylint: disable=consider-using-with
+    process = subprocess.Popen(  # nosec
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env,
+    )
+    timed_out = threading.Event()
+
+    def kill() -> None:
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+    seen = 0
+    dropped = 0
+    truncated = False
+    try:
+        assert process.stdout
+        for raw in iter(lambda: process.stdout.readline(LINE_LIMIT), b""):
+            if not truncated and max_bytes is not None and seen + len(raw) > max_bytes:
+                truncated = True
+            if truncated:
+                dropped += len(raw)
+                continue
+            seen += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        return_code = process.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        if process.poll() is None:
+            # consumer stopped early
+            process.kill()
+            process.wait()
+        if process.stdout:
+            process.stdout.close()
+
+    if truncated:
+        yield TRUNCATION_MARKER.format(max_bytes=max_bytes, dropped=dropped)
+    if timed_out.is_set():
+        LOGGER.debug(f"Timed out after {timeout}s: {command}")
+        raise subprocess.TimeoutExpired(command, timeout or 0)
+    if return_code and not ignore_error:
+        raise subprocess.CalledProcessError(return_code, command)
+
+
+def execute_to_file(
+    command: List[str],
+    output_file: str,
+    ignore_error: bool = False,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> int:
+    """
+    Execute shell command, raw stdout+stderr goes straight to a file, not to RAM
+
+    Returns exit code.
+    """
+    with open(output_file, "wb") as handle:
+        completed = subprocess.run(  # nosec
+            command,
+            check=not ignore_error,
+            stdout=handle,
+            stderr=subprocess.STDOUT,
+            env=env,
+            timeout=timeout,
+        )
+    return completed.returncode
+
+
+class CommandResult(NamedTuple):
+    """
+    Outcome of one command run by execute_many
+    """
+
+    name: str
+    command: List[str]
+    # None if it never ran to completion
+    return_code: Optional[int]
+    output: str
+    seconds: float
+    # "", "missing" or "timeout"
+    error: str
+
+
+async def execute_get_text_async(
+    name: str,
+    command: List[str],
+    limit: asyncio.Semaphore,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+) -> CommandResult:
+    """
+    Execute shell command without blocking the event loop, stdout+stderr merged
+
+    Doesn't raise for missing commands, timeouts or non zero exits, all of that
+    is in the result.
+    """
+    async with limit:
+        start = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=env,
+            )
+        except FileNotFoundError:
+            LOGGER.debug(f"{name} not installed")
+            return CommandResult(
+                name, command, None, "", time.perf_counter() - start, "missing"
+            )
+
+        chunks: List[bytes] = []
+        seen = 0
+        dropped = 0
+
+        async def read_all() -> None:
+            nonlocal seen, dropped
+            assert process.stdout
+            while True:
+                chunk = await process.stdout.read(64 * 1024)
+                if not chunk:
+                    break
+                if max_bytes is not None and seen + len(chunk) > max_bytes:
+                    keep = max(max_bytes - seen, 0)
+                    chunks.append(chunk[:keep])
+                    seen += keep
+                    dropped += len(chunk) - keep
+                    continue
+                chunks.append(chunk)
+                seen += len(chunk)
+            await process.wait()
+
+        error = ""
+        try:
+            await asyncio.wait_for(read_all(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            error = "timeout"
+
+        output = b"".join(chunks).decode("utf-8", errors="replace")
+        if dropped:
+            output += "\n" + TRUNCATION_MARKER.format(
+                max_bytes=max_bytes, dropped=dropped
+            )
+        return CommandResult(
+            name,
+            command,
+            None if error else process.returncode,
+            output,
+            time.perf_counter() - start,
+            error,
+        )
+
+
+def execute_many(
+    commands: Dict[str, List[str]],
+    max_concurrency: int = 4,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, CommandResult]:
+    """
+    Run named commands concurrently, at most max_concurrency at a time.
+
+    Takes about as long as the slowest command, not the sum of all of them.
+    """
+
+    async def run_all() -> List[CommandResult]:
+        limit = asyncio.Semaphore(max_concurrency)
+        return await asyncio.gather(
+            *(
+                execute_get_text_async(name, command, limit, env, timeout, max_bytes)
+                for name, command in commands.items()
+            )
+        )
+
+    return {result.name: result for result in asyncio.run(run_all())}
@@ -0,0 +1,268 @@
+"""
+Long lived worker processes with pylint, black, isort & mypy already imported.
+
+Starting an interpreter and importing astroid or mypy costs 1-2s, more than
+the analysis of a small package. Workers here import the tools once and then
+run them through their python entry points, job after job.
+
+    with WarmPool() as pool:
+        result = pool.run("pylint", ["--exit-zero", "pkg"], cwd=unpacked)
+
+Each job gets its own working directory, extra sys.path entries and sys.argv,
+all put back afterwards, and modules imported from the job's folders are
+forgotten so the next package can't see them. Relative folders are resolved
+before the job changes directory, args are then relative to cwd.
+
+On python 3.11+ workers are replaced after jobs_per_worker jobs anyway, tools
+leak memory & caches. Older pythons can't, there workers live as long as the
+pool, so make pools short lived (one per batch of packages) there.
+
+Results are the same CommandResult that execute_many returns.
+"""
+import contextlib
+import functools
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from cheese_grader.cli_clients.subprocess_utils import CommandResult
+
+LOGGER = logging.getLogger(__name__)
+
+# takes args (without the program name) returns an exit code
+Runner = Callable[[List[str]], Optional[int]]
+
+
+def run_entry_point(spec: str, args: List[str]) -> Optional[int]:
+    """Call 'module:function' as if it was the console script, argv & all"""
+    module_name, _, function_name = spec.partition(":")
+    function = getattr(importlib.import_module(module_name), function_name)
+    sys.argv = [module_name.split(".")[0], *args]
+    try:
+        result = function()
+    except SystemExit as exited:
+        return _exit_code(exited.code)
+    return result if isinstance(result, int) else 0
+
+
+def run_mypy(args: List[str]) -> Optional[int]:
+    """mypy binds sys.stdout at import, so go through its api instead"""
+    # pylint: disable=import-outside-toplevel
+    from mypy import api
+
+    stdout, stderr, status = api.run(args)
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    return status
+
+
+TOOLS: Dict[str, Runner] = {
+    "pylint": functools.partial(run_entry_point, "pylint:run_pylint"),
+    "black": functools.partial(run_entry_point, "black:main"),
+    "isort": functools.partial(run_entry_point, "isort.main:main"),
+    "mypy": run_mypy,
+}
+
+PRELOAD = ["pylint.lint", "astroid", "black", "isort.main", "mypy.api"]
+
+
+class ToolJob(NamedTuple):
+    """One tool run"""
+
+    tool: str
+    args: List[str]
+    cwd: Optional[str] = None
+    sys_path: List[str] = []
+
+
+class _Capture(io.StringIO):
+    """Output buffer that survives tools closing sys.stdout"""
+
+    def close(self) -> None:
+        pass
+
+
+def _exit_code(code: Any) -> int:
+    """sys.exit() argument to exit code, like the interpreter does it"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _preload(modules: List[str]) -> None:
+    """Worker initializer, import whatever of the tools is installed"""
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            LOGGER.debug(f"{module} not installed, can't preload it")
+
+
+def _forget_modules(before: Iterable[str], roots: List[str]) -> None:
+    """Drop modules imported from the job's folders during the job"""
+    known = set(before)
+    roots = [os.path.abspath(root) + os.sep for root in roots if root]
+    for name, module in list(sys.modules.items()):
+        if name in known:
+            continue
+        file_name = getattr(module, "__file__", None) or ""
+        if any(os.path.abspath(file_name).startswith(root) for root in roots):
+            del sys.modules[name]
+    astroid = sys.modules.get("astroid")
+    if astroid is not None and hasattr(astroid, "MANAGER"):
+        astroid.MANAGER.clear_cache()
+
+
+def _run_job(name: str, runner: Runner, job: ToolJob) -> CommandResult:
+    """Worker side, run one tool in place, isolated by folder & sys.path"""
+    start = time.perf_counter()
+    buffer = _Capture()
+    saved_cwd = os.getcwd()
+    saved_path = list(sys.path)
+    saved_argv = list(sys.argv)
+    saved_modules = list(sys.modules)
+    code: Optional[int] = None
+    error = ""
+    # before chdir, or a relative folder would be looked for inside itself
+    sys_path = [os.path.abspath(_) for _ in job.sys_path]
+    try:
+        if job.cwd:
+            os.chdir(job.cwd)
+        sys.path[:0] = sys_path
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            try:
+                code = runner(list(job.args))
+            except SystemExit as exited:
+                code = _exit_code(exited.code)
+    except ImportError:
+        LOGGER.debug(f"{name} not installed")
+        error = "missing"
+    except Exception:  # pylint: disable=broad-except
+        # a tool crashing on one package mustn't take the worker down
+        buffer.write(traceback.format_exc())
+        error = "crashed"
+    finally:
+        os.chdir(saved_cwd)
+        sys.path[:] = saved_path
+        sys.argv[:] = saved_argv
+        _forget_modules(saved_modules, [job.cwd or ""] + sys_path)
+    return CommandResult(
+        name,
+        [name, *job.args],
+        code,
+        buffer.getvalue(),
+        time.perf_counter() - start,
+        error,
+    )
+
+
+def _context(preload: List[str]) -> Any:
+    """forkserver where there is one, so workers fork from a warm parent"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(preload)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class WarmPool:
+    """
+    Pool of workers that keep the tools imported between jobs
+    """
+
+    def __init__(
+        self,
+        tools: Optional[Dict[str, Runner]] = None,
+        max_workers: Optional[int] = None,
+        jobs_per_worker: Optional[int] = 50,
+        preload: Optional[List[str]] = None,
+    ) -> None:
+        self.tools = dict(TOOLS if tools is None else tools)
+        preload = PRELOAD if preload is None else preload
+        options: Dict[str, Any] = {}
+        # ignored before 3.11, see module docstring
+        if jobs_per_worker and sys.version_info >= (3, 11):
+            options["max_tasks_per_child"] = jobs_per_worker
+        self._executor = ProcessPoolExecutor(
+            max_workers or os.cpu_count() or 1,
+            mp_context=_context(preload),
+            initializer=_preload,
+            initargs=(preload,),
+            **options,
+        )
+
+    def submit(
+        self,
+        tool: str,
+        args: List[str],
+        cwd: Optional[str] = None,
+        sys_path: Optional[List[str]] = None,
+    ) -> "Future[CommandResult]":
+        """
+        Queue a tool run, returns at once. Workers don't share our working
+        directory, so relative cwd & sys_path are made absolute here.
+        """
+        if tool not in self.tools:
+            raise TypeError(f"No warm runner for {tool}")
+        cwd = os.path.abspath(cwd) if cwd else None
+        paths = [os.path.abspath(_) for _ in sys_path or []]
+        job = ToolJob(tool, list(args), cwd, paths)
+        return self._executor.submit(_run_job, tool, self.tools[tool], job)
+
+    def run(
+        self,
+        tool: str,
+        args: List[str],
+        cwd: Optional[str] = None,
+        sys_path: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> CommandResult:
+        """
+        Run a tool and wait for it.
+
+        On timeout the job keeps its worker busy until it ends, a worker can't
+        be killed without losing the pool.
+        """
+        future = self.submit(tool, args, cwd, sys_path)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            return CommandResult(tool, [tool, *args], None, "", timeout or 0, "timeout")
+
+    def run_many(self, jobs: Iterable[ToolJob]) -> Iterator[CommandResult]:
+        """Run jobs across the pool, results in the order given"""
+        futures = [
+            self.submit(job.tool, job.args, job.cwd, job.sys_path) for job in jobs
+        ]
+        for future in futures:
+            yield future.result()
+
+    def close(self) -> None:
+        """Stop the workers"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "WarmPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,240 @@
+"""
+Transitive dependency graph from requires_dist metadata.
+
+Each (name, version) is resolved once, no matter how many parents share it,
+so requests/urllib3/etc are looked up once per lockfile, not once per parent.
+
+Nodes are yielded as soon as they are resolved, breadth first, so a scorer
+can start on the top level packages while deeper levels are still fetched.
+
+This isn't a resolver. Versions come from the lockfile when it pins them,
+otherwise the newest non-yanked release that matches the specifier.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from packaging.markers import default_environment
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.version import InvalidVersion, Version
+
+from cheese_grader.lockfiles import Pin
+from cheese_grader.utils import normalize_name
+
+LOGGER = logging.getLogger(__name__)
+
+# name -> PyPI project JSON (has "releases"), None if no such project
+ProjectSource = Callable[[str], Optional[Dict[str, Any]]]
+# name, version -> PyPI release JSON (has "info"), None if no such release
+ReleaseSource = Callable[[str, str], Optional[Dict[str, Any]]]
+
+NodeKey = Tuple[str, str]
+
+
+class DependencyNode(NamedTuple):
+    """
+    One resolved package in the graph
+    """
+
+    name: str
+    # None if the package or a matching version couldn't be found
+    version: Optional[str]
+    depth: int
+    # (name, version) of direct dependencies
+    requires: List[NodeKey]
+    # parent that first led here, None for top level
+    parent: Optional[NodeKey]
+
+
+class _Memo:
+    """
+    Compute each key once, even when threads ask for it at the same time
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: Dict[Any, Future] = {}
+
+    def get(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Cached value, computed by the first caller"""
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        assert future
+        if owner:
+            try:
+                future.set_result(compute())
+            except BaseException as ex:  # noqa: B001
+                future.set_exception(ex)
+        return future.result()
+
+
+class DependencyGraph:
+    """
+    Memoized walk of requires_dist
+    """
+
+    def __init__(
+        self,
+        project: ProjectSource,
+        release: ReleaseSource,
+        environment: Optional[Dict[str, str]] = None,
+        max_workers: int = 8,
+    ) -> None:
+        self.project = project
+        self.release = release
+        self.environment = environment or default_environment()
+        self.max_workers = max_workers
+        self.pins: Dict[str, str] = {}
+        self._projects = _Memo()
+        self._versions = _Memo()
+        self._requirements = _Memo()
+        self.nodes: Dict[NodeKey, DependencyNode] = {}
+
+    def choose_version(self, name: str, specifier: str) -> Optional[str]:
+        """
+        Pinned version if there is one, else newest matching release
+        """
+        if name in self.pins:
+            return self.pins[name]
+        return self._versions.get(
+            (name, specifier), lambda: self._newest_matching(name, specifier)
+        )
+
+    def _newest_matching(self, name: str, specifier: str) -> Optional[str]:
+        """Newest non-yanked release in specifier, pre-releases only as last resort"""
+        project = self._projects.get(name, lambda: self.project(name))
+        if not project:
+            return None
+        candidates = []
+        for version, files in (project.get("releases") or {}).items():
+            if files and all(file.get("yanked") for file in files):
+                continue
+            try:
+                candidates.append(Version(version))
+            except InvalidVersion:
+                continue
+        requirement = Requirement(f"{name}{specifier}")
+        matching = list(requirement.specifier.filter(candidates))
+        if not matching:
+            matching = list(requirement.specifier.filter(candidates, prereleases=True))
+        return str(max(matching)) if matching else None
+
+    def requirements(
+        self, name: str, version: str, extras: FrozenSet[str]
+    ) -> List[Requirement]:
+        """
+        Direct requirements of one release that apply to this environment
+        """
+        return self._requirements.get(
+            (name, version, extras),
+            lambda: self._applicable_requirements(name, version, extras),
+        )
+
+    def _applicable_requirements(
+        self, name: str, version: str, extras: FrozenSet[str]
+    ) -> List[Requirement]:
+        """requires_dist, minus what the markers rule out"""
+        release = self.release(name, version) or {}
+        found = []
+        for line in (release.get("info") or {}).get("requires_dist") or []:
+            try:
+                requirement = Requirement(line)
+            except InvalidRequirement:
+                LOGGER.debug(f"Bad requires_dist in {name} {version}: {line}")
+                continue
+            if requirement.marker:
+                environments = [dict(self.environment, extra=_) for _ in extras]
+                environments.append(dict(self.environment, extra=""))
+                if not any(requirement.marker.evaluate(_) for _ in environments):
+                    continue
+            found.append(requirement)
+        return found
+
+    def _resolve(
+        self, edge: "_Edge"
+    ) -> Tuple[Optional[str], List["_Edge"], List[NodeKey]]:
+        """
+        Version of one edge, edges to its children & their versions.
+        All lookups memoized, runs on worker threads.
+        """
+        version = self.choose_version(edge.name, edge.specifier)
+        if version is None:
+            return None, [], []
+        key = (edge.name, version)
+        children = [
+            _Edge(
+                normalize_name(requirement.name),
+                str(requirement.specifier),
+                frozenset(requirement.extras),
+                edge.depth + 1,
+                key,
+            )
+            for requirement in self.requirements(edge.name, version, edge.extras)
+        ]
+        requires = [
+            (child.name, self.choose_version(child.name, child.specifier) or "")
+            for child in children
+        ]
+        return version, children, requires
+
+    def walk(self, roots: Iterable[Pin]) -> Iterator[DependencyNode]:
+        """
+        Yield each (name, version) once, breadth first, as it is resolved
+        """
+        roots = list(roots)
+        for pin in roots:
+            if pin.version:
+                self.pins.setdefault(pin.name, pin.version)
+
+        level = [
+            _Edge(pin.name, f"=={pin.version}" if pin.version else "", pin.extras)
+            for pin in roots
+        ]
+        seen_extras: Dict[NodeKey, Set[str]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                next_level = []
+                for edge, (version, children, requires) in zip(
+                    level, executor.map(self._resolve, level)
+                ):
+                    key = (edge.name, version or "")
+                    old_extras = seen_extras.get(key)
+                    if old_extras is not None and edge.extras <= old_extras:
+                        continue
+                    seen_extras.setdefault(key, set()).update(edge.extras)
+                    next_level.extend(children)
+                    if old_extras is not None:
+                        # already yielded, only new extras' dependencies to walk
+                        continue
+                    node = DependencyNode(
+                        edge.name, version, edge.depth, requires, edge.parent
+                    )
+                    self.nodes[key] = node
+                    yield node
+                level = next_level
+
+
+class _Edge(NamedTuple):
+    """Parent asked for this"""
+
+    name: str
+    specifier: str
+    extras: FrozenSet[str]
+    depth: int = 0
+    parent: Optional[NodeKey] = None
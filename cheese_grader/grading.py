@@ -0,0 +1,225 @@
+"""
+Grade many packages, one process per worker, results as they finish.
+
+Each worker builds its own clients, caches & engine once (initializer), then
+grades one package per task. At most 2 tasks per worker are in flight, so a
+10,000 line lockfile costs no more memory than a 10 line one, and results
+are yielded in completion order, not input order.
+
+    for record in grade_stream(pins, GradeOptions(), workers=8):
+        print(json.dumps(record))
+"""
+import logging
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+from cheese_grader.api_clients.pypi_batch import (
+    PYPI_URL,
+    PYPISTATS_URL,
+    MetadataFetcher,
+)
+from cheese_grader.archives import ArchiveTree, open_archive
+from cheese_grader.lockfiles import Pin
+from cheese_grader.signals import Engine, Grade, PackageContext, Tier
+from cheese_grader.storage.artifacts import ArtifactStore, pick_file
+from cheese_grader.storage.download_counts import (
+    DownloadCountCache,
+    Offline,
+    PackageNotFound,
+    RateLimited,
+)
+from cheese_grader.storage.index_mirror import IndexMirror
+from cheese_grader.storage.name_index import NameIndex
+from cheese_grader.storage.score_cache import ScoreCache
+
+LOGGER = logging.getLogger(__name__)
+
+# tasks in flight per worker, enough to keep workers busy
+QUEUE_DEPTH = 2
+
+# decision for a package that couldn't be looked up offline, neither
+# accepted nor rejected
+UNKNOWN = "unknown"
+
+
+class GradeOptions(NamedTuple):
+    """
+    How to grade, sent to each worker once
+    """
+
+    max_tier: Tier = Tier.MEDIUM
+    # PyPI json from the local mirror only, archives from the artifact store
+    offline: bool = False
+    use_cache: bool = True
+    # Population.save() file, to rank counts against all of PyPI
+    population: Optional[str] = None
+    pypi_url: str = PYPI_URL
+    pypistats_url: str = PYPISTATS_URL
+
+
+class Grader:
+    """
+    Clients, caches & engine for grading one package after another
+    """
+
+    def __init__(self, options: GradeOptions) -> None:
+        self.options = options
+        self.fetcher = MetadataFetcher(
+            options.pypi_url,
+            options.pypistats_url,
+            max_workers=2,
+            # read offline, written through online, so offline runs have data
+            mirror=IndexMirror(),
+            offline=options.offline,
+        )
+        self.store = ArtifactStore()
+        self.counts = DownloadCountCache()
+        self.engine = Engine(
+            max_tier=options.max_tier,
+            cache=ScoreCache() if options.use_cache else None,
+        )
+        self.population = None
+        if options.population:
+            # pylint: disable=import-outside-toplevel
+            from cheese_grader.population import Population
+
+            self.population = Population.load(options.population)
+        # typosquat needs one, built by whoever syncs names, None if never built
+        names = NameIndex()
+        self.name_index = names if names.names else None
+
+    def _downloads(self, context: PackageContext) -> Optional[int]:
+        """Cached download count, None if unknown"""
+        try:
+            return self.counts.get(context.name, self.fetcher.fetch_downloads_once)
+        except (PackageNotFound, RateLimited, Offline) as ex:
+            LOGGER.debug(f"No download count for {context.name}: {ex}")
+            return None
+
+    def _archive(self, context: PackageContext) -> ArchiveTree:
+        """Download (once, ever) & open the sdist or wheel"""
+        file = context["file"]
+        if file is None:
+            raise KeyError(f"No files uploaded for {context.name} {context.version}")
+        sha256 = file["digests"]["sha256"]
+        if self.options.offline and not self.store.has(sha256):
+            raise KeyError(f"{file['filename']} not in the artifact store")
+        path = self.store.fetch(file["url"], sha256, self.fetcher.session)
+        return open_archive(path, lambda: self.store.unpack(sha256))
+
+    def context(self, pin: Pin) -> PackageContext:
+        """Metadata now, downloads & archive only if a signal asks"""
+        project = self.fetcher.find_project(pin.name)
+        latest = ((project or {}).get("info") or {}).get("version")
+        version = pin.version or latest
+        release = project
+        if project is not None and version != latest:
+            release = self.fetcher.find_release(pin.name, str(version))
+        file = pick_file(release) if release else None
+        return PackageContext(
+            pin.name,
+            version,
+            loaders={"downloads": self._downloads, "archive": self._archive},
+            metadata=project,
+            file=file,
+            digest=((file or {}).get("digests") or {}).get("sha256"),
+            population=self.population,
+            name_index=self.name_index,
+        )
+
+    def grade(self, pin: Pin) -> Dict[str, Any]:
+        """One NDJSON record, errors end up in the record"""
+        context = None
+        # pylint: disable=broad-except
+        try:
+            context = self.context(pin)
+            return as_record(self.engine.grade(context))
+        except Offline as ex:
+            LOGGER.debug(f"Can't grade {pin.name} offline: {ex}")
+            return {
+                "name": pin.name,
+                "version": pin.version,
+                "score": None,
+                "decision": UNKNOWN,
+                "error": f"offline: {ex}",
+            }
+        except Exception as ex:
+            LOGGER.debug(f"Grading {pin.name} failed: {ex}")
+            return {"name": pin.name, "version": pin.version, "error": str(ex)}
+        finally:
+            if context is not None and "archive" in context.values:
+                context.values["archive"].close()
+
+
+def as_record(grade: Grade) -> Dict[str, Any]:
+    """Grade as json friendly dict"""
+    return {
+        "name": grade.name,
+        "version": grade.version,
+        "score": grade.score,
+        "decision": grade.decision,
+        "signals": {
+            name: {"score": signal.score, "reason": signal.reason}
+            for name, signal in grade.signals.items()
+        },
+        "skipped": grade.skipped,
+        "cached": list(grade.cached),
+        "seconds": round(sum(grade.seconds.values()), 3),
+        "error": "",
+    }
+
+
+_GRADER: Optional[Grader] = None
+
+
+def _start_worker(options: GradeOptions) -> None:
+    """Pool initializer, one Grader per process"""
+    global _GRADER  # pylint: disable=global-statement
+    _GRADER = Grader(options)
+
+
+def _grade_in_worker(pin: Pin) -> Dict[str, Any]:
+    assert _GRADER
+    return _GRADER.grade(pin)
+
+
+def grade_stream(
+    pins: Iterable[Pin], options: GradeOptions, workers: int = 1
+) -> Iterator[Dict[str, Any]]:
+    """
+    Records in the order they finish, each package graded once
+    """
+    unique = _first_of_each(pins)
+    if workers <= 1:
+        grader = Grader(options)
+        for pin in unique:
+            yield grader.grade(pin)
+        return
+
+    with ProcessPoolExecutor(
+        workers, initializer=_start_worker, initargs=(options,)
+    ) as pool:
+        pending: Set[Future] = set()
+        for pin in unique:
+            if len(pending) >= workers * QUEUE_DEPTH:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(_grade_in_worker, pin))
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _first_of_each(pins: Iterable[Pin]) -> Iterator[Pin]:
+    """Same package from two files, first one wins"""
+    seen: Set[str] = set()
+    for pin in pins:
+        if pin.name not in seen:
+            seen.add(pin.name)
+            yield pin
@@ -0,0 +1,307 @@
+"""
+Lines of code, in process, instead of a pygount subprocess.
+
+Python is counted from tokenize output, so a line is exactly one of
+- code: any token that isn't a comment or docstring
+- docstring: part of a string that is a statement of its own
+- comment: only a comment
+- blank: only whitespace
+
+Other text files are counted by their line comment marker (#, //, --) or,
+if unknown, every non blank line is code. Binary files are skipped. Unknown
+"text" files (README, LICENSE, ...) are listed, but total_code leaves them
+out, prose isn't lines of code.
+
+Counts are cached by file digest, so an unchanged file is never tokenized
+twice, and misses are spread over a process pool when there are many.
+
+    cache = LineCountCache(".build_state/line_counts.json")
+    counts = count_files(walk(folder), cache)
+    by_language(counts.values())["python"].code
+    total_code(counts.values())
+"""
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import tokenize
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Bump when counting rules change, old cache entries are then ignored
+COUNTER_VERSION = 1
+
+POOL_THRESHOLD = 200
+CHUNK_SIZE = 64
+
+PYTHON_EXTENSIONS = {".py", ".pyi", ".pyw"}
+
+# Counted & reported, but not lines of code
+NOT_CODE = {"text"}
+
+# extension -> (language, line comment marker)
+LANGUAGES: Dict[str, Tuple[str, str]] = {
+    ".sh": ("shell", "#"),
+    ".bash": ("shell", "#"),
+    ".cfg": ("ini", "#"),
+    ".ini": ("ini", ";"),
+    ".toml": ("toml", "#"),
+    ".yml": ("yaml", "#"),
+    ".yaml": ("yaml", "#"),
+    ".pyx": ("cython", "#"),
+    ".pxd": ("cython", "#"),
+    ".c": ("c", "//"),
+    ".h": ("c", "//"),
+    ".cpp": ("c++", "//"),
+    ".hpp": ("c++", "//"),
+    ".js": ("javascript", "//"),
+    ".ts": ("typescript", "//"),
+    ".java": ("java", "//"),
+    ".go": ("go", "//"),
+    ".rs": ("rust", "//"),
+    ".sql": ("sql", "--"),
+}
+
+_STATEMENT_START = {
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENCODING,
+    tokenize.NL,
+}
+
+
+class LineCount(NamedTuple):
+    """Lines by kind for one file, or many added up"""
+
+    code: int = 0
+    comment: int = 0
+    docstring: int = 0
+    blank: int = 0
+
+    def plus(self, other: "LineCount") -> "LineCount":
+        """Element wise sum, + would concatenate the tuples"""
+        return LineCount(*(mine + theirs for mine, theirs in zip(self, other)))
+
+
+class FileCount(NamedTuple):
+    """What a file is & its counts"""
+
+    language: str
+    lines: LineCount
+
+
+def language_of(name: str) -> str:
+    """'python', 'yaml', ... or 'text' for anything unknown"""
+    extension = os.path.splitext(name)[1].lower()
+    if extension in PYTHON_EXTENSIONS:
+        return "python"
+    return LANGUAGES.get(extension, ("text", ""))[0]
+
+
+def count_python(source: bytes) -> LineCount:
+    """Classify every line of python source from its tokens"""
+    lines = source.splitlines()
+    kinds: Dict[int, str] = {}
+
+    def mark(first: int, last: int, kind: str) -> None:
+        rank = ["comment", "docstring", "code"]
+        for number in range(first, last + 1):
+            if number not in kinds or rank.index(kind) > rank.index(kinds[number]):
+                kinds[number] = kind
+
+    previous_type = tokenize.NEWLINE
+    pending_string: Optional[tokenize.TokenInfo] = None
+    try:
+        for token in tokenize.tokenize(io.BytesIO(source).readline):
+            kind = token.type
+            if kind in (tokenize.ENCODING, tokenize.ENDMARKER, tokenize.NL):
+                continue
+            if kind in (tokenize.INDENT, tokenize.DEDENT):
+                previous_type = kind
+                continue
+            if kind == tokenize.COMMENT:
+                mark(token.start[0], token.end[0], "comment")
+                continue
+            if pending_string is not None:
+                # string alone on its statement is a docstring, else code
+                alone = kind == tokenize.NEWLINE
+                mark(
+                    pending_string.start[0],
+                    pending_string.end[0],
+                    "docstring" if alone else "code",
+                )
+                pending_string = None
+            if kind == tokenize.STRING and previous_type in _STATEMENT_START:
+                pending_string = token
+            elif kind != tokenize.NEWLINE:
+                mark(token.start[0], token.end[0], "code")
+            previous_type = kind
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # not valid python 3, count it like any other hash commented text
+        return count_text(source, "#")
+    if pending_string is not None:
+        mark(pending_string.start[0], pending_string.end[0], "docstring")
+
+    totals = {"code": 0, "comment": 0, "docstring": 0}
+    for kind in kinds.values():
+        totals[kind] += 1
+    blank = sum(
+        1
+        for number, line in enumerate(lines, 1)
+        if number not in kinds and not line.strip()
+    )
+    # e.g. a lone backslash continuation, no token starts or ends there
+    untokened = max(0, len(lines) - len(kinds) - blank)
+    return LineCount(
+        totals["code"] + untokened, totals["comment"], totals["docstring"], blank
+    )
+
+
+def count_text(source: bytes, comment_marker: str = "") -> LineCount:
+    """Blank, line comment or code, for anything that isn't python"""
+    code = comment = blank = 0
+    marker = comment_marker.encode("utf-8")
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            blank += 1
+        elif marker and stripped.startswith(marker):
+            comment += 1
+        else:
+            code += 1
+    return LineCount(code, comment, 0, blank)
+
+
+def count_source(name: str, source: bytes) -> Optional[FileCount]:
+    """Counts for one file's bytes, None if it looks binary"""
+    if b"\0" in source[:8192]:
+        return None
+    language = language_of(name)
+    if language == "python":
+        return FileCount(language, count_python(source))
+    extension = os.path.splitext(name)[1].lower()
+    marker = LANGUAGES.get(extension, ("text", ""))[1]
+    return FileCount(language, count_text(source, marker))
+
+
+class LineCountCache:
+    """
+    digest -> FileCount, in a json file
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Load cache, missing, corrupt or outdated cache is an empty one"""
+        self.path = path
+        self.entries: Dict[str, List] = {}
+        self.dirty = False
+        if path and os.path.isfile(path):
+            try:
+                with open(path) as file_handle:
+                    saved = json.load(file_handle)
+                if saved.get("version") == COUNTER_VERSION:
+                    self.entries = saved["entries"]
+            except (ValueError, KeyError, AttributeError):
+                self.entries = {}
+
+    def get(self, digest: str) -> Optional[FileCount]:
+        """Cached counts or None"""
+        entry = self.entries.get(digest)
+        if entry is None:
+            return None
+        return FileCount(entry[0], LineCount(*entry[1:]))
+
+    def put(self, digest: str, counted: FileCount) -> None:
+        """Remember counts"""
+        self.entries[digest] = [counted.language, *counted.lines]
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write cache, replacing the old one in one step"""
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file_handle:
+            saved = {"version": COUNTER_VERSION, "entries": self.entries}
+            json.dump(saved, file_handle)
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+
+def _count_pair(pair: Tuple[str, bytes]) -> Optional[FileCount]:
+    """Pool friendly count_source"""
+    return count_source(pair[0], pair[1])
+
+
+def count_sources(
+    sources: Iterable[Tuple[str, bytes]],
+    cache: Optional[LineCountCache] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, FileCount]:
+    """
+    Counts for (name, bytes) pairs, e.g. ArchiveTree.walk(), binaries left out
+    """
+    cache = cache or LineCountCache()
+    counts: Dict[str, FileCount] = {}
+    misses: List[Tuple[str, bytes]] = []
+    digests: Dict[str, str] = {}
+    for name, source in sources:
+        digest = hashlib.sha256(source).hexdigest()
+        digests[name] = digest
+        cached = cache.get(digest)
+        if cached is not None:
+            counts[name] = cached
+        else:
+            misses.append((name, source))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(misses) >= POOL_THRESHOLD:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_count_pair, misses, chunksize=CHUNK_SIZE))
+    else:
+        results = [_count_pair(pair) for pair in misses]
+
+    for (name, _), counted in zip(misses, results):
+        if counted is not None:
+            cache.put(digests[name], counted)
+            counts[name] = counted
+    cache.save()
+    return counts
+
+
+def _read(paths: Iterable[str]) -> Iterable[Tuple[str, bytes]]:
+    """(path, bytes), unreadable files skipped"""
+    for path in paths:
+        try:
+            with open(path, "rb") as file_handle:
+                yield path, file_handle.read()
+        except OSError:
+            continue
+
+
+def count_files(
+    paths: Iterable[str],
+    cache: Optional[LineCountCache] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, FileCount]:
+    """Counts for files on disk"""
+    return count_sources(_read(paths), cache, workers)
+
+
+def by_language(counts: Iterable[FileCount]) -> Dict[str, LineCount]:
+    """language -> summed LineCount"""
+    totals: Dict[str, LineCount] = {}
+    for counted in counts:
+        totals[counted.language] = totals.get(counted.language, LineCount()).plus(
+            counted.lines
+        )
+    return totals
+
+
+def total_code(counts: Iterable[FileCount]) -> int:
+    """Lines of code over every language that is code, text files left out"""
+    return sum(
+        counted.lines.code for counted in counts if counted.language not in NOT_CODE
+    )
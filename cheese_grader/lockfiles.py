@@ -0,0 +1,180 @@
+"""
+Read the packages a project depends on out of
+
+- requirements.txt (and -r / -c includes)
+- Pipfile.lock
+- poetry.lock
+- a plain list of names, one per line, which is just a loose requirements.txt
+- a single requirement, e.g. from the command line
+"""
+import json
+import os
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+from cheese_grader.utils import normalize_name
+
+try:
+    import tomllib  # type: ignore
+except ModuleNotFoundError:
+    import tomli as tomllib  # type: ignore
+
+
+class Pin(NamedTuple):
+    """
+    One top level dependency, version is None if not pinned
+    """
+
+    name: str
+    version: Optional[str]
+    extras: FrozenSet[str] = frozenset()
+
+
+def _pinned_version(requirement: Requirement) -> Optional[str]:
+    """1.2 for ==1.2 or ===1.2, otherwise not pinned"""
+    specifiers = list(requirement.specifier)
+    if len(specifiers) == 1 and specifiers[0].operator in ("==", "==="):
+        if "*" not in specifiers[0].version:
+            return specifiers[0].version
+    return None
+
+
+def read_requirements_txt(path: str) -> List[Pin]:
+    """
+    pip requirements file, follows -r and -c, ignores options, urls & editables.
+    Constraints (-c) install nothing, they only pin packages already listed.
+    """
+    constraints: Dict[str, str] = {}
+    pins = _read_requirements(path, set(), constraints, False)
+    return [
+        pin._replace(version=constraints[pin.name])
+        if pin.version is None and pin.name in constraints
+        else pin
+        for pin in pins
+    ]
+
+
+def _read_requirements(
+    path: str, seen: Set[str], constraints: Dict[str, str], constraining: bool
+) -> List[Pin]:
+    """
+    Pins from one file & its includes, each file read once. Pins in constraint
+    files go to constraints instead. Raises ValueError for a missing include.
+    """
+    pins: List[Pin] = []
+    real_path = os.path.realpath(path)
+    if real_path in seen:
+        return pins
+    seen.add(real_path)
+    folder = os.path.dirname(path)
+    with open(path, encoding="utf-8") as file_handle:
+        text = file_handle.read().replace("\\\n", " ")
+    for line in text.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        for option in ("-r", "--requirement", "-c", "--constraint"):
+            if line.startswith(option + " ") or line.startswith(option + "="):
+                included = line[len(option) :].strip(" =")
+                included_path = os.path.join(folder, included)
+                if not os.path.isfile(included_path):
+                    raise ValueError(f"{path} includes missing file {included}")
+                pins.extend(
+                    _read_requirements(
+                        included_path,
+                        seen,
+                        constraints,
+                        constraining or option in ("-c", "--constraint"),
+                    )
+                )
+                break
+        else:
+            if line.startswith("-"):
+                continue
+            # hashes and other per requirement options
+            line = line.split(" --", 1)[0].strip()
+            try:
+                requirement = Requirement(line)
+            except InvalidRequirement:
+                continue
+            if requirement.url:
+                continue
+            name = normalize_name(requirement.name)
+            version = _pinned_version(requirement)
+            if constraining:
+                if version:
+                    constraints.setdefault(name, version)
+                continue
+            pins.append(Pin(name, version, frozenset(requirement.extras)))
+    return pins
+
+
+def read_pipfile_lock(path: str, include_dev: bool = False) -> List[Pin]:
+    """pipenv lock file, default section & optionally develop"""
+    with open(path, encoding="utf-8") as file_handle:
+        lock = json.load(file_handle)
+    sections = ["default", "develop"] if include_dev else ["default"]
+    pins = []
+    for section in sections:
+        for name, details in (lock.get(section) or {}).items():
+            version = (details.get("version") or "").lstrip("=") or None
+            pins.append(
+                Pin(normalize_name(name), version, frozenset(details.get("extras", [])))
+            )
+    return pins
+
+
+def read_poetry_lock(path: str, include_dev: bool = False) -> List[Pin]:
+    """poetry lock file, every locked package"""
+    with open(path, "rb") as file_handle:
+        lock = tomllib.load(file_handle)
+    pins = []
+    for package in lock.get("package", []):
+        category = package.get("category", "main")
+        if category != "main" and not include_dev:
+            continue
+        pins.append(Pin(normalize_name(package["name"]), package.get("version")))
+    return pins
+
+
+def read_lockfile(path: str, include_dev: bool = False) -> List[Pin]:
+    """
+    Pick parser by file name, anything unknown is read as requirements.txt
+    """
+    file_name = os.path.basename(path).lower()
+    if file_name == "pipfile.lock":
+        pins = read_pipfile_lock(path, include_dev)
+    elif file_name == "poetry.lock":
+        pins = read_poetry_lock(path, include_dev)
+    else:
+        pins = read_requirements_txt(path)
+    # same package from two includes, first one wins
+    unique: Dict[str, Pin] = {}
+    for pin in pins:
+        unique.setdefault(pin.name, pin)
+    return list(unique.values())
+
+
+def read_sources(sources: List[str], include_dev: bool = False) -> List[Pin]:
+    """
+    Pins from lock & requirement files, or from the source itself if it isn't a
+    file. Raises ValueError for anything that is neither.
+    """
+    pins: List[Pin] = []
+    for source in sources:
+        if os.path.isfile(source):
+            pins.extend(read_lockfile(source, include_dev))
+            continue
+        try:
+            requirement = Requirement(source)
+        except InvalidRequirement as ex:
+            raise ValueError(f"Not a file or a requirement: {source}") from ex
+        pins.append(
+            Pin(
+                normalize_name(requirement.name),
+                _pinned_version(requirement),
+                frozenset(requirement.extras),
+            )
+        )
+    return pins
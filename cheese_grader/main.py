@@ -3,21 +3,72 @@
 Cheese Grader
 
 Usage:
-
+  cheese_grader grade [options] <source>...
   cheese_grader -h | --help
   cheese_grader --version
 
+A <source> is a requirements.txt, Pipfile.lock, poetry.lock, a plain list of
+package names, or a single requirement such as requests or requests==2.25.1.
+
+One JSON record per package is written as soon as that package is graded.
+
 Options:
+  --workers=<count>    Processes to grade in [default: 4].
+  --tier=<tier>        Most expensive signals to run, cheap, medium or
+                       expensive [default: medium].
+  --offline            PyPI json from the local mirror, archives from the
+                       artifact store, nothing from the network.
+  --no-cache           Don't reuse or keep signal results.
+  --population=<npz>   Rank counts against this saved population.
+  --dev                Include development dependencies from lock files.
+  --output=<path>      Write records here instead of stdout.
   --version            Show version and exit.
   -h --help            Show this screen.
 
 """
-from typing import Optional, Dict, Union
+import json
+import sys
+from typing import Any, Dict, Optional, TextIO, Union
+
 from docopt import docopt
+
 from cheese_grader.__init__ import __version__
+from cheese_grader.lockfiles import read_sources
+
+
+def grade(arguments: Dict[str, Any], output: TextIO) -> int:
+    """
+    Grade every package, one line of json each, flushed as it finishes
+    """
+    # pylint: disable=import-outside-toplevel
+    from cheese_grader.grading import GradeOptions, grade_stream
+    from cheese_grader.signals import Tier
+
+    tier = str(arguments["--tier"]).upper()
+    if tier not in Tier.__members__:
+        raise SystemExit(f"Unknown tier {arguments['--tier']}")
+    workers = str(arguments["--workers"])
+    if not workers.isdigit() or int(workers) < 1:
+        raise SystemExit(f"--workers must be a number, 1 or more, not {workers}")
+    options = GradeOptions(
+        max_tier=Tier[tier],
+        offline=bool(arguments["--offline"]),
+        use_cache=not arguments["--no-cache"],
+        population=arguments["--population"],
+    )
+    try:
+        pins = read_sources(arguments["<source>"], bool(arguments["--dev"]))
+    except ValueError as ex:
+        raise SystemExit(str(ex)) from ex
+    failed = 0
+    for record in grade_stream(pins, options, int(workers)):
+        failed += bool(record.get("error"))
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+    return 1 if failed else 0
 
 
-def process_docopts(test: Optional[Dict[str, Union[str, bool]]] = None) -> None:
+def process_docopts(test: Optional[Dict[str, Union[str, bool]]] = None) -> int:
     """
     Just process the command line options and commands
     :return:
@@ -26,9 +77,15 @@ def process_docopts(test: Optional[Dict[str, Union[str, bool]]] = None) -> None:
         arguments = test
     else:
         arguments = docopt(__doc__, version="Cheese Grader {0}".format(__version__))
+    if arguments.get("grade"):
+        if arguments.get("--output"):
+            with open(str(arguments["--output"]), "w", encoding="utf-8") as output:
+                return grade(arguments, output)
+        return grade(arguments, sys.stdout)
     print(arguments)
     print("Not supported yet.")
+    return 0
 
 
 if __name__ == "__main__":
-    process_docopts()
+    sys.exit(process_docopts())
@@ -0,0 +1,204 @@
+"""
+Where a package stands against the whole of PyPI.
+
+"It is rarely downloaded, but so are all packages." A raw count means
+little until it is put against everyone else's, so cheap signals can score
+a package by its percentile rank instead of by fixed thresholds.
+
+Population columns are float arrays, one row per package, NaN if unknown
+
+    downloads           last month, without mirrors
+    release_count       releases with files
+    maintainer_count    distinct authors & maintainers
+    age_days            days since first upload
+
+Each column is also kept sorted, so ranking a batch is one searchsorted
+call per column, and as a quantile table, small enough to hand to worker
+processes instead of the 500k row population.
+
+    population = Population.from_store(MetadataStore())
+    population.save(path)
+    ranks = population.rank({"downloads": counts, "release_count": releases})
+"""
+import datetime
+import os
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from cheese_grader.storage.metadata_store import MetadataStore
+
+COLUMNS = ("downloads", "release_count", "maintainer_count", "age_days")
+
+# 0.1% steps
+QUANTILES = np.linspace(0.0, 1.0, 1001)
+
+
+class Ranks(NamedTuple):
+    """
+    Where a batch of packages stands, arrays in batch order, NaN if unknown
+    """
+
+    # share of the population below, ties count half, 0..1
+    percentiles: Dict[str, np.ndarray]
+    # inverse frequency weight, ~0 if many packages are as low, ~1 if
+    # hardly any are
+    weights: Dict[str, np.ndarray]
+
+
+def _as_floats(values: Iterable[Any]) -> np.ndarray:
+    """None -> NaN"""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64).reshape(-1)
+    return np.array(
+        [np.nan if _ is None else _ for _ in values], dtype=np.float64
+    ).reshape(-1)
+
+
+def _age_days(first_uploads: Sequence[Optional[str]], now: np.datetime64) -> np.ndarray:
+    """ISO 8601 upload times -> days before now, NaN if unknown"""
+    stamps = np.array([(_ or "NaT")[:19] for _ in first_uploads], dtype="datetime64[s]")
+    return (now - stamps) / np.timedelta64(1, "D")
+
+
+class Population:
+    """
+    Population columns, sorted copies and quantile tables
+    """
+
+    def __init__(self, names: Sequence[str], columns: Mapping[str, Any]) -> None:
+        self.names = np.array(names, dtype=str)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.sorted: Dict[str, np.ndarray] = {}
+        self.tables: Dict[str, np.ndarray] = {}
+        for column in COLUMNS:
+            values = _as_floats(columns.get(column, [None] * len(self.names)))
+            if len(values) != len(self.names):
+                raise TypeError(f"{column} has {len(values)} rows, not {len(names)}")
+            known = np.sort(values[~np.isnan(values)])
+            self.columns[column] = values
+            self.sorted[column] = known
+            self.tables[column] = (
+                np.quantile(known, QUANTILES) if len(known) else np.full(1, np.nan)
+            )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Mapping[str, Any]], now: Optional[datetime.datetime] = None
+    ) -> "Population":
+        """
+        From normalized package rows (MetadataStore.packages columns)
+        """
+        rows = list(rows)
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        if now.tzinfo is not None:
+            now = now.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        when = np.datetime64(now, "s")
+        return cls(
+            [row["name"] for row in rows],
+            {
+                "downloads": [row["downloads"] for row in rows],
+                "release_count": [row["release_count"] for row in rows],
+                "maintainer_count": [row["maintainer_count"] for row in rows],
+                "age_days": _age_days([row["first_upload"] for row in rows], when),
+            },
+        )
+
+    @classmethod
+    def from_store(
+        cls, store: MetadataStore, now: Optional[datetime.datetime] = None
+    ) -> "Population":
+        """Every package in the metadata store, one query"""
+        return cls.from_rows(
+            store.query(
+                "SELECT name, downloads, release_count, maintainer_count,"
+                " first_upload FROM packages"
+            ),
+            now,
+        )
+
+    def save(self, path: str) -> None:
+        """Write columns as .npz, replacing the old file in one step"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temporary, names=self.names, **self.columns)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Population":
+        """Read what save() wrote"""
+        with np.load(path, allow_pickle=False) as saved:
+            return cls(
+                saved["names"],
+                {_: saved[_] for _ in COLUMNS if _ in saved.files},
+            )
+
+    def percentiles(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """
+        Exact mid-rank percentiles of values against the population
+        """
+        known = self.sorted[column]
+        values = _as_floats(values)
+        if not len(known):
+            return np.full(values.shape, np.nan)
+        below = np.searchsorted(known, values, side="left")
+        at_or_below = np.searchsorted(known, values, side="right")
+        ranks = (below + at_or_below) / (2.0 * len(known))
+        ranks[np.isnan(values)] = np.nan
+        return ranks
+
+    def approximate_percentiles(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """Percentiles from the quantile table only, good to about 0.1%"""
+        return approximate_percentiles(self.tables[column], values)
+
+    def weights(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """
+        Inverse frequency weights: how unusual it is to be this low.
+
+        -log(share of packages at or below) / log(population), so a value half
+        of PyPI shares weighs ~0.05 and the very lowest weighs 1.
+        """
+        known = self.sorted[column]
+        values = _as_floats(values)
+        if len(known) < 2:
+            return np.full(values.shape, np.nan)
+        share = np.searchsorted(known, values, side="right") / len(known)
+        share = np.clip(share, 1.0 / len(known), 1.0)
+        weights = np.log(1.0 / share) / np.log(len(known))
+        weights[np.isnan(values)] = np.nan
+        return weights
+
+    def rank(self, batch: Mapping[str, Iterable[Any]]) -> Ranks:
+        """Percentiles & weights for a batch, one vectorized call per column"""
+        percentiles = {}
+        weights = {}
+        for column, values in batch.items():
+            values = _as_floats(values)
+            percentiles[column] = self.percentiles(column, values)
+            weights[column] = self.weights(column, values)
+        return Ranks(percentiles, weights)
+
+    def percentile(self, column: str, value: Optional[float]) -> Optional[float]:
+        """One package's percentile, None if unknown"""
+        if value is None:
+            return None
+        rank = float(self.percentiles(column, [value])[0])
+        return None if np.isnan(rank) else rank
+
+
+def approximate_percentiles(table: np.ndarray, values: Iterable[Any]) -> np.ndarray:
+    """
+    Percentiles by interpolating in a QUANTILES table.
+
+    Repeated values in the table (lots of packages with 1 release) get the
+    middle of their run, like mid-rank.
+    """
+    values = _as_floats(values)
+    if np.isnan(table).all():
+        return np.full(values.shape, np.nan)
+    low = np.interp(values, table, QUANTILES, left=0.0, right=1.0)
+    high = 1.0 - np.interp(-values, -table[::-1], QUANTILES, left=0.0, right=1.0)
+    return (low + high) / 2.0
@@ -0,0 +1,745 @@
+"""
+Frozen lookup tables for shadowing.py, so checks need no network & no install.
+
+Stdlib: public top level modules of BASE_VERSION from sys.stdlib_module_names,
+other versions as the changes listed in each release's "removed"/"new
+modules" notes. 2.7 is 3.6 with the py3 only modules swapped for py2 only ones.
+
+Popular imports: top level import name -> distribution, from the
+top_level.txt of widely used wheels. Extend it with
+shadowing.popular_imports_from() over a set of downloaded wheels.
+"""
+from typing import Dict, Tuple
+
+BASE_VERSION = "3.11"
+
+# Public top level stdlib modules of the base version, plus the `test` package
+BASE_STDLIB = frozenset(
+    {
+        "__future__",
+        "abc",
+        "aifc",
+        "antigravity",
+        "argparse",
+        "array",
+        "ast",
+        "asynchat",
+        "asyncio",
+        "asyncore",
+        "atexit",
+        "audioop",
+        "base64",
+        "bdb",
+        "binascii",
+        "bisect",
+        "builtins",
+        "bz2",
+        "cProfile",
+        "calendar",
+        "cgi",
+        "cgitb",
+        "chunk",
+        "cmath",
+        "cmd",
+        "code",
+        "codecs",
+        "codeop",
+        "collections",
+        "colorsys",
+        "compileall",
+        "concurrent",
+        "configparser",
+        "contextlib",
+        "contextvars",
+        "copy",
+        "copyreg",
+        "crypt",
+        "csv",
+        "ctypes",
+        "curses",
+        "dataclasses",
+        "datetime",
+        "dbm",
+        "decimal",
+        "difflib",
+        "dis",
+        "distutils",
+        "doctest",
+        "email",
+        "encodings",
+        "ensurepip",
+        "enum",
+        "errno",
+        "faulthandler",
+        "fcntl",
+        "filecmp",
+        "fileinput",
+        "fnmatch",
+        "fractions",
+        "ftplib",
+        "functools",
+        "gc",
+        "genericpath",
+        "getopt",
+        "getpass",
+        "gettext",
+        "glob",
+        "graphlib",
+        "grp",
+        "gzip",
+        "hashlib",
+        "heapq",
+        "hmac",
+        "html",
+        "http",
+        "idlelib",
+        "imaplib",
+        "imghdr",
+        "imp",
+        "importlib",
+        "inspect",
+        "io",
+        "ipaddress",
+        "itertools",
+        "json",
+        "keyword",
+        "lib2to3",
+        "linecache",
+        "locale",
+        "logging",
+        "lzma",
+        "mailbox",
+        "mailcap",
+        "marshal",
+        "math",
+        "mimetypes",
+        "mmap",
+        "modulefinder",
+        "msilib",
+        "msvcrt",
+        "multiprocessing",
+        "netrc",
+        "nis",
+        "nntplib",
+        "nt",
+        "ntpath",
+        "nturl2path",
+        "numbers",
+        "opcode",
+        "operator",
+        "optparse",
+        "os",
+        "ossaudiodev",
+        "pathlib",
+        "pdb",
+        "pickle",
+        "pickletools",
+        "pipes",
+        "pkgutil",
+        "platform",
+        "plistlib",
+        "poplib",
+        "posix",
+        "posixpath",
+        "pprint",
+        "profile",
+        "pstats",
+        "pty",
+        "pwd",
+        "py_compile",
+        "pyclbr",
+        "pydoc",
+        "pydoc_data",
+        "pyexpat",
+        "queue",
+        "quopri",
+        "random",
+        "re",
+        "readline",
+        "reprlib",
+        "resource",
+        "rlcompleter",
+        "runpy",
+        "sched",
+        "secrets",
+        "select",
+        "selectors",
+        "shelve",
+        "shlex",
+        "shutil",
+        "signal",
+        "site",
+        "smtpd",
+        "smtplib",
+        "sndhdr",
+        "socket",
+        "socketserver",
+        "spwd",
+        "sqlite3",
+        "sre_compile",
+        "sre_constants",
+        "sre_parse",
+        "ssl",
+        "stat",
+        "statistics",
+        "string",
+        "stringprep",
+        "struct",
+        "subprocess",
+        "sunau",
+        "symtable",
+        "sys",
+        "sysconfig",
+        "syslog",
+        "tabnanny",
+        "tarfile",
+        "telnetlib",
+        "tempfile",
+        "termios",
+        "test",
+        "textwrap",
+        "this",
+        "threading",
+        "time",
+        "timeit",
+        "tkinter",
+        "token",
+        "tokenize",
+        "tomllib",
+        "trace",
+        "traceback",
+        "tracemalloc",
+        "tty",
+        "turtle",
+        "turtledemo",
+        "types",
+        "typing",
+        "unicodedata",
+        "unittest",
+        "urllib",
+        "uu",
+        "uuid",
+        "venv",
+        "warnings",
+        "wave",
+        "weakref",
+        "webbrowser",
+        "winreg",
+        "winsound",
+        "wsgiref",
+        "xdrlib",
+        "xml",
+        "xmlrpc",
+        "zipapp",
+        "zipfile",
+        "zipimport",
+        "zlib",
+        "zoneinfo",
+    }
+)
+
+# version -> (added, removed), relative to the version before it
+STDLIB_CHANGES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    # oldest listed, the rest are relative to it
+    "3.6": ((), ()),
+    "3.7": (
+        (
+            "contextvars",
+            "dataclasses",
+        ),
+        (),
+    ),
+    "3.8": (
+        (),
+        (
+            "macpath",
+        ),
+    ),
+    "3.9": (
+        (
+            "graphlib",
+            "zoneinfo",
+        ),
+        (
+            "dummy_threading",
+        ),
+    ),
+    "3.10": (
+        (),
+        (
+            "formatter",
+            "parser",
+            "symbol",
+        ),
+    ),
+    "3.11": (
+        (
+            "tomllib",
+        ),
+        (
+            "binhex",
+        ),
+    ),
+    "3.12": (
+        (),
+        (
+            "asynchat",
+            "asyncore",
+            "distutils",
+            "imp",
+            "smtpd",
+        ),
+    ),
+    "3.13": (
+        (),
+        (
+            "aifc",
+            "audioop",
+            "cgi",
+            "cgitb",
+            "chunk",
+            "crypt",
+            "imghdr",
+            "lib2to3",
+            "mailcap",
+            "msilib",
+            "nis",
+            "nntplib",
+            "ossaudiodev",
+            "pipes",
+            "sndhdr",
+            "spwd",
+            "sunau",
+            "telnetlib",
+            "uu",
+            "xdrlib",
+        ),
+    ),
+}
+
+# 2.7 is 3.6 minus PY3_ONLY plus PY2_ONLY
+PY2_ONLY = frozenset(
+    {
+        "BaseHTTPServer",
+        "Bastion",
+        "CGIHTTPServer",
+        "ConfigParser",
+        "Cookie",
+        "DocXMLRPCServer",
+        "HTMLParser",
+        "MimeWriter",
+        "Queue",
+        "ScrolledText",
+        "SimpleHTTPServer",
+        "SimpleXMLRPCServer",
+        "SocketServer",
+        "StringIO",
+        "Tix",
+        "Tkinter",
+        "UserDict",
+        "UserList",
+        "UserString",
+        "__builtin__",
+        "anydbm",
+        "audiodev",
+        "binhex",
+        "bsddb",
+        "cPickle",
+        "cStringIO",
+        "commands",
+        "compiler",
+        "cookielib",
+        "copy_reg",
+        "dbhash",
+        "dircache",
+        "dumbdbm",
+        "dummy_thread",
+        "dummy_threading",
+        "exceptions",
+        "formatter",
+        "fpformat",
+        "future_builtins",
+        "gdbm",
+        "hotshot",
+        "htmlentitydefs",
+        "htmllib",
+        "httplib",
+        "ihooks",
+        "imageop",
+        "imputil",
+        "macpath",
+        "markupbase",
+        "md5",
+        "mhlib",
+        "mimetools",
+        "mimify",
+        "multifile",
+        "mutex",
+        "new",
+        "parser",
+        "popen2",
+        "posixfile",
+        "repr",
+        "rexec",
+        "rfc822",
+        "robotparser",
+        "sets",
+        "sgmllib",
+        "sha",
+        "sre",
+        "statvfs",
+        "sunaudio",
+        "symbol",
+        "thread",
+        "toaiff",
+        "ttk",
+        "urllib2",
+        "urlparse",
+        "user",
+        "whichdb",
+        "xmlrpclib",
+    }
+)
+
+PY3_ONLY = frozenset(
+    {
+        "asyncio",
+        "builtins",
+        "concurrent",
+        "configparser",
+        "contextvars",
+        "copyreg",
+        "dataclasses",
+        "enum",
+        "faulthandler",
+        "graphlib",
+        "html",
+        "http",
+        "ipaddress",
+        "lzma",
+        "pathlib",
+        "queue",
+        "reprlib",
+        "secrets",
+        "selectors",
+        "socketserver",
+        "statistics",
+        "tkinter",
+        "tomllib",
+        "tracemalloc",
+        "turtledemo",
+        "typing",
+        "venv",
+        "winreg",
+        "xmlrpc",
+        "zipapp",
+        "zoneinfo",
+    }
+)
+
+# Distributions that install a stdlib name on purpose, for older pythons
+BACKPORTS: Dict[str, Tuple[str, ...]] = {
+    "argparse": ("argparse",),
+    "asyncio": ("asyncio",),
+    "builtins": ("future",),
+    "concurrent": ("futures",),
+    "configparser": ("configparser",),
+    "contextvars": ("contextvars",),
+    "dataclasses": ("dataclasses",),
+    "enum": ("enum34",),
+    "importlib": ("importlib",),
+    "ipaddress": ("ipaddress",),
+    "pathlib": ("pathlib",),
+    "queue": ("future",),
+    "statistics": ("statistics",),
+    "typing": ("typing",),
+}
+
+POPULAR_IMPORTS: Dict[str, str] = {
+    "_cffi_backend": "cffi",
+    "_distutils_hack": "setuptools",
+    "_pytest": "pytest",
+    "_yaml": "pyyaml",
+    "aiohttp": "aiohttp",
+    "aiosignal": "aiosignal",
+    "alembic": "alembic",
+    "amqp": "amqp",
+    "anyio": "anyio",
+    "arrow": "arrow",
+    "asn1crypto": "asn1crypto",
+    "astroid": "astroid",
+    "async_timeout": "async-timeout",
+    "attr": "attrs",
+    "attrs": "attrs",
+    "azure": "azure-core",
+    "babel": "babel",
+    "backoff": "backoff",
+    "backports": "backports",
+    "bcrypt": "bcrypt",
+    "billiard": "billiard",
+    "black": "black",
+    "bleach": "bleach",
+    "bokeh": "bokeh",
+    "boto3": "boto3",
+    "botocore": "botocore",
+    "bs4": "beautifulsoup4",
+    "bson": "pymongo",
+    "cachetools": "cachetools",
+    "celery": "celery",
+    "cerberus": "cerberus",
+    "certifi": "certifi",
+    "cffi": "cffi",
+    "chardet": "chardet",
+    "charset_normalizer": "charset-normalizer",
+    "click": "click",
+    "cloudpickle": "cloudpickle",
+    "colorama": "colorama",
+    "coloredlogs": "coloredlogs",
+    "coverage": "coverage",
+    "Crypto": "pycryptodome",
+    "Cryptodome": "pycryptodomex",
+    "cryptography": "cryptography",
+    "cv2": "opencv-python",
+    "cx_Oracle": "cx-oracle",
+    "cycler": "cycler",
+    "dask": "dask",
+    "dateutil": "python-dateutil",
+    "decorator": "decorator",
+    "defusedxml": "defusedxml",
+    "deprecated": "deprecated",
+    "django": "django",
+    "dns": "dnspython",
+    "docker": "docker",
+    "docopt": "docopt",
+    "docutils": "docutils",
+    "dotenv": "python-dotenv",
+    "elasticsearch": "elasticsearch",
+    "et_xmlfile": "et-xmlfile",
+    "factory": "factory-boy",
+    "faker": "faker",
+    "fastapi": "fastapi",
+    "filelock": "filelock",
+    "fire": "fire",
+    "flake8": "flake8",
+    "flask": "flask",
+    "fontTools": "fonttools",
+    "freezegun": "freezegun",
+    "frozenlist": "frozenlist",
+    "fsspec": "fsspec",
+    "future": "future",
+    "gcsfs": "gcsfs",
+    "gensim": "gensim",
+    "gevent": "gevent",
+    "git": "gitpython",
+    "gitdb": "gitdb",
+    "google": "protobuf",
+    "google_auth_oauthlib": "google-auth-oauthlib",
+    "googleapiclient": "google-api-python-client",
+    "greenlet": "greenlet",
+    "gridfs": "pymongo",
+    "grpc": "grpcio",
+    "grpc_status": "grpcio-status",
+    "gunicorn": "gunicorn",
+    "h11": "h11",
+    "h5py": "h5py",
+    "html5lib": "html5lib",
+    "httpcore": "httpcore",
+    "httplib2": "httplib2",
+    "httpx": "httpx",
+    "huggingface_hub": "huggingface-hub",
+    "humanfriendly": "humanfriendly",
+    "hypothesis": "hypothesis",
+    "idna": "idna",
+    "imageio": "imageio",
+    "importlib_metadata": "importlib-metadata",
+    "iniconfig": "iniconfig",
+    "IPython": "ipython",
+    "isodate": "isodate",
+    "isort": "isort",
+    "itsdangerous": "itsdangerous",
+    "jaraco": "jaraco-classes",
+    "jedi": "jedi",
+    "jeepney": "jeepney",
+    "jinja2": "jinja2",
+    "jmespath": "jmespath",
+    "joblib": "joblib",
+    "jose": "python-jose",
+    "jsonpatch": "jsonpatch",
+    "jsonpointer": "jsonpointer",
+    "jsonschema": "jsonschema",
+    "jwt": "pyjwt",
+    "keras": "keras",
+    "keyring": "keyring",
+    "kiwisolver": "kiwisolver",
+    "kombu": "kombu",
+    "kubernetes": "kubernetes",
+    "lazy_object_proxy": "lazy-object-proxy",
+    "ldap": "python-ldap",
+    "libfuturize": "future",
+    "libpasteurize": "future",
+    "lightgbm": "lightgbm",
+    "llvmlite": "llvmlite",
+    "loguru": "loguru",
+    "lxml": "lxml",
+    "magic": "python-magic",
+    "mako": "mako",
+    "markdown": "markdown",
+    "markupsafe": "markupsafe",
+    "marshmallow": "marshmallow",
+    "matplotlib": "matplotlib",
+    "mccabe": "mccabe",
+    "mock": "mock",
+    "more_itertools": "more-itertools",
+    "mpl_toolkits": "matplotlib",
+    "mpmath": "mpmath",
+    "msgpack": "msgpack",
+    "msrest": "msrest",
+    "multidict": "multidict",
+    "multipart": "python-multipart",
+    "mypy": "mypy",
+    "mypy_extensions": "mypy-extensions",
+    "nacl": "pynacl",
+    "networkx": "networkx",
+    "nltk": "nltk",
+    "nose": "nose",
+    "nox": "nox",
+    "numba": "numba",
+    "numpy": "numpy",
+    "oauthlib": "oauthlib",
+    "openpyxl": "openpyxl",
+    "OpenSSL": "pyopenssl",
+    "orjson": "orjson",
+    "packaging": "packaging",
+    "pandas": "pandas",
+    "paramiko": "paramiko",
+    "parso": "parso",
+    "past": "future",
+    "pathlib2": "pathlib2",
+    "patsy": "patsy",
+    "pendulum": "pendulum",
+    "pexpect": "pexpect",
+    "PIL": "pillow",
+    "pip": "pip",
+    "pipenv": "pipenv",
+    "pkg_resources": "setuptools",
+    "pkginfo": "pkginfo",
+    "platformdirs": "platformdirs",
+    "plotly": "plotly",
+    "pluggy": "pluggy",
+    "poetry": "poetry",
+    "prometheus_client": "prometheus-client",
+    "prompt_toolkit": "prompt-toolkit",
+    "proto": "proto-plus",
+    "psutil": "psutil",
+    "psycopg2": "psycopg2",
+    "ptyprocess": "ptyprocess",
+    "py": "py",
+    "pyarrow": "pyarrow",
+    "pyasn1": "pyasn1",
+    "pyasn1_modules": "pyasn1-modules",
+    "pycodestyle": "pycodestyle",
+    "pycparser": "pycparser",
+    "pydantic": "pydantic",
+    "pyflakes": "pyflakes",
+    "pygments": "pygments",
+    "pylint": "pylint",
+    "pymongo": "pymongo",
+    "pymysql": "pymysql",
+    "pyodbc": "pyodbc",
+    "pyOpenSSL": "pyopenssl",
+    "pyparsing": "pyparsing",
+    "pyrsistent": "pyrsistent",
+    "pytest": "pytest",
+    "pythoncom": "pywin32",
+    "pytz": "pytz",
+    "pywintypes": "pywin32",
+    "readme_renderer": "readme-renderer",
+    "redis": "redis",
+    "regex": "regex",
+    "requests": "requests",
+    "requests_oauthlib": "requests-oauthlib",
+    "requests_toolbelt": "requests-toolbelt",
+    "responses": "responses",
+    "retrying": "retrying",
+    "rich": "rich",
+    "rsa": "rsa",
+    "ruamel": "ruamel-yaml",
+    "s3fs": "s3fs",
+    "s3transfer": "s3transfer",
+    "safetensors": "safetensors",
+    "scandir": "scandir",
+    "schema": "schema",
+    "scipy": "scipy",
+    "scrapy": "scrapy",
+    "seaborn": "seaborn",
+    "secretstorage": "secretstorage",
+    "selenium": "selenium",
+    "sentry_sdk": "sentry-sdk",
+    "serial": "pyserial",
+    "setuptools": "setuptools",
+    "simplejson": "simplejson",
+    "six": "six",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "slugify": "python-slugify",
+    "smmap": "smmap",
+    "sniffio": "sniffio",
+    "snowflake": "snowflake-connector-python",
+    "sortedcontainers": "sortedcontainers",
+    "soupsieve": "soupsieve",
+    "spacy": "spacy",
+    "sphinx": "sphinx",
+    "sqlalchemy": "sqlalchemy",
+    "starlette": "starlette",
+    "statsmodels": "statsmodels",
+    "structlog": "structlog",
+    "sympy": "sympy",
+    "tabulate": "tabulate",
+    "tenacity": "tenacity",
+    "tensorflow": "tensorflow",
+    "termcolor": "termcolor",
+    "threadpoolctl": "threadpoolctl",
+    "tifffile": "tifffile",
+    "tokenizers": "tokenizers",
+    "toml": "toml",
+    "tomli": "tomli",
+    "toolz": "toolz",
+    "torch": "torch",
+    "tornado": "tornado",
+    "tox": "tox",
+    "tqdm": "tqdm",
+    "traitlets": "traitlets",
+    "transformers": "transformers",
+    "twine": "twine",
+    "twisted": "twisted",
+    "typer": "typer",
+    "typing_extensions": "typing-extensions",
+    "tzdata": "tzdata",
+    "tzlocal": "tzlocal",
+    "ujson": "ujson",
+    "uritemplate": "uritemplate",
+    "urllib3": "urllib3",
+    "usb": "pyusb",
+    "uvicorn": "uvicorn",
+    "vine": "vine",
+    "virtualenv": "virtualenv",
+    "voluptuous": "voluptuous",
+    "wcwidth": "wcwidth",
+    "webencodings": "webencodings",
+    "websocket": "websocket-client",
+    "websocket_client": "websocket-client",
+    "websockets": "websockets",
+    "werkzeug": "werkzeug",
+    "wheel": "wheel",
+    "win32api": "pywin32",
+    "win32con": "pywin32",
+    "wrapt": "wrapt",
+    "xgboost": "xgboost",
+    "xlrd": "xlrd",
+    "xmltodict": "xmltodict",
+    "yaml": "pyyaml",
+    "yarl": "yarl",
+    "zipp": "zipp",
+    "zmq": "pyzmq",
+    "zope": "zope-interface",
+}
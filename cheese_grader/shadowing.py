@@ -0,0 +1,206 @@
+"""
+Does a package install a top level module that hides a stdlib module, or the
+import name of a popular package?
+
+Top level modules come from the archive listing (top_level.txt, RECORD, or
+the files themselves), nothing is installed. Lookups are against the frozen
+tables in shadow_tables.py, so a whole lockfile is a few dict probes per
+dependency.
+
+    with open_archive(wheel) as tree:
+        modules = top_level_modules(tree)
+    check_modules("my-dist", modules)  # [Shadow("email", "stdlib", ...)]
+    conflicts({"dist-a": {"utils"}, "dist-b": {"utils"}})  # {"utils": [...]}
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from cheese_grader.archives import ArchiveTree
+from cheese_grader.shadow_tables import (
+    BACKPORTS,
+    BASE_STDLIB,
+    BASE_VERSION,
+    POPULAR_IMPORTS,
+    PY2_ONLY,
+    PY3_ONLY,
+    STDLIB_CHANGES,
+)
+from cheese_grader.utils import normalize_name
+
+STDLIB = "stdlib"
+POPULAR = "popular"
+BACKPORT = "backport"
+
+# Not installed, or not worth guessing about, when reading a bare sdist
+NOT_PACKAGES = {"docs", "doc", "examples", "example", "tests", "test", "build"}
+NOT_MODULES = {"setup", "conftest", "noxfile", "fabfile", "tasks"}
+
+_EXTENSION = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\..*(so|pyd)$")
+
+
+def _stdlib_by_version() -> Dict[str, FrozenSet[str]]:
+    """Version -> stdlib modules, walking the change lists from the base"""
+    versions = list(STDLIB_CHANGES)
+    by_version: Dict[str, FrozenSet[str]] = {}
+    current = set(BASE_STDLIB)
+    # base back to the oldest first, so 3.6 is right, then forward again
+    for version in reversed(versions[1 : versions.index(BASE_VERSION) + 1]):
+        added, removed = STDLIB_CHANGES[version]
+        current = (current - set(added)) | set(removed)
+    for version in versions:
+        added, removed = STDLIB_CHANGES[version]
+        if version != versions[0]:
+            current = (current | set(added)) - set(removed)
+        by_version[version] = frozenset(current)
+    by_version["2.7"] = frozenset((by_version[versions[0]] - PY3_ONLY) | PY2_ONLY)
+    return by_version
+
+
+STDLIB_BY_VERSION = _stdlib_by_version()
+
+
+def _version_key(version: str) -> Tuple[int, ...]:
+    """'3.10' sorts after '3.9'"""
+    return tuple(int(_) for _ in version.split("."))
+
+
+def _stdlib_index() -> Dict[str, Tuple[str, ...]]:
+    """module -> versions it is in the stdlib of, oldest first"""
+    index: Dict[str, Tuple[str, ...]] = {}
+    for version in sorted(STDLIB_BY_VERSION, key=_version_key):
+        for module in STDLIB_BY_VERSION[version]:
+            index[module] = index.get(module, ()) + (version,)
+    return index
+
+
+STDLIB_INDEX = _stdlib_index()
+
+
+class Shadow(NamedTuple):
+    """A top level module that collides with something better known"""
+
+    module: str
+    kind: str
+    # versions for stdlib, the owning distribution for popular & backport
+    detail: str
+
+
+def _describe(versions: Iterable[str]) -> str:
+    """'2.7, 3.6-3.11'"""
+    ordered = sorted(versions, key=_version_key)
+    py2 = [_ for _ in ordered if _.startswith("2.")]
+    py3 = [_ for _ in ordered if _.startswith("3.")]
+    parts = list(py2)
+    if py3:
+        parts.append(py3[0] if len(py3) == 1 else f"{py3[0]}-{py3[-1]}")
+    return ", ".join(parts)
+
+
+def _module_of_path(path: str) -> Optional[str]:
+    """Top level import name a RECORD/file path installs, if any"""
+    first = path.split("/", 1)[0]
+    if first.endswith((".dist-info", ".data", ".egg-info")) or first == "..":
+        return None
+    if "/" in path:
+        return first if first.isidentifier() else None
+    if first.endswith(".py"):
+        name = first[:-3]
+        return name if name.isidentifier() else None
+    match = _EXTENSION.match(first)
+    return match.group(1) if match else None
+
+
+def top_level_modules(tree: ArchiveTree) -> Set[str]:
+    """
+    What `import` names a wheel or sdist provides, without installing it
+    """
+    names = tree.names()
+    for name in names:
+        parts = name.split("/")
+        if parts[-1] == "top_level.txt" and parts[-2].endswith(
+            (".dist-info", ".egg-info")
+        ):
+            listed = {
+                line.strip().split("/")[0]
+                for line in tree.read_text(name).splitlines()
+                if line.strip()
+            }
+            if listed:
+                return listed
+
+    records = [
+        _ for _ in names if _.endswith(".dist-info/RECORD") and _.count("/") == 1
+    ]
+    if records:
+        found = set()
+        for line in tree.read_text(records[0]).splitlines():
+            module = _module_of_path(line.split(",", 1)[0])
+            if module:
+                found.add(module)
+        return found
+
+    # bare sdist, guess from the layout
+    prefix = "src/" if any(_.startswith("src/") for _ in names) else ""
+    found = set()
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        relative = name[len(prefix) :]
+        if "/" in relative:
+            package, rest = relative.split("/", 1)
+            if rest == "__init__.py" and package not in NOT_PACKAGES:
+                found.add(package)
+            continue
+        module = _module_of_path(relative)
+        if module and module not in NOT_MODULES:
+            found.add(module)
+    return found
+
+
+def check_modules(
+    distribution: str,
+    modules: Iterable[str],
+    versions: Optional[Iterable[str]] = None,
+) -> List[Shadow]:
+    """Shadows among one distribution's top level modules"""
+    distribution = normalize_name(distribution)
+    wanted = None if versions is None else set(versions)
+    shadows = []
+    for module in sorted(set(modules)):
+        in_stdlib = STDLIB_INDEX.get(module, ())
+        if wanted is not None:
+            in_stdlib = tuple(_ for _ in in_stdlib if _ in wanted)
+        if in_stdlib:
+            if distribution in BACKPORTS.get(module, ()):
+                shadows.append(Shadow(module, BACKPORT, distribution))
+            else:
+                shadows.append(Shadow(module, STDLIB, _describe(in_stdlib)))
+            continue
+        owner = POPULAR_IMPORTS.get(module)
+        if owner is not None and owner != distribution:
+            shadows.append(Shadow(module, POPULAR, owner))
+    return shadows
+
+
+def conflicts(installs: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Top level modules installed by more than one distribution of a lockfile"""
+    owners: Dict[str, List[str]] = {}
+    for distribution, modules in installs.items():
+        for module in set(modules):
+            owners.setdefault(module, []).append(distribution)
+    return {
+        module: sorted(found) for module, found in owners.items() if len(found) > 1
+    }
+
+
+def popular_imports_from(trees: Dict[str, ArchiveTree]) -> Dict[str, str]:
+    """
+    Import name -> distribution for a set of downloaded popular wheels,
+    e.g. to extend POPULAR_IMPORTS
+    """
+    table: Dict[str, str] = {}
+    for distribution, tree in trees.items():
+        for module in top_level_modules(tree):
+            if module not in STDLIB_INDEX and not module.startswith("_"):
+                table.setdefault(module, normalize_name(distribution))
+    return table
@@ -0,0 +1,17 @@
+"""
+Signals of package quality, see engine.py for how they are run.
+
+Importing this package registers the built in evaluators.
+"""
+from cheese_grader.signals import metadata_signals, source_signals  # noqa: F401
+from cheese_grader.signals.engine import (  # noqa: F401
+    ACCEPT,
+    EVALUATORS,
+    REJECT,
+    Engine,
+    Grade,
+    PackageContext,
+    Signal,
+    Tier,
+    evaluator,
+)
@@ -0,0 +1,330 @@
+"""
+Signals are registered evaluators, each with a cost tier.
+
+Cheap signals (metadata, downloads, names) run first. If any of them decides
+a package (parked, not on PyPI, no code, not Python) the expensive ones
+(download, unpack, lint, install) never run.
+
+    @evaluator(tier=Tier.CHEAP)
+    def parked(context: PackageContext) -> Signal:
+        ...
+
+Anything slow to get (source tree, archive) should come from a context
+loader, so it is only fetched if an evaluator that needs it actually runs.
+
+Given a ScoreCache, results of evaluators at or above cache_tier are kept per
+(name, version, artifact digest) and reused while the evaluator's hash still
+matches, so a cached package never loads its archive. Cheap signals are re-run,
+download counts & metadata change without the version changing.
+"""
+import enum
+import hashlib
+import logging
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from cheese_grader.storage.score_cache import CachedSignal, ScoreCache
+
+LOGGER = logging.getLogger(__name__)
+
+REJECT = "reject"
+ACCEPT = "accept"
+
+
+class Tier(enum.IntEnum):
+    """How expensive a signal is to evaluate"""
+
+    # metadata, download counts, names
+    CHEAP = 0
+    # needs the source, but in process: compile, loc, black
+    MEDIUM = 1
+    # install, tests, lint, mypy
+    EXPENSIVE = 2
+
+
+class Signal(NamedTuple):
+    """
+    What one evaluator found
+    """
+
+    # 0 is bad, 1 is good, None is "no opinion"
+    score: Optional[float]
+    reason: str = ""
+    # "", REJECT or ACCEPT. Decided packages skip the more expensive tiers.
+    decision: str = ""
+
+
+class Evaluator(NamedTuple):
+    """
+    A registered signal
+    """
+
+    name: str
+    func: Callable[["PackageContext"], Signal]
+    tier: Tier
+    depends_on: Tuple[str, ...]
+    weight: float
+    # bump when the logic changes, so cached results are thrown away
+    version: str
+
+
+EVALUATORS: Dict[str, Evaluator] = {}
+
+
+def evaluator_hash(
+    current: Evaluator, by_name: Optional[Dict[str, Evaluator]] = None
+) -> str:
+    """
+    Changes when anything that could change this evaluator's result does,
+    including a new version of anything it depends on, however indirectly.
+    by_name defaults to every registered evaluator.
+    """
+    known = EVALUATORS if by_name is None else by_name
+    dependencies = [
+        evaluator_hash(known[_], known) if _ in known else _
+        for _ in current.depends_on
+    ]
+    text = f"{current.name}\0{current.version}\0{','.join(dependencies)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def ruleset_hash(evaluators: Iterable[Evaluator]) -> str:
+    """Changes when any evaluator or weight does"""
+    by_name = {_.name: _ for _ in evaluators}
+    text = "\n".join(
+        f"{evaluator_hash(by_name[_], by_name)}\0{by_name[_].weight}"
+        for _ in sorted(by_name)
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def evaluator(
+    name: Optional[str] = None,
+    tier: Tier = Tier.CHEAP,
+    depends_on: Iterable[str] = (),
+    weight: float = 1.0,
+    version: str = "1",
+) -> Callable:
+    """
+    Register decorated function as a signal
+    """
+
+    def decorator(func: Callable[["PackageContext"], Signal]) -> Callable:
+        """Register"""
+        signal_name = name or func.__name__
+        EVALUATORS[signal_name] = Evaluator(
+            signal_name, func, Tier(tier), tuple(depends_on), weight, version
+        )
+        return func
+
+    return decorator
+
+
+class PackageContext:
+    """
+    Everything evaluators know about one package, slow things loaded lazily
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: Optional[str] = None,
+        loaders: Optional[Dict[str, Callable[["PackageContext"], Any]]] = None,
+        **values: Any,
+    ) -> None:
+        self.name = name
+        self.version = version
+        self.loaders = loaders or {}
+        self.values: Dict[str, Any] = values
+        self.signals: Dict[str, Signal] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        """Value, loading it the first time it is asked for"""
+        if key not in self.values:
+            if key not in self.loaders:
+                raise KeyError(f"Nothing provides {key} for {self.name}")
+            self.values[key] = self.loaders[key](self)
+        return self.values[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Value if it is available, without a KeyError"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class Grade(NamedTuple):
+    """
+    Result of running the engine over one package
+    """
+
+    name: str
+    version: Optional[str]
+    # weighted mean of the signals that had an opinion, 0 if rejected
+    score: Optional[float]
+    decision: str
+    signals: Dict[str, Signal]
+    # evaluator name -> why it didn't run
+    skipped: Dict[str, str]
+    seconds: Dict[str, float]
+    # evaluators whose result came from the score cache
+    cached: Tuple[str, ...] = ()
+
+
+def ordered(evaluators: Iterable[Evaluator]) -> List[Evaluator]:
+    """
+    Cheapest first, but never before what it depends on.
+
+    An evaluator is at least as expensive as its most expensive dependency,
+    returned evaluators have that effective tier.
+    """
+    by_name = {_.name: _ for _ in evaluators}
+    effective: Dict[str, Tier] = {}
+
+    def tier_of(name: str, chain: Tuple[str, ...]) -> Tier:
+        if name in chain:
+            raise TypeError(f"Circular signal dependency: {' -> '.join(chain)}")
+        if name not in effective:
+            current = by_name[name]
+            tiers = [current.tier]
+            for dependency in current.depends_on:
+                if dependency not in by_name:
+                    raise TypeError(f"{name} depends on unknown signal {dependency}")
+                tiers.append(tier_of(dependency, chain + (name,)))
+            effective[name] = max(tiers)
+        return effective[name]
+
+    result: List[Evaluator] = []
+    placed: set = set()
+
+    def place(name: str) -> None:
+        if name in placed:
+            return
+        for dependency in by_name[name].depends_on:
+            place(dependency)
+        placed.add(name)
+        result.append(by_name[name]._replace(tier=tier_of(name, ())))
+
+    for name in sorted(by_name, key=lambda _: (tier_of(_, ()), _)):
+        place(name)
+    return result
+
+
+class Engine:
+    """
+    Runs evaluators cheapest first, stops climbing tiers once decided
+    """
+
+    def __init__(
+        self,
+        evaluators: Optional[Iterable[Evaluator]] = None,
+        max_tier: Tier = Tier.EXPENSIVE,
+        cache: Optional[ScoreCache] = None,
+        cache_tier: Tier = Tier.MEDIUM,
+    ) -> None:
+        chosen = list(EVALUATORS.values() if evaluators is None else evaluators)
+        self.evaluators = [_ for _ in ordered(chosen) if _.tier <= max_tier]
+        self.cache = cache
+        self.cache_tier = cache_tier
+        by_name = {_.name: _ for _ in chosen}
+        self.hashes = {_.name: evaluator_hash(_, by_name) for _ in self.evaluators}
+        self.ruleset = ruleset_hash(self.evaluators)
+
+    def _cache_key(self, context: PackageContext) -> Optional[Tuple[str, str, str]]:
+        """(name, version, digest), None if results for it can't be cached"""
+        if self.cache is None or not context.version:
+            return None
+        return context.name, context.version, str(context.get("digest") or "")
+
+    def grade(self, context: PackageContext) -> Grade:
+        """
+        Evaluate signals for one package
+        """
+        skipped: Dict[str, str] = {}
+        seconds: Dict[str, float] = {}
+        key = self._cache_key(context)
+        stored = self.cache.signals(*key) if self.cache and key else {}
+        cached: List[str] = []
+        fresh: List[Tuple[str, CachedSignal]] = []
+        decision = ""
+        decided_tier: Optional[Tier] = None
+        for current in self.evaluators:
+            if decided_tier is not None and current.tier > decided_tier:
+                skipped[current.name] = f"already decided: {decision}"
+                continue
+            # skipped, failed or rejected dependencies all mean "don't run",
+            # a passed gate (on_pypi, has_python) has no score of its own
+            missing = [
+                _
+                for _ in current.depends_on
+                if _ not in context.signals or context.signals[_].decision == REJECT
+            ]
+            if missing:
+                skipped[current.name] = f"needs {', '.join(missing)}"
+                continue
+            hit = stored.get(current.name)
+            cacheable = key is not None and current.tier >= self.cache_tier
+            if cacheable and hit and hit.evaluator_hash == self.hashes[current.name]:
+                signal = Signal(hit.score, hit.reason, hit.decision)
+                cached.append(current.name)
+            else:
+                start = time.perf_counter()
+                # pylint: disable=broad-except
+                try:
+                    signal = current.func(context)
+                except Exception as ex:
+                    LOGGER.debug(f"{current.name} failed for {context.name}: {ex}")
+                    skipped[current.name] = f"error: {ex}"
+                    continue
+                finally:
+                    seconds[current.name] = time.perf_counter() - start
+                if cacheable:
+                    hashed = CachedSignal(self.hashes[current.name], *signal)
+                    fresh.append((current.name, hashed))
+            context.signals[current.name] = signal
+            if signal.decision and not decision:
+                decision = signal.decision
+                decided_tier = current.tier
+        score = total_score(context.signals, self.evaluators, decision)
+        if self.cache and key:
+            if fresh:
+                self.cache.put_signals(*key, fresh)
+            self.cache.put_grade(*key, self.ruleset, score, decision)
+        return Grade(
+            context.name,
+            context.version,
+            score,
+            decision,
+            dict(context.signals),
+            skipped,
+            seconds,
+            tuple(cached),
+        )
+
+
+def total_score(
+    signals: Dict[str, Signal], evaluators: Iterable[Evaluator], decision: str
+) -> Optional[float]:
+    """Weighted mean of signals with an opinion, rejected is always 0"""
+    if decision == REJECT:
+        return 0.0
+    weights = {_.name: _.weight for _ in evaluators}
+    scored = [
+        (signal.score, weights.get(name, 1.0))
+        for name, signal in signals.items()
+        if signal.score is not None
+    ]
+    total_weight = sum(weight for _, weight in scored)
+    if not total_weight:
+        return None
+    return sum(score * weight for score, weight in scored) / total_weight
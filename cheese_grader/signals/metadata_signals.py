@@ -0,0 +1,229 @@
+"""
+Cheap signals, from PyPI JSON & download counts only. No download, no unpack.
+
+Context values used
+- metadata: PyPI JSON for the project, None if PyPI doesn't know it
+- downloads: download count, None if unknown
+- name_index: a NameIndex of all PyPI names, optional
+- population: a Population of all PyPI packages, optional. With it, counts
+  & age are scored by percentile rank, weighted by how unusual it is to be
+  that low, instead of by fixed thresholds.
+"""
+import datetime
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from cheese_grader.signals.engine import (
+    REJECT,
+    PackageContext,
+    Signal,
+    Tier,
+    evaluator,
+)
+from cheese_grader.storage.metadata_store import maintainers
+
+PARKED_PATTERNS = re.compile(
+    r"\b(parked|placeholder|name (is )?reserved|reserved name|"
+    r"dependency confusion|prevent(ing)? typosquat)",
+    re.IGNORECASE,
+)
+
+YEAR = datetime.timedelta(days=365)
+
+# Bigger than any stub. A parked sdist is setup.py & an empty module, ~2 KB
+TINY_UPLOAD = 10 * 1024
+
+
+def _uploaded_releases(metadata: Dict[str, Any]) -> List[str]:
+    """Upload time of first file of each release that has files"""
+    times = []
+    for files in (metadata.get("releases") or {}).values():
+        uploads = sorted(
+            file.get("upload_time_iso_8601") or file.get("upload_time") or ""
+            for file in files
+        )
+        if uploads and uploads[0]:
+            times.append(uploads[0])
+    return sorted(times)
+
+
+def _all_uploads_tiny(metadata: Dict[str, Any]) -> bool:
+    """No file ever uploaded is big enough to hold real code"""
+    return all(
+        (file.get("size") or 0) <= TINY_UPLOAD
+        for files in (metadata.get("releases") or {}).values()
+        for file in files
+    )
+
+
+def _ranked(
+    context: PackageContext, column: str, value: float
+) -> Optional[Tuple[float, float]]:
+    """
+    (percentile rank, score) against all of PyPI, None without a population.
+
+    Inverse frequency weighting: the score only falls short of 1 by as much
+    as being this low is unusual, rarely downloaded is fine if so are most.
+    """
+    population = context.get("population")
+    if population is None:
+        return None
+    ranks = population.rank({column: [value]})
+    rank = float(ranks.percentiles[column][0])
+    if math.isnan(rank):
+        return None
+    weight = float(ranks.weights[column][0])
+    if math.isnan(weight):
+        # too few packages to say what is unusual
+        weight = 1.0
+    return rank, 1.0 - weight * (1.0 - rank)
+
+
+def _parse_upload(upload: str) -> datetime.datetime:
+    """PyPI upload time, always timezone aware"""
+    when = datetime.datetime.fromisoformat(upload.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return when
+
+
+@evaluator(tier=Tier.CHEAP)
+def on_pypi(context: PackageContext) -> Signal:
+    """Does PyPI know this package at all"""
+    if context["metadata"] is None:
+        return Signal(0.0, "not on PyPI", REJECT)
+    return Signal(None, "on PyPI")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"], version="2")
+def parked(context: PackageContext) -> Signal:
+    """
+    Parked, placeholder or squatted names, ad hoc or via pypi-parker. Real
+    packages say "placeholder" in their README too, so the description alone
+    only rejects a package with nothing but tiny uploads.
+    """
+    metadata = context["metadata"]
+    if not _uploaded_releases(metadata):
+        return Signal(0.0, "no files ever uploaded", REJECT)
+    info = metadata.get("info") or {}
+    if PARKED_PATTERNS.search(info.get("summary") or ""):
+        return Signal(0.0, "summary says it is parked", REJECT)
+    if PARKED_PATTERNS.search((info.get("description") or "")[:2000]):
+        if _all_uploads_tiny(metadata):
+            return Signal(0.0, "says it is parked, no real code uploaded", REJECT)
+        return Signal(0.3, "description mentions parking or placeholders")
+    return Signal(None, "not parked")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"], version="3")
+def release_count(context: PackageContext) -> Signal:
+    """Many releases is a good sign"""
+    count = len(_uploaded_releases(context["metadata"]))
+    ranked = _ranked(context, "release_count", count)
+    if ranked is not None:
+        rank, score = ranked
+        return Signal(score, f"{count} releases, more than {rank:.0%} of packages")
+    if count >= 5:
+        return Signal(1.0, f"{count} releases")
+    if count >= 2:
+        return Signal(0.5, f"{count} releases")
+    return Signal(0.2, f"{count} release")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"], version="3")
+def maintainer_count(context: PackageContext) -> Signal:
+    """2+ maintainers is a good sign"""
+    people = maintainers(context["metadata"].get("info") or {})
+    ranked = _ranked(context, "maintainer_count", len(people))
+    if ranked is not None:
+        rank, score = ranked
+        return Signal(score, f"{len(people)} maintainers, more than {rank:.0%}")
+    if len(people) >= 2:
+        return Signal(1.0, f"{len(people)} maintainers")
+    if people:
+        return Signal(0.5, "1 maintainer")
+    return Signal(0.0, "no maintainer named")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"])
+def staleness(context: PackageContext) -> Signal:
+    """Stale is VERY COMMON, when was the last upload"""
+    uploads = _uploaded_releases(context["metadata"])
+    if not uploads:
+        return Signal(None, "no uploads")
+    age = datetime.datetime.now(datetime.timezone.utc) - _parse_upload(uploads[-1])
+    if age < YEAR:
+        return Signal(1.0, "released in the last year")
+    if age < 3 * YEAR:
+        return Signal(0.5, f"last release {age.days // 365} years ago")
+    return Signal(0.1, f"last release {age.days // 365} years ago")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"])
+def age(context: PackageContext) -> Signal:
+    """Brand new packages are where typosquats & malware turn up"""
+    uploads = _uploaded_releases(context["metadata"])
+    if not uploads:
+        return Signal(None, "no uploads")
+    now = datetime.datetime.now(datetime.timezone.utc)
+    days = (now - _parse_upload(uploads[0])).days
+    ranked = _ranked(context, "age_days", days)
+    if ranked is not None:
+        rank, score = ranked
+        return Signal(score, f"first upload {days} days ago, older than {rank:.0%}")
+    if days < 90:
+        return Signal(0.3, f"first upload {days} days ago")
+    if days < 365:
+        return Signal(0.6, f"first upload {days} days ago")
+    return Signal(1.0, f"first upload {days // 365} years ago")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"], version="3")
+def downloads(context: PackageContext) -> Signal:
+    """Ignored is VERY COMMON, but so is rarely downloaded"""
+    count = context.get("downloads")
+    if count is None:
+        return Signal(None, "download count unknown")
+    ranked = _ranked(context, "downloads", count)
+    if ranked is not None:
+        rank, score = ranked
+        return Signal(score, f"{count} downloads, more than {rank:.0%} of packages")
+    # 1,000,000 a month is as good as it gets
+    return Signal(min(1.0, math.log10(count + 1) / 6), f"{count} downloads")
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"], weight=0.5)
+def claims_production(context: PackageContext) -> Signal:
+    """Development Status classifier, an unreliable signal"""
+    classifiers = (context["metadata"].get("info") or {}).get("classifiers") or []
+    statuses = [_ for _ in classifiers if _.startswith("Development Status")]
+    if not statuses:
+        return Signal(None, "no development status")
+    status = statuses[0]
+    if "5 - " in status or "6 - " in status:
+        return Signal(1.0, status)
+    if "4 - " in status:
+        return Signal(0.6, status)
+    if "7 - " in status:
+        return Signal(0.0, status)
+    return Signal(0.2, status)
+
+
+@evaluator(tier=Tier.CHEAP, depends_on=["on_pypi"])
+def typosquat(context: PackageContext) -> Signal:
+    """A typo or two away from a far more popular package"""
+    index = context.get("name_index")
+    if index is None:
+        return Signal(None, "no name index")
+    own = context.get("downloads") or 0
+    suspects = [
+        near
+        for near in index.near(context.name)
+        if (near.downloads or 0) > 100 * max(own, 1)
+    ]
+    if suspects:
+        closest = suspects[0]
+        edits = "1 edit" if closest.distance == 1 else f"{closest.distance} edits"
+        return Signal(0.0, f"{edits} from {closest.name}")
+    return Signal(None, "no popular look alikes")
@@ -0,0 +1,192 @@
+"""
+Medium cost signals, read straight out of the sdist or wheel.
+
+Context values used
+- archive: an ArchiveTree (see cheese_grader/archives.py), usually from a
+  loader so the download only happens if one of these actually runs
+- analysis: name -> FileAnalysis, the one shared parse of the .py files,
+  made from the archive on first use if nothing else provides it
+"""
+import ast
+from typing import Dict, List, Set
+
+from cheese_grader.signals.engine import (
+    REJECT,
+    PackageContext,
+    Signal,
+    Tier,
+    evaluator,
+)
+from cheese_grader.shadowing import (
+    POPULAR,
+    STDLIB,
+    check_modules,
+    top_level_modules,
+)
+from cheese_grader.source_analysis import FileAnalysis, analyze_sources
+from cheese_grader.syntax_check import summarize
+from cheese_grader.two_or_three import POLYGLOT, PY2, PY3, classify_files
+
+# Things a setup.py has no business doing at install time
+RISKY_SETUP_CALLS = {
+    "eval",
+    "exec",
+    "os.system",
+    "os.popen",
+    "subprocess.call",
+    "subprocess.check_call",
+    "subprocess.check_output",
+    "subprocess.Popen",
+    "subprocess.run",
+    "urllib.request.urlopen",
+    "urlopen",
+    "requests.get",
+    "requests.post",
+    "socket.socket",
+    "base64.b64decode",
+}
+
+
+def python_files(names: List[str]) -> List[str]:
+    """.py files, excluding setup.py & friends at the root"""
+    return [
+        name
+        for name in names
+        if name.endswith(".py") and name not in ("setup.py", "conftest.py")
+    ]
+
+
+def _dotted(node: ast.AST) -> str:
+    """'os.system' for os.system(...), '' for anything not a plain name"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _dotted(node.value)
+        return f"{parent}.{node.attr}" if parent else ""
+    return ""
+
+
+def risky_calls(source: str) -> Set[str]:
+    """Calls in setup.py source that shouldn't be there, without running it"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return set()
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            name = _dotted(node.func)
+            if name in RISKY_SETUP_CALLS:
+                found.add(name)
+    return found
+
+
+def analyses(context: PackageContext) -> Dict[str, FileAnalysis]:
+    """Shared single parse of the archive's .py files"""
+    if "analysis" not in context.values and "analysis" not in context.loaders:
+        context.loaders["analysis"] = lambda _: analyze_sources(
+            _["archive"].walk(lambda name: name.endswith(".py"))
+        )
+    return context["analysis"]
+
+
+@evaluator(tier=Tier.MEDIUM)
+def has_python(context: PackageContext) -> Signal:
+    """Not empty of all .py files"""
+    count = len(python_files(context["archive"].names()))
+    if not count:
+        return Signal(0.0, "no python files", REJECT)
+    return Signal(None, f"{count} python files")
+
+
+@evaluator(tier=Tier.MEDIUM, weight=0.5)
+def has_readme(context: PackageContext) -> Signal:
+    """README, if it isn't there it doesn't say much"""
+    names = context["archive"].names()
+    if any(name.split("/")[-1].upper().startswith("README") for name in names):
+        return Signal(1.0, "has README")
+    return Signal(None, "no README")
+
+
+@evaluator(tier=Tier.MEDIUM, weight=0.5)
+def has_tests(context: PackageContext) -> Signal:
+    """Shipped tests, sdists only, wheels rarely include them"""
+    names = context["archive"].names()
+    for name in names:
+        parts = name.split("/")
+        if parts[-1].startswith("test_") or "tests" in parts[:-1]:
+            return Signal(1.0, "has tests")
+    return Signal(None, "no tests shipped")
+
+
+@evaluator(tier=Tier.MEDIUM)
+def setup_py_risk(context: PackageContext) -> Signal:
+    """setup.py that runs commands or phones home, checked without running it"""
+    archive = context["archive"]
+    if not archive.exists("setup.py"):
+        return Signal(None, "no setup.py")
+    found = risky_calls(archive.read_text("setup.py"))
+    if found:
+        return Signal(0.0, f"setup.py calls {', '.join(sorted(found))}")
+    return Signal(None, "setup.py looks static")
+
+
+@evaluator(tier=Tier.MEDIUM, depends_on=["has_python"])
+def compiles(context: PackageContext) -> Signal:
+    """Is it even valid 3.x, compileall without the compileall"""
+    summary = summarize([_.syntax for _ in analyses(context).values()])
+    if not summary.valid:
+        return Signal(0.0, "no file is valid python 3", REJECT)
+    if summary.errors:
+        first = summary.errors[0]
+        return Signal(
+            summary.valid / summary.files,
+            f"{len(summary.errors)} files fail, e.g. {first.name}:{first.line}",
+        )
+    minimum = ".".join(str(_) for _ in summary.minimum or ())
+    return Signal(1.0, f"all files valid, needs python {minimum}+")
+
+
+@evaluator(tier=Tier.MEDIUM, depends_on=["has_python"])
+def python3(context: PackageContext) -> Signal:
+    """Python 2 only is dead code for anyone on 3"""
+    sources = context["archive"].walk(lambda name: name.endswith(".py"))
+    verdict, _ = classify_files(sources)
+    evidence = ", ".join(verdict.evidence[:3])
+    if verdict.kind == PY2 and verdict.confidence >= 0.8:
+        return Signal(0.0, f"python 2 only: {evidence}", REJECT)
+    if verdict.kind == PY2:
+        return Signal(0.3, f"probably python 2: {evidence}")
+    if verdict.kind == PY3:
+        return Signal(1.0, f"python 3: {evidence}")
+    if verdict.kind == POLYGLOT:
+        return Signal(0.8, f"python 2 & 3: {evidence}")
+    return Signal(None, "can't tell python 2 from 3")
+
+
+@evaluator(tier=Tier.MEDIUM, depends_on=["has_python"])
+def lines_of_code(context: PackageContext) -> Signal:
+    """A trivial number of lines of code: 0, 1-10 or more"""
+    found = analyses(context)
+    count = sum(found[name].lines.code for name in python_files(list(found)))
+    if not count:
+        return Signal(0.0, "0 lines of code", REJECT)
+    if count <= 10:
+        return Signal(0.1, f"{count} lines of code")
+    return Signal(None, f"{count} lines of code")
+
+
+@evaluator(tier=Tier.MEDIUM)
+def shadowing(context: PackageContext) -> Signal:
+    """Installs a module named like a stdlib module or a popular package's"""
+    modules = top_level_modules(context["archive"])
+    shadows = check_modules(context.name, modules)
+    stdlib = [_ for _ in shadows if _.kind == STDLIB]
+    if stdlib:
+        found = ", ".join(f"{_.module} ({_.detail})" for _ in stdlib)
+        return Signal(0.0, f"shadows stdlib {found}")
+    popular = [_ for _ in shadows if _.kind == POPULAR]
+    if popular:
+        found = ", ".join(f"{_.module} of {_.detail}" for _ in popular)
+        return Signal(0.2, f"shadows {found}")
+    return Signal(None, "no shadowing")
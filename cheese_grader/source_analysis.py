@@ -0,0 +1,408 @@
+"""
+Parse each file once, answer many questions from the one tree.
+
+Instead of flake8, mccabe, vulture & compileall each parsing the source again,
+one pass computes
+
+- syntax: valid python 3, oldest 3.x grammar, error location
+- complexity: McCabe complexity of each function & method
+- imports: absolute names of modules imported, relative imports resolved
+- definitions & names used: for dead code candidates across a package
+- shadowing: modules named like stdlib ones, top level names like builtins
+- lines: code/comment/docstring/blank, see line_counts.py
+
+Results are cached by digest of the file's bytes.
+
+    analyses = analyze_files(paths, AnalysisCache(".build_state/analysis.json"))
+    too_complex = [_ for _ in complexities(analyses) if _[3] > 10]
+"""
+import ast
+import builtins
+import concurrent.futures
+import hashlib
+import json
+import os
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from cheese_grader.line_counts import LineCount, count_python
+from cheese_grader.shadowing import STDLIB_INDEX
+from cheese_grader.syntax_check import FileSyntax, parse_source
+
+# Bump when any rule changes, old cache entries are then ignored
+ANALYZER_VERSION = 3
+
+POOL_THRESHOLD = 200
+CHUNK_SIZE = 64
+
+BUILTIN_NAMES = frozenset(name for name in dir(builtins) if not name.startswith("_"))
+
+# Defined but called by frameworks, not by the package itself
+IMPLICITLY_USED = {"setUp", "tearDown", "setUpClass", "tearDownClass", "main"}
+
+
+class Definition(NamedTuple):
+    """A function, method or class"""
+
+    name: str
+    qualified_name: str
+    line: int
+
+
+class Complexity(NamedTuple):
+    """McCabe complexity of one function"""
+
+    qualified_name: str
+    line: int
+    complexity: int
+
+
+class FileAnalysis(NamedTuple):
+    """Everything learned from one parse of one file"""
+
+    name: str
+    module: str
+    syntax: FileSyntax
+    lines: LineCount
+    complexity: List[Complexity] = []
+    imports: List[str] = []
+    definitions: List[Definition] = []
+    used_names: List[str] = []
+    shadowed_builtins: List[str] = []
+
+
+def module_name(path: str) -> str:
+    """'pkg/sub/mod.py' -> 'pkg.sub.mod', 'pkg/__init__.py' -> 'pkg'"""
+    parts = path.replace("\\", "/").strip("/").split("/")
+    if parts and parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+    parts[-1] = os.path.splitext(parts[-1])[0]
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _decisions(function: ast.AST) -> int:
+    """
+    Branch points in a function, counted the way mccabe counts them, so the
+    C901 gate agrees with flake8: `and`/`or` & match don't count, a try is
+    one per handler plus one, and a nested function is folded into the one
+    around it, one more for the def itself.
+    """
+    count = 0
+    pending = list(ast.iter_child_nodes(function))
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            count += 1
+            pending.extend(node.body)
+            continue
+        if isinstance(node, ast.ClassDef):
+            pending.extend(node.body)
+            continue
+        if isinstance(node, (ast.If, ast.For, ast.AsyncFor, ast.While)):
+            count += 1
+        elif isinstance(node, ast.Try):
+            count += len(node.handlers) + 1
+        pending.extend(ast.iter_child_nodes(node))
+    return count
+
+
+class _Visitor(ast.NodeVisitor):
+    """Collects definitions, complexity, imports & names in one walk"""
+
+    def __init__(self, module: str, is_package: bool) -> None:
+        self.module = module
+        self.is_package = is_package
+        self.scope: List[str] = []
+        self.definitions: List[Definition] = []
+        self.complexity: List[Complexity] = []
+        self.imports: Set[str] = set()
+        self.used: Set[str] = set()
+        # functions we are inside of, anything defined in one is folded into it
+        self.function_depth = 0
+
+    def _define(self, node: Any) -> None:
+        qualified = ".".join(self.scope + [node.name])
+        self.definitions.append(Definition(node.name, qualified, node.lineno))
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        if isinstance(node, ast.ClassDef):
+            for base in node.bases + [_.value for _ in node.keywords]:
+                self.visit(base)
+        else:
+            if not self.function_depth:
+                self.complexity.append(
+                    Complexity(qualified, node.lineno, _decisions(node) + 1)
+                )
+            self.visit(node.args)
+            if node.returns:
+                self.visit(node.returns)
+        is_function = not isinstance(node, ast.ClassDef)
+        self.function_depth += is_function
+        self.scope.append(node.name)
+        for child in node.body:
+            self.visit(child)
+        self.scope.pop()
+        self.function_depth -= is_function
+
+    visit_FunctionDef = _define  # noqa: N815
+    visit_AsyncFunctionDef = _define  # noqa: N815
+    visit_ClassDef = _define  # noqa: N815
+
+    def visit_Import(self, node: ast.Import) -> None:  # noqa: N802
+        for alias in node.names:
+            self.imports.add(alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:  # noqa: N802
+        base = node.module or ""
+        if node.level:
+            package = self.module.split(".")
+            # a package's __init__ is its own base, a module's is its parent
+            keep = len(package) - node.level + (1 if self.is_package else 0)
+            base = ".".join(package[: max(0, keep)] + ([base] if base else []))
+        for alias in node.names:
+            self.used.add(alias.name)
+            if base and alias.name != "*":
+                # might be a submodule, import_graph sorts that out
+                self.imports.add(f"{base}.{alias.name}")
+        if base:
+            self.imports.add(base)
+
+    def visit_Name(self, node: ast.Name) -> None:  # noqa: N802
+        self.used.add(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:  # noqa: N802
+        self.used.add(node.attr)
+        self.visit(node.value)
+
+    def visit_Constant(self, node: ast.Constant) -> None:  # noqa: N802
+        # __all__ entries, getattr(obj, "name") and the like
+        if isinstance(node.value, str) and node.value.isidentifier():
+            self.used.add(node.value)
+
+
+def _top_level_names(tree: ast.Module) -> Set[str]:
+    """Names bound at module level"""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.update(_.id for _ in targets if isinstance(_, ast.Name))
+    return names
+
+
+def analyze_source(name: str, source: bytes) -> FileAnalysis:
+    """One parse, every answer"""
+    module = module_name(name)
+    tree, syntax = parse_source(source, name)
+    lines = count_python(source)
+    if tree is None:
+        return FileAnalysis(name, module, syntax, lines)
+    visitor = _Visitor(module, name.endswith("__init__.py"))
+    visitor.visit(tree)
+    return FileAnalysis(
+        name=name,
+        module=module,
+        syntax=syntax,
+        lines=lines,
+        complexity=visitor.complexity,
+        imports=sorted(visitor.imports),
+        definitions=visitor.definitions,
+        used_names=sorted(visitor.used),
+        shadowed_builtins=sorted(_top_level_names(tree) & BUILTIN_NAMES),
+    )
+
+
+def _to_json(analysis: FileAnalysis) -> Dict[str, Any]:
+    """Cache entry, name & module left out, they come from the caller"""
+    return {
+        "syntax": list(analysis.syntax[1:]),
+        "lines": list(analysis.lines),
+        "complexity": [list(_) for _ in analysis.complexity],
+        "imports": analysis.imports,
+        "definitions": [list(_) for _ in analysis.definitions],
+        "used_names": analysis.used_names,
+        "shadowed_builtins": analysis.shadowed_builtins,
+    }
+
+
+def _from_json(name: str, entry: Dict[str, Any]) -> FileAnalysis:
+    """Cache entry back to a FileAnalysis for this file name"""
+    valid, minimum, *rest = entry["syntax"]
+    return FileAnalysis(
+        name=name,
+        module=module_name(name),
+        syntax=FileSyntax(name, valid, tuple(minimum) if minimum else None, *rest),
+        lines=LineCount(*entry["lines"]),
+        complexity=[Complexity(*_) for _ in entry["complexity"]],
+        imports=entry["imports"],
+        definitions=[Definition(*_) for _ in entry["definitions"]],
+        used_names=entry["used_names"],
+        shadowed_builtins=entry["shadowed_builtins"],
+    )
+
+
+class AnalysisCache:
+    """
+    digest -> analysis, in a json file
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Load cache, missing, corrupt or outdated cache is an empty one"""
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        if path and os.path.isfile(path):
+            try:
+                with open(path) as file_handle:
+                    saved = json.load(file_handle)
+                if saved.get("version") == ANALYZER_VERSION:
+                    self.entries = saved["entries"]
+            except (ValueError, KeyError, AttributeError):
+                self.entries = {}
+
+    def get(self, digest: str, name: str) -> Optional[FileAnalysis]:
+        """Cached analysis, as if name had been analyzed, or None"""
+        entry = self.entries.get(digest)
+        return None if entry is None else _from_json(name, entry)
+
+    def put(self, digest: str, analysis: FileAnalysis) -> None:
+        """Remember analysis"""
+        self.entries[digest] = _to_json(analysis)
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write cache, replacing the old one in one step"""
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file_handle:
+            saved = {"version": ANALYZER_VERSION, "entries": self.entries}
+            json.dump(saved, file_handle)
+        os.replace(temporary, self.path)
+        self.dirty = False
+
+
+def _analyze_pair(pair: Tuple[str, bytes]) -> FileAnalysis:
+    """Pool friendly analyze_source"""
+    return analyze_source(pair[0], pair[1])
+
+
+def analyze_sources(
+    sources: Iterable[Tuple[str, bytes]],
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, FileAnalysis]:
+    """
+    Analysis of (name, bytes) python files, e.g. ArchiveTree.walk()
+    """
+    cache = cache or AnalysisCache()
+    analyses: Dict[str, FileAnalysis] = {}
+    misses: List[Tuple[str, bytes]] = []
+    digests: Dict[str, str] = {}
+    for name, source in sources:
+        digests[name] = hashlib.sha256(source).hexdigest()
+        cached = cache.get(digests[name], name)
+        if cached is not None:
+            analyses[name] = cached
+        else:
+            misses.append((name, source))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(misses) >= POOL_THRESHOLD:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_analyze_pair, misses, chunksize=CHUNK_SIZE))
+    else:
+        results = [_analyze_pair(pair) for pair in misses]
+
+    for analysis in results:
+        cache.put(digests[analysis.name], analysis)
+        analyses[analysis.name] = analysis
+    cache.save()
+    return analyses
+
+
+def analyze_files(
+    paths: Iterable[str],
+    cache: Optional[AnalysisCache] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, FileAnalysis]:
+    """Analysis of python files on disk, unreadable files skipped"""
+
+    def read() -> Iterable[Tuple[str, bytes]]:
+        for path in paths:
+            try:
+                with open(path, "rb") as file_handle:
+                    yield path, file_handle.read()
+            except OSError:
+                continue
+
+    return analyze_sources(read(), cache, workers)
+
+
+def complexities(
+    analyses: Dict[str, FileAnalysis]
+) -> List[Tuple[str, str, int, int]]:
+    """(file, function, line, complexity), most complex first"""
+    found = [
+        (name, _.qualified_name, _.line, _.complexity)
+        for name, analysis in analyses.items()
+        for _ in analysis.complexity
+    ]
+    return sorted(found, key=lambda _: -_[3])
+
+
+def import_graph(analyses: Dict[str, FileAnalysis]) -> Dict[str, Set[str]]:
+    """module -> modules of the same package it imports"""
+    modules = {analysis.module for analysis in analyses.values()}
+    graph: Dict[str, Set[str]] = {}
+    for analysis in analyses.values():
+        internal = set()
+        for imported in analysis.imports:
+            # `from pkg.mod import name` may name a module or something in it
+            while imported and imported not in modules:
+                imported = imported.rpartition(".")[0]
+            if imported and imported != analysis.module:
+                internal.add(imported)
+        graph[analysis.module] = internal
+    return graph
+
+
+def dead_definitions(analyses: Dict[str, FileAnalysis]) -> List[Tuple[str, Definition]]:
+    """
+    (file, definition) never referred to by name anywhere in the package.
+
+    Candidates, like vulture's, dynamic access can't be seen.
+    """
+    used: Set[str] = set()
+    for analysis in analyses.values():
+        used.update(analysis.used_names)
+    dead = []
+    for name, analysis in sorted(analyses.items()):
+        for definition in analysis.definitions:
+            short = definition.name
+            if short in used or short in IMPLICITLY_USED:
+                continue
+            if short.startswith("__") or short.lower().startswith("test"):
+                continue
+            dead.append((name, definition))
+    return dead
+
+
+def shadowing_modules(analyses: Dict[str, FileAnalysis]) -> List[str]:
+    """Top level modules & packages named like a stdlib module of any version"""
+    tops = {analysis.module.split(".")[0] for analysis in analyses.values()}
+    return sorted(_ for _ in tops if _ in STDLIB_INDEX)
@@ -0,0 +1,3 @@
+"""
+Things we keep on disk between runs, so nightly re-grades don't re-fetch
+"""
@@ -0,0 +1,283 @@
+"""
+Downloaded sdists & wheels, stored by sha256 (the digest PyPI publishes).
+
+    blobs/ab/abcdef...    the archive, once, no matter how many versions
+                          or package names point at the same bytes
+    trees/abcdef.../      unpacked once
+    index.sqlite          sizes & last use, for LRU eviction under a quota
+
+Analyses get a checkout of a tree made of hardlinks, so a hundred analyses
+of one package share one copy on disk. Hardlinks share content with the
+master tree, so tools that rewrite files (black -w, pyupgrade, 2to3 -w)
+must ask for a real copy with checkout(..., copy=True).
+"""
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from cheese_grader.utils import cache_folder
+
+LOGGER = logging.getLogger(__name__)
+
+GIGABYTE = 1024 * 1024 * 1024
+
+
+class DigestMismatch(Exception):
+    """Downloaded bytes aren't what PyPI said they would be"""
+
+
+def pick_file(
+    release: Dict[str, Any], prefer: Iterable[str] = ("sdist", "bdist_wheel")
+) -> Optional[Dict[str, Any]]:
+    """
+    File entry (url, filename, digests) from PyPI release JSON "urls"
+    """
+    files = [_ for _ in release.get("urls") or [] if not _.get("yanked")]
+    for packagetype in prefer:
+        for file in files:
+            if file.get("packagetype") != packagetype:
+                continue
+            # platform wheels have the same python source, but prefer pure
+            if packagetype == "bdist_wheel" and not file["filename"].endswith(
+                "-none-any.whl"
+            ):
+                continue
+            return file
+    return files[0] if files else None
+
+
+def _safe_members(archive: tarfile.TarFile, destination: str) -> Iterator[Any]:
+    """No absolute paths, no .., no links out of the tree, no devices"""
+    root = os.path.realpath(destination)
+    for member in archive.getmembers():
+        target = os.path.realpath(os.path.join(root, member.name))
+        if not target.startswith(root + os.sep):
+            continue
+        if member.issym() or member.islnk():
+            # symlinks are relative to their folder, hardlinks to the archive
+            base = os.path.dirname(target) if member.issym() else root
+            link = os.path.join(base, member.linkname)
+            if not os.path.realpath(link).startswith(root + os.sep):
+                continue
+        elif not (member.isfile() or member.isdir()):
+            continue
+        yield member
+
+
+def unpack_archive(path: str, destination: str) -> None:
+    """Extract wheel, zip or tar sdist, without letting it write outside"""
+    if zipfile.is_zipfile(path):
+        root = os.path.realpath(destination)
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                target = os.path.realpath(os.path.join(root, name))
+                if target.startswith(root + os.sep):
+                    archive.extract(name, destination)
+        return
+    with tarfile.open(path) as archive:
+        members = _safe_members(archive, destination)
+        if hasattr(tarfile, "data_filter"):
+            # python 3.12, and security releases before it, check again
+            archive.extractall(destination, members=members, filter="data")
+        else:
+            archive.extractall(destination, members=members)
+
+
+class ArtifactStore:
+    """
+    Content addressed, LRU evicted store of archives & unpacked trees
+    """
+
+    def __init__(self, root: Optional[str] = None, quota: int = 10 * GIGABYTE) -> None:
+        self.root = root or cache_folder("artifacts")
+        self.quota = quota
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "trees"), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " kind TEXT NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (kind, sha256))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short lived connection, one transaction"""
+        index = os.path.join(self.root, "index.sqlite")
+        connection = sqlite3.connect(index, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def blob_path(self, sha256: str) -> str:
+        """Where archive with this digest lives"""
+        return os.path.join(self.root, "blobs", sha256[:2], sha256)
+
+    def tree_path(self, sha256: str) -> str:
+        """Where archive with this digest is unpacked"""
+        return os.path.join(self.root, "trees", sha256)
+
+    def _touch(self, kind: str, sha256: str, size: Optional[int] = None) -> None:
+        """Record use, for LRU"""
+        with self._connect() as connection:
+            if size is None:
+                connection.execute(
+                    "UPDATE entries SET last_used = ? WHERE kind = ? AND sha256 = ?",
+                    (time.time(), kind, sha256),
+                )
+            else:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (kind, sha256, size, time.time()),
+                )
+
+    def has(self, sha256: str) -> bool:
+        """Archive already stored"""
+        return os.path.isfile(self.blob_path(sha256))
+
+    def put(self, stream: Any, sha256: Optional[str] = None) -> str:
+        """
+        Store bytes from a file like object, verify digest if given.
+
+        Returns sha256.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        handle, temporary = tempfile.mkstemp(dir=os.path.join(self.root, "blobs"))
+        try:
+            with os.fdopen(handle, "wb") as output:
+                for block in iter(lambda: stream.read(1024 * 1024), b""):
+                    digest.update(block)
+                    output.write(block)
+                    size += len(block)
+            actual = digest.hexdigest()
+            if sha256 and actual != sha256.lower():
+                raise DigestMismatch(f"expected {sha256}, got {actual}")
+            final = self.blob_path(actual)
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            # atomic, if another process got here first, same bytes anyway
+            os.replace(temporary, final)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._touch("blob", actual, size)
+        self.evict(keep=[("blob", actual)])
+        return actual
+
+    def fetch(self, url: str, sha256: str, session: Any = None) -> str:
+        """
+        Path to archive, downloaded only if we don't already have these bytes
+        """
+        if self.has(sha256):
+            self._touch("blob", sha256)
+            return self.blob_path(sha256)
+        if session is None:
+            # pylint: disable=import-outside-toplevel
+            import requests
+
+            session = requests
+        LOGGER.debug(f"Downloading {url}")
+        with session.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            self.put(response.raw, sha256)
+        return self.blob_path(sha256)
+
+    def unpack(self, sha256: str) -> str:
+        """
+        Path to unpacked tree, extracted only the first time
+        """
+        final = self.tree_path(sha256)
+        if os.path.isdir(final):
+            self._touch("tree", sha256)
+            return final
+        temporary = tempfile.mkdtemp(dir=os.path.join(self.root, "trees"))
+        try:
+            unpack_archive(self.blob_path(sha256), temporary)
+            try:
+                os.rename(temporary, final)
+            except OSError:
+                # another process unpacked it first
+                if not os.path.isdir(final):
+                    raise
+        finally:
+            if os.path.isdir(temporary):
+                shutil.rmtree(temporary, ignore_errors=True)
+        self._touch("tree", sha256, _tree_size(final))
+        self.evict(keep=[("tree", sha256)])
+        return final
+
+    def checkout(self, sha256: str, destination: str, copy: bool = False) -> str:
+        """
+        Tree for one analysis, hardlinked to the shared tree unless copy is True
+        """
+        source = self.unpack(sha256)
+
+        def link(src: str, dst: str) -> None:
+            try:
+                os.link(src, dst)
+            except OSError:
+                # other file system, or one that can't hardlink
+                shutil.copy2(src, dst)
+
+        shutil.copytree(
+            source,
+            destination,
+            symlinks=True,
+            copy_function=shutil.copy2 if copy else link,
+            dirs_exist_ok=True,
+        )
+        return destination
+
+    def evict(self, keep: Iterable[Tuple[str, str]] = ()) -> None:
+        """
+        Remove least recently used entries until under quota, never the
+        (kind, sha256) entries in keep, e.g. the one about to be returned
+        """
+        kept = set(keep)
+        with self._connect() as connection:
+            total = connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+            if not total or total <= self.quota:
+                return
+            rows = connection.execute(
+                "SELECT kind, sha256, size FROM entries ORDER BY last_used"
+            ).fetchall()
+            for kind, sha256, size in rows:
+                if total <= self.quota:
+                    break
+                if (kind, sha256) in kept:
+                    continue
+                if kind == "blob":
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(self.blob_path(sha256))
+                else:
+                    shutil.rmtree(self.tree_path(sha256), ignore_errors=True)
+                connection.execute(
+                    "DELETE FROM entries WHERE kind = ? AND sha256 = ?", (kind, sha256)
+                )
+                total -= size
+
+
+def _tree_size(path: str) -> int:
+    """Bytes in a folder"""
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, files in os.walk(path)
+        for name in files
+    )
@@ -0,0 +1,213 @@
+"""
+Download counts survive between processes in a SQLite file in the user cache.
+
+- fresh for `ttl` seconds
+- then stale but still served for `stale_ttl` more seconds while a background
+  thread re-fetches it
+- 404s are remembered for `negative_ttl` seconds
+- 429s are retried with backoff, never cached and never turned into "0 downloads".
+  This is the one place counts are retried, fetchers handed to get() should
+  try once. A Retry-After is obeyed up to MAX_RETRY_AFTER seconds.
+- Offline from the fetcher means "no network", whatever is cached is kept and
+  served, however old, and nothing is written
+"""
+import contextlib
+import email.utils
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional, Tuple
+
+from cheese_grader.utils import cache_folder, normalize_name
+
+LOGGER = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+# Longest a Retry-After is slept on, a server asking for an hour doesn't get
+# to stall a build for an hour
+MAX_RETRY_AFTER = 60.0
+
+
+class PackageNotFound(Exception):
+    """Stats service doesn't know this package"""
+
+
+class RateLimited(Exception):
+    """Stats service said 429, too many requests"""
+
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"Rate limited, retry after {retry_after}")
+        self.retry_after = retry_after
+
+
+class Offline(Exception):
+    """Fetcher isn't allowed to use the network"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either seconds or an HTTP date, capped at MAX_RETRY_AFTER"""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(when.timestamp() - time.time(), 0.0), MAX_RETRY_AFTER)
+
+
+# Returns count (None if service has no number), raises PackageNotFound,
+# RateLimited or Offline
+Fetcher = Callable[[str], Optional[int]]
+
+
+class DownloadCountCache:
+    """
+    Persistent name -> download count cache
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DAY,
+        stale_ttl: float = 6 * DAY,
+        negative_ttl: float = DAY,
+        retries: int = 5,
+        backoff: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.path = path or os.path.join(cache_folder(), "download_counts.sqlite")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self._revalidating: set = set()
+        self._lock = threading.Lock()
+        self._background = ThreadPoolExecutor(max_workers=2)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS download_counts ("
+                " name TEXT PRIMARY KEY,"
+                " downloads INTEGER,"
+                " found INTEGER NOT NULL,"
+                " fetched REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One short lived connection per call, safe across threads & processes"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _read(self, name: str) -> Optional[Tuple[Optional[int], bool, float]]:
+        """downloads, found, fetched"""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT downloads, found, fetched FROM download_counts WHERE name = ?",
+                (name,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], bool(row[1]), row[2]
+
+    def _write(self, name: str, downloads: Optional[int], found: bool) -> None:
+        """Insert or replace one row"""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO download_counts VALUES (?, ?, ?, ?)",
+                (name, downloads, int(found), time.time()),
+            )
+
+    def _fetch_and_store(self, name: str, fetch: Fetcher) -> Optional[int]:
+        """Fetch with backoff on 429, store result, including 404s"""
+        for attempt in range(self.retries + 1):
+            try:
+                downloads = fetch(name)
+            except PackageNotFound:
+                self._write(name, None, False)
+                return None
+            except RateLimited as limited:
+                if attempt == self.retries:
+                    raise
+                delay = limited.retry_after or self.backoff * (2 ** attempt)
+                delay = min(delay, MAX_RETRY_AFTER)
+                # jitter, so parallel workers don't retry in lock step
+                delay += random.uniform(0, self.backoff)  # nosec
+                LOGGER.debug(f"429 for {name}, sleeping {delay:.1f}s")
+                self.sleep(delay)
+                continue
+            self._write(name, downloads, True)
+            return downloads
+        raise RateLimited()
+
+    def _revalidate(self, name: str, fetch: Fetcher) -> None:
+        """Refresh a stale entry in the background, at most once at a time"""
+        with self._lock:
+            if name in self._revalidating:
+                return
+            self._revalidating.add(name)
+
+        def refresh() -> None:
+            # pylint: disable=broad-except
+            try:
+                self._fetch_and_store(name, fetch)
+            except Exception as ex:
+                LOGGER.debug(f"Background refresh of {name} failed: {ex}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(name)
+
+        self._background.submit(refresh)
+
+    def get(self, package: str, fetch: Fetcher) -> Optional[int]:
+        """
+        Download count for package, None if the package doesn't exist.
+
+        Raises RateLimited if still limited after retries and nothing is cached,
+        Offline if the fetcher is offline and nothing is cached.
+        """
+        name = normalize_name(package)
+        cached = self._read(name)
+        if cached is not None:
+            downloads, found, fetched = cached
+            age = time.time() - fetched
+            if not found:
+                if age < self.negative_ttl:
+                    return None
+            elif age < self.ttl:
+                return downloads
+            elif age < self.ttl + self.stale_ttl:
+                self._revalidate(name, fetch)
+                return downloads
+
+        try:
+            return self._fetch_and_store(name, fetch)
+        except Offline:
+            if cached is not None:
+                return cached[0] if cached[1] else None
+            raise
+        except RateLimited:
+            if cached is not None and cached[1]:
+                # too old, but better than nothing or a wrong zero
+                LOGGER.debug(f"Still rate limited, using old count for {name}")
+                return cached[0]
+            raise
+
+    def wait_for_refreshes(self) -> None:
+        """Let background refreshes finish, e.g. before process exit"""
+        self._background.shutdown(wait=True)
+        self._background = ThreadPoolExecutor(max_workers=2)
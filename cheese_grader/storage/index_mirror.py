@@ -0,0 +1,366 @@
+"""
+Local copy of the index, so grading can run behind an egress proxy, or
+with no network at all, at disk speed.
+
+Three kinds of document, each kept zlib compressed in one SQLite file
+
+    simple      PEP 691 json project page, /simple/<name>/  (files, hashes)
+    project     PyPI json, /pypi/<name>/json                (info, releases)
+    release     PyPI json, /pypi/<name>/<version>/json      (fetched on demand)
+
+Syncing is incremental. The PEP 691 root page lists every project with its
+_last-serial, so only projects whose serial moved are asked for at all, and
+those are asked with If-None-Match, so an unchanged page costs a 304.
+Indexes without serials (devpi, simple file servers) get ETags only.
+
+    mirror = IndexMirror()
+    mirror.sync(["requests", "urllib3"])     # or sync() for everything
+    graph = DependencyGraph(mirror.project_json, mirror.release_json)
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from cheese_grader.utils import cache_folder, normalize_name
+
+LOGGER = logging.getLogger(__name__)
+
+PYPI_URL = "https://pypi.org"
+SIMPLE_JSON = "application/vnd.pypi.simple.v1+json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    -- serial the index root says the project is at
+    serial INTEGER,
+    -- serial of what we have stored, NULL if never synced
+    synced_serial INTEGER,
+    synced REAL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    etag TEXT,
+    fetched REAL NOT NULL,
+    body BLOB,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SyncSummary(NamedTuple):
+    """
+    What one sync did
+    """
+
+    # projects considered
+    checked: int
+    # documents downloaded
+    fetched: int
+    # 304s
+    unchanged: int
+    # 404s, the project is gone from the index
+    missing: int
+    failed: List[str]
+
+
+def _pack(document: Any) -> bytes:
+    return zlib.compress(json.dumps(document).encode("utf-8"))
+
+
+def _unpack(body: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(body)) if body else None
+
+
+class IndexMirror:
+    """
+    Incrementally synced, offline readable copy of a PEP 691 index & PyPI json
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        index_url: str = PYPI_URL,
+        session: Any = None,
+        max_workers: int = 8,
+        timeout: float = 30,
+    ) -> None:
+        self.path = path or os.path.join(cache_folder(), "mirror.sqlite")
+        self.index_url = index_url.rstrip("/")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._session = session
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @property
+    def session(self) -> Any:
+        """HTTP session, only created if we actually go to the network"""
+        if self._session is None:
+            # pylint: disable=import-outside-toplevel
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short lived connection, one transaction"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _document(self, kind: str, key: str) -> Tuple[Optional[str], Any]:
+        """(etag, parsed document), (None, None) if not stored"""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT etag, body FROM documents WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], _unpack(row[1])
+
+    def _etag(self, kind: str, key: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT etag FROM documents WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _get(
+        self, url: str, etag: Optional[str], accept: str = "application/json"
+    ) -> Tuple[int, Optional[str], Any, Dict[str, str]]:
+        """Conditional GET -> (status, etag, parsed json or None, headers)"""
+        headers = {"Accept": accept}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code in (304, 404):
+            return response.status_code, etag, None, dict(response.headers)
+        response.raise_for_status()
+        return (
+            response.status_code,
+            response.headers.get("ETag"),
+            response.json(),
+            dict(response.headers),
+        )
+
+    # ---- syncing -----------------------------------------------------------
+
+    def sync_index(self) -> List[str]:
+        """
+        Refresh the project list from the index root.
+
+        Returns names whose serial moved past what we have stored. Empty if
+        the root didn't change, or the index doesn't publish serials.
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM state WHERE key = 'root_etag'"
+            ).fetchone()
+        status, etag, root, _ = self._get(
+            f"{self.index_url}/simple/", row[0] if row else None, SIMPLE_JSON
+        )
+        if status == 304 or root is None:
+            return self.stale()
+
+        rows = [
+            (normalize_name(project["name"]), project.get("_last-serial"))
+            for project in root.get("projects") or []
+        ]
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT INTO projects (name, serial) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET serial = excluded.serial",
+                rows,
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO state VALUES ('root_etag', ?)", (etag,)
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO state VALUES ('root_serial', ?)",
+                (str((root.get("meta") or {}).get("_last-serial") or ""),),
+            )
+        return self.stale()
+
+    def stale(self) -> List[str]:
+        """Projects the index root says changed since we last synced them"""
+        with self._connect() as connection:
+            return [
+                row[0]
+                for row in connection.execute(
+                    "SELECT name FROM projects WHERE serial IS NOT NULL"
+                    " AND (synced_serial IS NULL OR synced_serial < serial)"
+                    " ORDER BY name"
+                )
+            ]
+
+    def _fetch_project(self, name: str) -> Dict[str, Any]:
+        """Conditional GETs for one project's simple page & PyPI json"""
+        result: Dict[str, Any] = {"name": name, "documents": [], "serial": None}
+        for kind, url, accept in (
+            ("simple", f"{self.index_url}/simple/{name}/", SIMPLE_JSON),
+            ("project", f"{self.index_url}/pypi/{name}/json", "application/json"),
+        ):
+            status, etag, document, headers = self._get(
+                url, self._etag(kind, name), accept
+            )
+            if kind == "simple" and document:
+                serial = (document.get("meta") or {}).get("_last-serial")
+                result["serial"] = serial
+            if result["serial"] is None and headers.get("X-PyPI-Last-Serial"):
+                result["serial"] = int(headers["X-PyPI-Last-Serial"])
+            result["documents"].append((kind, status, etag, document))
+        return result
+
+    def _store_project(self, result: Dict[str, Any]) -> Tuple[int, int, int]:
+        """Write one project's fetch result -> (fetched, unchanged, missing)"""
+        counts = [0, 0, 0]
+        now = time.time()
+        name = result["name"]
+        with self._connect() as connection:
+            for kind, status, etag, document in result["documents"]:
+                if status == 304:
+                    counts[1] += 1
+                    continue
+                if status == 404:
+                    counts[2] += 1
+                    connection.execute(
+                        "DELETE FROM documents WHERE kind = ? AND key = ?",
+                        (kind, name),
+                    )
+                    continue
+                counts[0] += 1
+                connection.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                    (kind, name, etag, now, _pack(document)),
+                )
+            if counts[2] == len(result["documents"]):
+                connection.execute("DELETE FROM projects WHERE name = ?", (name,))
+                return counts[0], counts[1], counts[2]
+            connection.execute(
+                "INSERT INTO projects (name, serial, synced_serial, synced)"
+                " VALUES (?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET"
+                " serial = COALESCE(MAX(serial, excluded.serial), excluded.serial,"
+                " serial), synced_serial = COALESCE(excluded.synced_serial, serial),"
+                " synced = excluded.synced",
+                (name, result["serial"], result["serial"], now),
+            )
+        return counts[0], counts[1], counts[2]
+
+    def sync(self, names: Optional[Iterable[str]] = None) -> SyncSummary:
+        """
+        Bring projects up to date.
+
+        With no names, every project whose serial moved since the last sync.
+        Named projects are always asked for, but conditionally, so it costs a
+        304 if nothing changed.
+        """
+        if names is None:
+            wanted = self.sync_index()
+        else:
+            wanted = list(dict.fromkeys(normalize_name(name) for name in names))
+        fetched = unchanged = missing = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_project, name): name for name in wanted
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as ex:  # pylint: disable=broad-except
+                    LOGGER.warning(f"Mirror sync of {futures[future]} failed: {ex}")
+                    failed.append(futures[future])
+                    continue
+                done = self._store_project(result)
+                fetched += done[0]
+                unchanged += done[1]
+                missing += done[2]
+        return SyncSummary(len(wanted), fetched, unchanged, missing, sorted(failed))
+
+    def sync_release(self, name: str, version: str) -> Optional[Dict[str, Any]]:
+        """Fetch & keep one release's PyPI json, None if there is no such release"""
+        key = f"{normalize_name(name)}=={version}"
+        status, etag, document, _ = self._get(
+            f"{self.index_url}/pypi/{normalize_name(name)}/{version}/json",
+            self._etag("release", key),
+        )
+        if status == 404:
+            return None
+        if status == 304:
+            return self._document("release", key)[1]
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                ("release", key, etag, time.time(), _pack(document)),
+            )
+        return dict(document)
+
+    def put(self, kind: str, key: str, document: Dict[str, Any]) -> None:
+        """Keep a document fetched some other way (write through caches)"""
+        if kind != "release":
+            key = normalize_name(key)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, NULL, ?, ?)",
+                (kind, key, time.time(), _pack(document)),
+            )
+
+    # ---- offline reads -----------------------------------------------------
+
+    def names(self) -> List[str]:
+        """Every project the index root listed"""
+        with self._connect() as connection:
+            return [row[0] for row in connection.execute("SELECT name FROM projects")]
+
+    def exists(self, name: str) -> bool:
+        """Index lists the project, or we have a document for it"""
+        name = normalize_name(name)
+        with self._connect() as connection:
+            return bool(
+                connection.execute(
+                    "SELECT 1 FROM projects WHERE name = ?"
+                    " UNION SELECT 1 FROM documents WHERE key = ?",
+                    (name, name),
+                ).fetchone()
+            )
+
+    def simple_page(self, name: str) -> Optional[Dict[str, Any]]:
+        """PEP 691 project page: files, hashes, core-metadata, yanked"""
+        return self._document("simple", normalize_name(name))[1]
+
+    def project_json(self, name: str) -> Optional[Dict[str, Any]]:
+        """PyPI json for the latest release, a ProjectSource"""
+        return self._document("project", normalize_name(name))[1]
+
+    def release_json(self, name: str, version: str) -> Optional[Dict[str, Any]]:
+        """
+        PyPI json for one release, a ReleaseSource.
+
+        The project json doubles as the latest release's json.
+        """
+        name = normalize_name(name)
+        document = self._document("release", f"{name}=={version}")[1]
+        if document is not None:
+            return dict(document)
+        project = self.project_json(name)
+        if project and (project.get("info") or {}).get("version") == version:
+            return project
+        return None
@@ -0,0 +1,277 @@
+"""
+Downloaded PyPI metadata, kept two ways in one SQLite file
+
+- raw PyPI JSON, zlib compressed, so it can be re-processed without a re-crawl
+- normalized, indexed tables for easy query
+
+    packages     one row per package, latest release info & counts
+    releases     one row per (package, version)
+    classifiers  one row per (package, classifier)
+
+When the normalization below changes, bump NORMALIZER_VERSION and call
+reprocess(), rows from an older normalizer are rebuilt from stored JSON.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cheese_grader.utils import cache_folder, normalize_name
+
+NORMALIZER_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_json (
+    name TEXT PRIMARY KEY,
+    fetched REAL NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    version TEXT,
+    summary TEXT,
+    homepage TEXT,
+    license TEXT,
+    requires_python TEXT,
+    requires_dist TEXT,
+    maintainers TEXT,
+    maintainer_count INTEGER,
+    release_count INTEGER,
+    first_upload TEXT,
+    last_upload TEXT,
+    downloads INTEGER,
+    normalizer INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_last_upload ON packages (last_upload);
+CREATE INDEX IF NOT EXISTS packages_release_count ON packages (release_count);
+CREATE INDEX IF NOT EXISTS packages_downloads ON packages (downloads);
+CREATE TABLE IF NOT EXISTS releases (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    upload_time TEXT,
+    yanked INTEGER NOT NULL,
+    PRIMARY KEY (name, version)
+);
+CREATE INDEX IF NOT EXISTS releases_upload_time ON releases (upload_time);
+CREATE TABLE IF NOT EXISTS classifiers (
+    name TEXT NOT NULL,
+    classifier TEXT NOT NULL,
+    PRIMARY KEY (name, classifier)
+);
+CREATE INDEX IF NOT EXISTS classifiers_classifier ON classifiers (classifier);
+"""
+
+
+def _homepage(info: Dict[str, Any]) -> str:
+    """home_page is often blank, project_urls usually isn't"""
+    if info.get("home_page"):
+        return str(info["home_page"])
+    for key, value in (info.get("project_urls") or {}).items():
+        if key.lower() in ("homepage", "home", "home page", "source", "repository"):
+            return str(value)
+    return ""
+
+
+def maintainers(info: Dict[str, Any]) -> List[str]:
+    """Distinct people named as author or maintainer"""
+    people = []
+    for key in ("author", "author_email", "maintainer", "maintainer_email"):
+        for person in (info.get(key) or "").split(","):
+            person = person.strip()
+            if person and person.lower() not in [_.lower() for _ in people]:
+                people.append(person)
+    # an author & their email are one person
+    by_email = [_ for _ in people if "@" in _]
+    return by_email or people
+
+
+def normalize(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten PyPI JSON into package, release & classifier rows
+    """
+    info = metadata.get("info") or {}
+    name = normalize_name(info.get("name") or "")
+    releases = []
+    for version, files in (metadata.get("releases") or {}).items():
+        upload_times = sorted(
+            file.get("upload_time_iso_8601") or file.get("upload_time") or ""
+            for file in files
+        )
+        yanked = bool(files) and all(file.get("yanked") for file in files)
+        releases.append(
+            (name, version, upload_times[0] if upload_times else None, int(yanked))
+        )
+    uploads = sorted(release[2] for release in releases if release[2])
+    people = maintainers(info)
+    package = {
+        "name": name,
+        "version": info.get("version"),
+        "summary": info.get("summary"),
+        "homepage": _homepage(info),
+        "license": info.get("license"),
+        "requires_python": info.get("requires_python"),
+        "requires_dist": json.dumps(info.get("requires_dist") or []),
+        "maintainers": json.dumps(people),
+        "maintainer_count": len(people),
+        "release_count": len([_ for _ in releases if _[2]]),
+        "first_upload": uploads[0] if uploads else None,
+        "last_upload": uploads[-1] if uploads else None,
+        "normalizer": NORMALIZER_VERSION,
+    }
+    classifiers = [(name, classifier) for classifier in info.get("classifiers") or []]
+    return {"package": package, "releases": releases, "classifiers": classifiers}
+
+
+class MetadataStore:
+    """
+    Raw & normalized PyPI metadata in SQLite
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(cache_folder(), "metadata.sqlite")
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection with one transaction, rows as sqlite3.Row"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _write_normalized(
+        connection: sqlite3.Connection,
+        rows: Dict[str, Any],
+        downloads: Optional[int],
+    ) -> None:
+        """Replace all normalized rows for one package"""
+        package = dict(rows["package"])
+        name = package["name"]
+        if downloads is None:
+            # don't forget a count we already had
+            old = connection.execute(
+                "SELECT downloads FROM packages WHERE name = ?", (name,)
+            ).fetchone()
+            downloads = old[0] if old else None
+        package["downloads"] = downloads
+        columns = ", ".join(package)
+        marks = ", ".join(f":{column}" for column in package)
+        connection.execute(
+            f"INSERT OR REPLACE INTO packages ({columns}) VALUES ({marks})",  # nosec
+            package,
+        )
+        connection.execute("DELETE FROM releases WHERE name = ?", (name,))
+        connection.executemany(
+            "INSERT INTO releases VALUES (?, ?, ?, ?)", rows["releases"]
+        )
+        connection.execute("DELETE FROM classifiers WHERE name = ?", (name,))
+        connection.executemany(
+            "INSERT OR IGNORE INTO classifiers VALUES (?, ?)", rows["classifiers"]
+        )
+
+    def upsert_many(
+        self, records: Iterable[Tuple[Dict[str, Any], Optional[int]]]
+    ) -> int:
+        """
+        Store (PyPI JSON, download count) pairs in one transaction.
+
+        Download count can be None to keep what is already stored.
+        """
+        count = 0
+        with self.connect() as connection:
+            for metadata, downloads in records:
+                rows = normalize(metadata)
+                name = rows["package"]["name"]
+                if not name:
+                    continue
+                body = zlib.compress(json.dumps(metadata).encode("utf-8"))
+                connection.execute(
+                    "INSERT OR REPLACE INTO raw_json VALUES (?, ?, ?)",
+                    (name, time.time(), body),
+                )
+                self._write_normalized(connection, rows, downloads)
+                count += 1
+        return count
+
+    def set_downloads(self, counts: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Update download counts without touching the rest"""
+        with self.connect() as connection:
+            connection.executemany(
+                "UPDATE packages SET downloads = ? WHERE name = ?",
+                [(downloads, normalize_name(name)) for name, downloads in counts],
+            )
+
+    def raw(self, package: str) -> Optional[Dict[str, Any]]:
+        """Stored PyPI JSON for one package"""
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT body FROM raw_json WHERE name = ?", (normalize_name(package),)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def iter_raw(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every stored PyPI JSON, one at a time"""
+        with self.connect() as connection:
+            for name, body in connection.execute("SELECT name, body FROM raw_json"):
+                yield name, json.loads(zlib.decompress(body))
+
+    def reprocess(self, everything: bool = False) -> int:
+        """
+        Rebuild normalized rows from stored JSON, no network.
+
+        Only rows from an older normalizer unless everything is True.
+        """
+        count = 0
+        with self.connect() as connection:
+            query = (
+                "SELECT raw_json.name, raw_json.body FROM raw_json"
+                " LEFT JOIN packages ON packages.name = raw_json.name"
+            )
+            if not everything:
+                query += " WHERE packages.normalizer IS NULL OR packages.normalizer < ?"
+                cursor = connection.execute(query, (NORMALIZER_VERSION,))
+            else:
+                cursor = connection.execute(query)
+            for _, body in cursor.fetchall():
+                rows = normalize(json.loads(zlib.decompress(body)))
+                self._write_normalized(connection, rows, None)
+                count += 1
+        return count
+
+    def package(self, package: str) -> Optional[sqlite3.Row]:
+        """Normalized row for one package"""
+        with self.connect() as connection:
+            return connection.execute(
+                "SELECT * FROM packages WHERE name = ?", (normalize_name(package),)
+            ).fetchone()
+
+    def packages(self, names: Iterable[str]) -> Dict[str, sqlite3.Row]:
+        """Normalized rows for many packages, one query per 500 names"""
+        wanted = list(dict.fromkeys(normalize_name(name) for name in names))
+        found = {}
+        with self.connect() as connection:
+            for start in range(0, len(wanted), 500):
+                chunk = wanted[start : start + 500]
+                marks = ", ".join("?" for _ in chunk)
+                for row in connection.execute(
+                    f"SELECT * FROM packages WHERE name IN ({marks})", chunk  # nosec
+                ):
+                    found[row["name"]] = row
+        return found
+
+    def query(self, sql: str, parameters: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Ad hoc read only query against the normalized tables"""
+        with self.connect() as connection:
+            connection.execute("PRAGMA query_only = ON")
+            return connection.execute(sql, tuple(parameters)).fetchall()
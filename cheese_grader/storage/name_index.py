@@ -0,0 +1,235 @@
+"""
+Every PyPI project name, and which popular ones a name is a typo or two from.
+
+    index = NameIndex()
+    index.update(store.query("SELECT name, downloads FROM packages"))
+    index.save()
+    index.near("reqeusts")  # [NearName("requests", 1, 123456789)]
+
+All names are kept, but only the `popular` most downloaded ones are indexed
+for near matches, they are the ones worth squatting. Each popular name is
+stored under every string made by deleting up to max_distance characters
+from it (a symmetric delete index), so a lookup is one dict probe per
+deletion of the query, no scan. Candidates are then checked with an edit
+distance that counts a transposition as one edit. Two edits only count when
+both names have at least TWO_EDIT_MIN_LENGTH characters, two edits turn most
+short names into some other real package.
+
+On disk it is just the names & download counts, gzipped, the delete index
+is rebuilt in memory on first use. update() only touches the deletes of
+names that joined or left the popular set.
+"""
+import gzip
+import heapq
+import logging
+import os
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from cheese_grader.utils import cache_folder, normalize_name
+
+LOGGER = logging.getLogger(__name__)
+
+FILE_NAME = "pypi_names.tsv.gz"
+
+# Shortest name that is matched at more than one edit
+TWO_EDIT_MIN_LENGTH = 6
+
+
+class NearName(NamedTuple):
+    """A popular name close to the one asked about"""
+
+    name: str
+    distance: int
+    downloads: Optional[int]
+
+
+def deletes(name: str, max_distance: int) -> Set[str]:
+    """name & every string made by deleting up to max_distance characters"""
+    found = {name}
+    frontier = {name}
+    for _ in range(max_distance):
+        frontier = {
+            word[:index] + word[index + 1 :]
+            for word in frontier
+            for index in range(len(word))
+        }
+        found |= frontier
+    return found
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """
+    Optimal string alignment distance, limit + 1 if it is more than limit
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(second) + 1))
+    for row, left in enumerate(first, 1):
+        current = [row] + [0] * len(second)
+        for column, right in enumerate(second, 1):
+            cost = 0 if left == right else 1
+            current[column] = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + cost,
+            )
+            if (
+                before
+                and row > 1
+                and column > 1
+                and left == second[column - 2]
+                and first[row - 2] == right
+            ):
+                current[column] = min(current[column], before[column - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class NameIndex:
+    """
+    All names with download counts, delete index over the popular ones
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, popular: int = 5000, max_distance: int = 2
+    ) -> None:
+        self.path = path or os.path.join(cache_folder("names"), FILE_NAME)
+        self.popular_count = popular
+        self.max_distance = max_distance
+        self.names: Dict[str, Optional[int]] = {}
+        self.popular: Set[str] = set()
+        # delete -> one name, or a tuple of them, to keep small entries small
+        self._deletes: Optional[Dict[str, Union[str, Tuple[str, ...]]]] = None
+        if os.path.isfile(self.path):
+            self._load()
+
+    def _load(self) -> None:
+        """Read names & counts, a corrupt file is an empty index"""
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as file_handle:
+                for line in file_handle:
+                    name, _, downloads = line.rstrip("\n").partition("\t")
+                    self.names[name] = int(downloads) if downloads else None
+        except (OSError, ValueError, EOFError):
+            LOGGER.warning(f"Ignoring unreadable name index {self.path}")
+            self.names = {}
+        self.popular = self._most_popular()
+
+    def save(self) -> None:
+        """Write names & counts, replacing the old file in one step"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as file_handle:
+            for name in sorted(self.names):
+                downloads = self.names[name]
+                file_handle.write(f"{name}\t{'' if downloads is None else downloads}\n")
+        os.replace(temporary, self.path)
+
+    def _most_popular(self) -> Set[str]:
+        """Names with the most downloads, unknown counts never qualify"""
+        counted = [(count, name) for name, count in self.names.items() if count]
+        return {name for _, name in heapq.nlargest(self.popular_count, counted)}
+
+    def _add(self, name: str) -> None:
+        """Index the deletes of one popular name"""
+        assert self._deletes is not None
+        for key in deletes(name, self.max_distance):
+            entry = self._deletes.get(key)
+            if entry is None:
+                self._deletes[key] = name
+            elif isinstance(entry, str):
+                if entry != name:
+                    self._deletes[key] = (entry, name)
+            elif name not in entry:
+                self._deletes[key] = entry + (name,)
+
+    def _remove(self, name: str) -> None:
+        """Un-index a name that isn't popular any more"""
+        assert self._deletes is not None
+        for key in deletes(name, self.max_distance):
+            entry = self._deletes.get(key)
+            if entry == name:
+                del self._deletes[key]
+            elif isinstance(entry, tuple) and name in entry:
+                rest = tuple(_ for _ in entry if _ != name)
+                self._deletes[key] = rest[0] if len(rest) == 1 else rest
+
+    def _index(self) -> Dict[str, Union[str, Tuple[str, ...]]]:
+        """Delete index, built on first use"""
+        if self._deletes is None:
+            self._deletes = {}
+            for name in self.popular:
+                self._add(name)
+        return self._deletes
+
+    def update(self, snapshot: Iterable[Tuple[str, Optional[int]]]) -> int:
+        """
+        Merge (name, downloads) pairs, e.g. from the metadata store.
+
+        A None count keeps any count already known. Returns how many names
+        are new or changed.
+        """
+        changed = 0
+        for raw_name, downloads in snapshot:
+            name = normalize_name(raw_name)
+            if downloads is None and self.names.get(name) is not None:
+                continue
+            if name not in self.names or self.names[name] != downloads:
+                self.names[name] = downloads
+                changed += 1
+        if not changed:
+            return 0
+        popular = self._most_popular()
+        if self._deletes is not None:
+            for name in self.popular - popular:
+                self._remove(name)
+            for name in popular - self.popular:
+                self._add(name)
+        self.popular = popular
+        return changed
+
+    def exists(self, name: str) -> bool:
+        """Is this a known project name"""
+        return normalize_name(name) in self.names
+
+    def near(
+        self, name: str, max_distance: Optional[int] = None, limit: int = 10
+    ) -> List[NearName]:
+        """Popular names within max_distance edits, closest & most popular first"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        max_distance = min(max_distance, self.max_distance)
+        query = normalize_name(name)
+        index = self._index()
+        candidates: Set[str] = set()
+        for key in deletes(query, max_distance):
+            entry = index.get(key)
+            if entry is None:
+                continue
+            if isinstance(entry, str):
+                candidates.add(entry)
+            else:
+                candidates.update(entry)
+        candidates.discard(query)
+
+        found = []
+        for candidate in candidates:
+            allowed = max_distance
+            if min(len(query), len(candidate)) < TWO_EDIT_MIN_LENGTH:
+                allowed = min(allowed, 1)
+            distance = edit_distance(query, candidate, allowed)
+            if distance <= allowed:
+                found.append(NearName(candidate, distance, self.names.get(candidate)))
+        found.sort(key=lambda _: (_.distance, -(_.downloads or 0), _.name))
+        return found[:limit]
@@ -0,0 +1,147 @@
+"""
+Finished grades and per signal results, so re-grading the same lockfile
+re-runs only what changed.
+
+A signal result is keyed by
+
+    (normalized name, version, artifact digest, evaluator)
+
+and stored with the hash of the evaluator's name, version & dependencies.
+A stored result is used only while that hash still matches, so bumping one
+evaluator's version throws away that evaluator's results and nothing else.
+
+The total is cheap, it is always recomputed from the (cached or fresh)
+signals. The last total is kept too, keyed by the hash of the whole rule
+set, for reports that want a score without running anything.
+"""
+import contextlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from cheese_grader.utils import cache_folder, normalize_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    evaluator TEXT NOT NULL,
+    evaluator_hash TEXT NOT NULL,
+    score REAL,
+    reason TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    stored REAL NOT NULL,
+    PRIMARY KEY (name, version, digest, evaluator)
+);
+CREATE TABLE IF NOT EXISTS grades (
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    score REAL,
+    decision TEXT NOT NULL,
+    stored REAL NOT NULL,
+    PRIMARY KEY (name, version, digest)
+);
+"""
+
+
+class CachedSignal(NamedTuple):
+    """
+    One stored signal result
+    """
+
+    evaluator_hash: str
+    score: Optional[float]
+    reason: str
+    decision: str
+
+
+class ScoreCache:
+    """
+    SQLite store of signal results & totals
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(cache_folder(), "scores.sqlite")
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One short lived connection per call, safe across threads & processes"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def signals(self, name: str, version: str, digest: str) -> Dict[str, CachedSignal]:
+        """Every stored signal for one artifact, evaluator name -> result"""
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT evaluator, evaluator_hash, score, reason, decision"
+                " FROM signals WHERE name = ? AND version = ? AND digest = ?",
+                (normalize_name(name), version, digest),
+            ).fetchall()
+        return {row[0]: CachedSignal(*row[1:]) for row in rows}
+
+    def put_signals(
+        self,
+        name: str,
+        version: str,
+        digest: str,
+        results: Iterable[Tuple[str, CachedSignal]],
+    ) -> None:
+        """Store (evaluator name, result) pairs in one transaction"""
+        now = time.time()
+        name = normalize_name(name)
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (name, version, digest, evaluator) + tuple(result) + (now,)
+                    for evaluator, result in results
+                ],
+            )
+
+    def grade(
+        self, name: str, version: str, digest: str, ruleset: str
+    ) -> Optional[Tuple[Optional[float], str]]:
+        """(score, decision) last stored for this rule set, None if none"""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT score, decision FROM grades WHERE name = ? AND version = ?"
+                " AND digest = ? AND ruleset = ?",
+                (normalize_name(name), version, digest, ruleset),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    # pylint: disable=too-many-arguments
+    def put_grade(
+        self,
+        name: str,
+        version: str,
+        digest: str,
+        ruleset: str,
+        score: Optional[float],
+        decision: str,
+    ) -> None:
+        """Remember the total"""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO grades VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_name(name),
+                    version,
+                    digest,
+                    ruleset,
+                    score,
+                    decision,
+                    time.time(),
+                ),
+            )
@@ -0,0 +1,164 @@
+"""
+Is it even valid 3.x? In process, no compileall, no .pyc files written.
+
+Each file is parsed once with the running interpreter's grammar, compiled
+(no bytecode is written, this catches `return` outside a function and the
+like) and then re-parsed with older feature_version grammars to find the
+oldest 3.x that accepts it.
+
+    results = check_files(paths)
+    summary = summarize(results)
+    summary.minimum  # (3, 8) means 3.8+ syntax is used somewhere
+
+feature_version is best effort in CPython, it knows about async, walrus,
+positional only parameters, match etc, but not every grammar change.
+
+Large batches are spread over a process pool, small ones aren't worth the
+pool start up.
+"""
+import ast
+import concurrent.futures
+import os
+import sys
+import warnings
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cheese_grader.archives import ArchiveTree
+
+# Oldest grammar ast.parse(feature_version=...) accepts
+OLDEST_MINOR = 4
+CURRENT = sys.version_info[:2]
+
+# Below this many files, a process pool costs more than it saves
+POOL_THRESHOLD = 200
+CHUNK_SIZE = 64
+
+
+class FileSyntax(NamedTuple):
+    """Result for one file"""
+
+    name: str
+    valid: bool
+    # oldest (3, minor) that parses it, None if invalid
+    minimum: Optional[Tuple[int, int]] = None
+    error: str = ""
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+
+class SyntaxSummary(NamedTuple):
+    """Result for many files"""
+
+    files: int
+    valid: int
+    # oldest 3.x that parses every valid file
+    minimum: Optional[Tuple[int, int]]
+    errors: List[FileSyntax]
+
+
+def _minimum(source: bytes, name: str) -> Tuple[int, int]:
+    """Oldest grammar that parses source already known to parse today"""
+    for minor in range(OLDEST_MINOR, CURRENT[1]):
+        try:
+            ast.parse(source, name, feature_version=(3, minor))
+        except (SyntaxError, ValueError):
+            continue
+        return (3, minor)
+    return CURRENT
+
+
+def parse_source(
+    source: bytes, name: str = "<unknown>"
+) -> Tuple[Optional[ast.Module], FileSyntax]:
+    """Parse & compile one module's source, the tree too if it is valid"""
+    with warnings.catch_warnings():
+        # invalid escape sequences etc. are not syntax errors
+        warnings.simplefilter("ignore")
+        try:
+            tree = ast.parse(source, name)
+            compile(tree, name, "exec", dont_inherit=True)
+        except SyntaxError as error:
+            return None, FileSyntax(
+                name, False, None, str(error.msg), error.lineno, error.offset
+            )
+        except (ValueError, RecursionError, MemoryError) as error:
+            # null bytes, absurd nesting
+            message = f"{type(error).__name__}: {error}"
+            return None, FileSyntax(name, False, None, message)
+        return tree, FileSyntax(name, True, _minimum(source, name))
+
+
+def check_source(source: bytes, name: str = "<unknown>") -> FileSyntax:
+    """Parse & compile one module's source"""
+    return parse_source(source, name)[1]
+
+
+def check_file(path: str) -> FileSyntax:
+    """Parse & compile one file"""
+    try:
+        with open(path, "rb") as file_handle:
+            source = file_handle.read()
+    except OSError as error:
+        return FileSyntax(path, False, None, str(error))
+    return check_source(source, path)
+
+
+def _check_pair(pair: Tuple[str, bytes]) -> FileSyntax:
+    """Pool friendly check_source"""
+    return check_source(pair[1], pair[0])
+
+
+def _pool_size(count: int, workers: Optional[int]) -> int:
+    """0 means do it in this process"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or count < POOL_THRESHOLD:
+        return 0
+    return workers
+
+
+def check_files(paths: List[str], workers: Optional[int] = None) -> List[FileSyntax]:
+    """Check many files, across all cores if there are enough of them"""
+    pool_size = _pool_size(len(paths), workers)
+    if not pool_size:
+        return [check_file(path) for path in paths]
+    with concurrent.futures.ProcessPoolExecutor(pool_size) as pool:
+        return list(pool.map(check_file, paths, chunksize=CHUNK_SIZE))
+
+
+def check_sources(
+    sources: Iterable[Tuple[str, bytes]], workers: Optional[int] = None
+) -> List[FileSyntax]:
+    """Check (name, source) pairs, e.g. ArchiveTree.walk()"""
+    pairs = list(sources)
+    pool_size = _pool_size(len(pairs), workers)
+    if not pool_size:
+        return [_check_pair(pair) for pair in pairs]
+    with concurrent.futures.ProcessPoolExecutor(pool_size) as pool:
+        return list(pool.map(_check_pair, pairs, chunksize=CHUNK_SIZE))
+
+
+def check_archive(tree: ArchiveTree, workers: Optional[int] = None) -> List[FileSyntax]:
+    """Check every .py file in an sdist or wheel without extracting it"""
+    return check_sources(tree.walk(lambda name: name.endswith(".py")), workers)
+
+
+def summarize(results: List[FileSyntax]) -> SyntaxSummary:
+    """Counts & overall minimum version"""
+    valid = [_ for _ in results if _.valid]
+    minimums = [_.minimum for _ in valid if _.minimum]
+    return SyntaxSummary(
+        files=len(results),
+        valid=len(valid),
+        minimum=max(minimums) if minimums else None,
+        errors=[_ for _ in results if not _.valid],
+    )
+
+
+def errors_by_file(results: List[FileSyntax]) -> Dict[str, str]:
+    """name -> 'line:column message' for reports"""
+    return {
+        _.name: f"{_.line or 0}:{_.column or 0} {_.error}"
+        for _ in results
+        if not _.valid
+    }
@@ -0,0 +1,328 @@
+"""
+Python 2 only, Python 3 only, or both? From tokens, without a 2to3 run.
+
+Looks for syntax only one of them accepts:
+
+- py2: print & exec statements, `except X, e`, `raise E, "message"`,
+  backticks, `<>`, ur'' literals, 0777 octals, 10L longs
+- py3: f-strings, nonlocal, `->`, `:=`, `yield from`, `raise ... from`,
+  async def/for/with, keyword only arguments, non ascii names
+
+One such token is conclusive (the other interpreter can't even parse the
+file), so by default a file is abandoned at the first one. Weaker hints
+(xrange, iteritems, `from __future__`, six) only matter if there's nothing
+conclusive, and if those leave it unsure, lib2to3 is asked, dry run, in
+process, with fixers that only fire on py2-only code.
+"""
+import io
+import re
+import tokenize
+import warnings
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+PY2 = "py2"
+PY3 = "py3"
+POLYGLOT = "polyglot"
+UNKNOWN = "unknown"
+
+# Below this, a file's classification is a guess, worth a 2to3 dry run
+UNSURE = 0.6
+
+OCTAL = re.compile(r"^0\d*[1-9]\d*$")
+
+# String literals & comments, blanked out before looking for backticks & <>
+# in source the tokenizer gave up on
+STRINGS_AND_COMMENTS = re.compile(
+    r'"""(?:\\[\s\S]|[\s\S])*?"""|' r"'''(?:\\[\s\S]|[\s\S])*?'''|"
+    r'"(?:\\.|[^"\\\n])*"|' r"'(?:\\.|[^'\\\n])*'|#.*"
+)
+
+# Names that are only builtins or dict methods in python 2. Could be
+# polyglot code with its own definitions, so only a hint.
+PY2_NAMES = {
+    "xrange",
+    "basestring",
+    "raw_input",
+    "unichr",
+    "execfile",
+    "iteritems",
+    "itervalues",
+    "iterkeys",
+    "has_key",
+    "StandardError",
+}
+
+POLYGLOT_NAMES = {"six", "PY2", "PY3", "version_info", "__future__", "future"}
+
+# 2to3 fixers that don't touch code that is already valid python 3
+PY2_ONLY_FIXERS = [
+    f"lib2to3.fixes.fix_{name}"
+    for name in [
+        "apply",
+        "basestring",
+        "except",
+        "exec",
+        "execfile",
+        "has_key",
+        "long",
+        "ne",
+        "numliterals",
+        "raise",
+        "raw_input",
+        "repr",
+        "standarderror",
+        "tuple_params",
+        "xrange",
+    ]
+]
+
+_STATEMENT_START = {
+    tokenize.NEWLINE,
+    tokenize.NL,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENCODING,
+}
+_SKIP = {tokenize.COMMENT, tokenize.NL}
+
+
+class Classification(NamedTuple):
+    """Verdict for a file or a package"""
+
+    kind: str
+    confidence: float
+    evidence: List[str]
+
+
+def _adjacent(first: tokenize.TokenInfo, second: tokenize.TokenInfo) -> bool:
+    """No space between two tokens"""
+    return first.end == second.start
+
+
+def _py2_characters(source: bytes) -> List[str]:
+    """
+    Backticks & <> outside strings and comments. Python 3.12+ tokenizes
+    with the real tokenizer, which raises on these instead of yielding them.
+    """
+    text = STRINGS_AND_COMMENTS.sub(
+        lambda match: re.sub(r"[^\n]", " ", match.group()),
+        source.decode("utf-8", errors="replace"),
+    )
+    found = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if "`" in line:
+            found.append(f"backticks (line {number})")
+        if "<>" in line:
+            found.append(f"<> operator (line {number})")
+    return found
+
+
+def _scan(
+    source: bytes, stop_early: bool = True
+) -> Tuple[List[str], List[str], Set[str], Set[str], bool]:
+    """
+    py2 syntax, py3 syntax, py2 names & polyglot names seen,
+    and whether tokenizing got to the end
+    """
+    py2: List[str] = []
+    py3: List[str] = []
+    py2_names: Set[str] = set()
+    polyglot_names: Set[str] = set()
+    tokens: List[tokenize.TokenInfo] = []
+    # keyword that started the statement being looked at, & bracket depth
+    statement = ""
+    depth = 0
+    fstring_start = getattr(tokenize, "FSTRING_START", None)
+    try:
+        for token in tokenize.tokenize(io.BytesIO(source).readline):
+            if token.type in _SKIP:
+                continue
+            previous = tokens[-1] if tokens else None
+            next_to_previous = previous is not None and _adjacent(previous, token)
+            at_start = previous is None or (
+                previous.type in _STATEMENT_START
+                or previous.string in (";", ":")
+                and depth == 0
+            )
+            line = token.start[0]
+            tokens.append(token)
+            if token.type == tokenize.NEWLINE:
+                statement = ""
+                depth = 0
+                continue
+            text = token.string
+            if token.type == tokenize.OP and text in "([{":
+                depth += 1
+            elif token.type == tokenize.OP and text in ")]}":
+                depth = max(0, depth - 1)
+
+            found2 = ""
+            found3 = ""
+            if token.type == tokenize.NAME:
+                if at_start and text in ("except", "raise", "def", "print", "exec"):
+                    statement = text
+                if text in PY2_NAMES:
+                    py2_names.add(text)
+                elif text in POLYGLOT_NAMES:
+                    polyglot_names.add(text)
+                if not text.isascii():
+                    found3 = "non ascii name"
+                elif text == "nonlocal" and at_start:
+                    found3 = "nonlocal"
+                elif text in ("def", "for", "with") and previous:
+                    if previous.string == "async" and previous.type == tokenize.NAME:
+                        found3 = f"async {text}"
+                elif text == "from" and previous and previous.string == "yield":
+                    found3 = "yield from"
+                elif text == "from" and statement == "raise" and depth == 0:
+                    found3 = "raise ... from"
+                elif text in ("L", "l") and previous and next_to_previous:
+                    if previous.type == tokenize.NUMBER:
+                        found2 = "long literal"
+            if previous is not None and previous.type == tokenize.NAME:
+                if previous.string == statement and statement in ("print", "exec"):
+                    if token.type in (tokenize.STRING, tokenize.NAME, tokenize.NUMBER):
+                        found2 = f"{statement} statement"
+                    elif text == ">>":
+                        found2 = "print >>"
+                if previous.string.lower() == "ur" and token.type == tokenize.STRING:
+                    if next_to_previous:
+                        found2 = "ur'' literal"
+
+            if token.type == tokenize.STRING or token.type == fstring_start:
+                prefix = text[: len(text) - len(text.lstrip("rRbBuUfF"))]
+                if "f" in prefix.lower():
+                    found3 = "f-string"
+            elif token.type == tokenize.NUMBER:
+                if OCTAL.match(text):
+                    found2 = "0777 octal"
+                elif previous and previous.type == tokenize.NUMBER:
+                    if previous.string == "0" and next_to_previous:
+                        found2 = "0777 octal"
+            elif text == "`":
+                # ERRORTOKEN before 3.12, OP from 3.13, TokenError in 3.12
+                found2 = "backticks"
+            elif token.type == tokenize.OP:
+                if text == "->":
+                    found3 = "-> annotation"
+                elif text == ":=":
+                    found3 = ":= assignment"
+                elif text == "<>":
+                    found2 = "<> operator"
+                elif text == ">" and previous and previous.string == "<":
+                    if next_to_previous:
+                        found2 = "<> operator"
+                elif text == "," and depth == 0 and statement in ("except", "raise"):
+                    found2 = f"{statement} X, y"
+                    statement = ""
+                elif text == "," and statement == "def" and previous:
+                    if previous.string == "*" and depth == 1:
+                        found3 = "keyword only arguments"
+
+            if found2:
+                py2.append(f"{found2} (line {line})")
+            if found3:
+                py3.append(f"{found3} (line {line})")
+            if stop_early and (py2 or py3):
+                return py2, py3, py2_names, polyglot_names, True
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        if not py2:
+            py2.extend(_py2_characters(source))
+        return py2, py3, py2_names, polyglot_names, False
+    return py2, py3, py2_names, polyglot_names, True
+
+
+def classify_source(source: bytes, stop_early: bool = True) -> Classification:
+    """Classify one file from its tokens"""
+    py2, py3, py2_names, polyglot_names, finished = _scan(source, stop_early)
+    if py2 and py3:
+        return Classification(UNKNOWN, 0.0, py2 + py3)
+    if py2:
+        return Classification(PY2, 1.0, py2)
+    if py3:
+        return Classification(PY3, 1.0, py3)
+    if not finished:
+        return Classification(UNKNOWN, 0.0, ["could not tokenize"])
+    if polyglot_names:
+        return Classification(POLYGLOT, 0.8, sorted(polyglot_names))
+    if py2_names:
+        return Classification(PY2, min(0.5, 0.2 * len(py2_names)), sorted(py2_names))
+    return Classification(POLYGLOT, UNSURE, ["nothing version specific"])
+
+
+def two_to_three_changes(source: str, name: str = "<unknown>") -> Optional[bool]:
+    """
+    Would 2to3 change anything? Dry run, nothing is written.
+
+    None if lib2to3 is gone (python 3.13+) or can't parse the file.
+    """
+    # pylint: disable=import-outside-toplevel
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            from lib2to3.refactor import RefactoringTool
+        except ImportError:
+            return None
+        tool = RefactoringTool(PY2_ONLY_FIXERS, {"print_function": True})
+        if not source.endswith("\n"):
+            source += "\n"
+        try:
+            return str(tool.refactor_string(source, name)) != source
+        except Exception:  # pylint: disable=broad-except
+            # lib2to3.pgen2.parse.ParseError and friends
+            return None
+
+
+def classify_file(
+    name: str, source: bytes, fallback: bool = True
+) -> Classification:
+    """Tokens first, 2to3 dry run only if the tokens leave it unsure"""
+    result = classify_source(source)
+    if not fallback or result.confidence > UNSURE:
+        return result
+    if result.kind == POLYGLOT and result.evidence == ["nothing version specific"]:
+        # nothing to say either way, 2to3 won't find anything either
+        return result
+    changes = two_to_three_changes(source.decode("utf-8", errors="replace"), name)
+    if changes is None:
+        return result
+    if changes:
+        return Classification(PY2, 0.8, result.evidence + ["2to3 would change it"])
+    return Classification(POLYGLOT, 0.7, result.evidence + ["2to3 has no changes"])
+
+
+def classify_files(
+    sources: Iterable[Tuple[str, bytes]], fallback: bool = True, enough: int = 5
+) -> Tuple[Classification, Dict[str, Classification]]:
+    """
+    Package verdict & per file results
+
+    Stops reading files once `enough` files are conclusively one kind and
+    none are conclusively the other.
+    """
+    files: Dict[str, Classification] = {}
+    conclusive = {PY2: 0, PY3: 0}
+    for name, source in sources:
+        files[name] = classify_file(name, source, fallback)
+        if files[name].confidence >= 1.0 and files[name].kind in conclusive:
+            conclusive[files[name].kind] += 1
+            if min(conclusive.values()) == 0 and max(conclusive.values()) >= enough:
+                break
+
+    if not files:
+        return Classification(UNKNOWN, 0.0, ["no python files"]), files
+    py2 = [_ for _ in files.values() if _.kind == PY2]
+    py3 = [_ for _ in files.values() if _.kind == PY3]
+    if conclusive[PY2] and conclusive[PY3]:
+        # leftover py2 scripts in a py3 package, or the other way round
+        kind = PY2 if conclusive[PY2] > conclusive[PY3] else PY3
+        share = max(conclusive.values()) / sum(conclusive.values())
+        evidence = [f"{len(py2)} py2 files, {len(py3)} py3 files"]
+        return Classification(kind, share, evidence), files
+    for kind, found in ((PY3, py3), (PY2, py2)):
+        if found:
+            best = max(found, key=lambda _: _.confidence)
+            return Classification(kind, best.confidence, best.evidence), files
+    confidence = max(_.confidence for _ in files.values())
+    evidence = ["nothing only one version accepts"]
+    return Classification(POLYGLOT, confidence, evidence), files
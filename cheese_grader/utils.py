@@ -0,0 +1,35 @@
+"""
+Small helpers shared by the api clients, stores and signals
+"""
+import os
+import re
+import sys
+
+NORMALIZE_PATTERN = re.compile(r"[-_.]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    PEP 503 name, so Foo_Bar, foo.bar and foo-bar are one package
+    """
+    return NORMALIZE_PATTERN.sub("-", name.strip()).lower()
+
+
+def cache_folder(*parts: str) -> str:
+    """
+    Folder in the user cache dir, created if missing.
+
+    CHEESE_GRADER_CACHE overrides the location.
+    """
+    root = os.environ.get("CHEESE_GRADER_CACHE")
+    if not root:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        elif sys.platform == "darwin":
+            base = os.path.expanduser("~/Library/Caches")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        root = os.path.join(base, "cheese_grader")
+    folder = os.path.join(root, *parts)
+    os.makedirs(folder, exist_ok=True)
+    return folder
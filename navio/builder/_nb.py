@@ -14,6 +14,7 @@ import re
 import imp
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # import sh
 import json
@@ -64,12 +65,12 @@ def build(args):
     if args.list_tasks:
         print_tasks(module, args.file)
     elif not args.tasks:
-        if not _run_default_task(module):
+        if not _run_default_task(module, args.jobs):
             parser.print_help()
             print("\n")
             print_tasks(module, args.file)
     else:
-        _run_from_task_names(module, args.tasks)
+        _run_from_task_names(module, args.tasks, args.jobs)
 
 
 def print_tasks(module, file):
@@ -107,23 +108,32 @@ def _get_default_task(module):
         return matching_tasks[0]
 
 
-def _run_default_task(module):
+def _run_default_task(module, jobs=1):
     default_task = _get_default_task(module)
     if not default_task:
         return False
-    _run(module, _get_logger(module), default_task, set())
+    if jobs > 1:
+        _run_parallel(module, _get_logger(module), [(default_task, [], {})], jobs)
+    else:
+        _run(module, _get_logger(module), default_task, set())
     return True
 
 
-def _run_from_task_names(module, task_names):
+def _run_from_task_names(module, task_names, jobs=1):
     """
     @type module: module
     @type task_name: string
     @param task_name: Task name, exactly corresponds to function name.
+    @type jobs: int
+    @param jobs: Number of tasks that may run at the same time.
     """
     # Create logger.
     logger = _get_logger(module)
     all_tasks = _get_tasks(module)
+    if jobs > 1:
+        requested = [_get_task(module, name, all_tasks) for name in task_names]
+        _run_parallel(module, logger, requested, jobs)
+        return
     completed_tasks = set()
     for task_name in task_names:
         task, args, kwargs = _get_task(module, task_name, all_tasks)
@@ -202,38 +212,201 @@ def _run(
 
     # Perform current task, if need to.
     if from_command_line or task not in completed_tasks:
+        _execute(module, logger, task, args, kwargs)
+        completed_tasks.add(task)
 
-        if task.ignored:
+    return completed_tasks
 
-            logger.info('Ignoring task "%s"' % task.name)
 
-        else:
+def _execute(module, logger, task, args=None, kwargs=None):
+    """
+    Run a single task, without its dependencies, and log how long it took.
 
-            logger.info('Starting task "{}{}"'.format(task.name, str(args or [])))
-
-            try:
-                # Run task.
-                startTime = int(round(time.time() * 1000))
-                task(*(args or []), **(kwargs or {}))
-                stopTime = int(round(time.time() * 1000))
-            except Exception:
-                stopTime = int(round(time.time() * 1000))
-                logger.critical(
-                    'Error in task "%s". Time: %s sec'
-                    % (task.name, (float(stopTime) - startTime) / 1000)
-                )
-                logger.critical(
-                    "Aborting build for %s" % os.path.abspath(module.__file__)
-                )
-                raise
+    @type module: module
+    @type logging: Logger
+    @type task: Task
+    """
+    if task.ignored:
+
+        logger.info('Ignoring task "%s"' % task.name)
 
-            logger.info(
-                'Completed task "%s". Time: %s sec'
+    else:
+
+        logger.info('Starting task "{}{}"'.format(task.name, str(args or [])))
+
+        try:
+            # Run task.
+            startTime = int(round(time.time() * 1000))
+            task(*(args or []), **(kwargs or {}))
+            stopTime = int(round(time.time() * 1000))
+        except Exception:
+            stopTime = int(round(time.time() * 1000))
+            logger.critical(
+                'Error in task "%s". Time: %s sec'
                 % (task.name, (float(stopTime) - startTime) / 1000)
             )
+            logger.critical("Aborting build for %s" % os.path.abspath(module.__file__))
+            raise
 
-        completed_tasks.add(task)
+        logger.info(
+            'Completed task "%s". Time: %s sec'
+            % (task.name, (float(stopTime) - startTime) / 1000)
+        )
+
+
+def _build_graph(requested):
+    """
+    Collect the requested tasks and everything they depend on.
+
+    Tasks marked @task(mutates=True) change files other tasks read, so each
+    one runs alone: after everything it depends on, and before every task
+    that isn't one of its dependencies.
+
+    @type requested: list of (Task, args, kwargs)
+    @rtype: dict Task -> set Task
+    @return: Each task mapped to the tasks it must wait for.
+    """
+    graph = {}
+    pending = [task for task, _, _ in requested]
+    while pending:
+        task = pending.pop()
+        if task in graph:
+            continue
+        graph[task] = set(task.dependencies)
+        pending.extend(task.dependencies)
+
+    # Fail before anything runs rather than deadlock half way through.
+    visiting, done = set(), set()
+
+    def visit(task, chain):
+        if task in done:
+            return
+        if task in visiting:
+            raise Exception(
+                "Circular dependency %s"
+                % " -> ".join(node.name for node in chain + [task])
+            )
+        visiting.add(task)
+        for dependency in graph[task]:
+            visit(dependency, chain + [task])
+        visiting.remove(task)
+        done.add(task)
+
+    for task in graph:
+        visit(task, [])
+    _serialize_mutating(graph)
+    return graph
+
+
+def _ancestors(graph, task):
+    """
+    Everything task waits for, directly or not.
+
+    @type graph: dict Task -> set Task
+    @rtype: set Task
+    """
+    found = set()
+    pending = list(graph[task])
+    while pending:
+        dependency = pending.pop()
+        if dependency not in found:
+            found.add(dependency)
+            pending.extend(graph[dependency])
+    return found
+
+
+def _serialize_mutating(graph):
+    """
+    Make every task not needed by a mutating task wait for it, one mutating
+    task at a time, in dependency then name order. Edges are only added from
+    tasks that aren't ancestors of the mutating task, so no cycles.
 
+    @type graph: dict Task -> set Task
+    """
+    order = []
+    placed = set()
+
+    def place(task):
+        if task in placed:
+            return
+        placed.add(task)
+        for dependency in sorted(graph[task], key=lambda task: task.name):
+            place(dependency)
+        order.append(task)
+
+    for task in sorted(graph, key=lambda task: task.name):
+        place(task)
+
+    for mutating in [task for task in order if task.mutates]:
+        before = _ancestors(graph, mutating)
+        for task in graph:
+            if task is not mutating and task not in before:
+                graph[task].add(mutating)
+
+
+def _run_parallel(module, logger, requested, jobs):
+    """
+    Run the requested tasks and all their dependencies on a pool of workers.
+    A task starts as soon as everything it depends on has completed and each
+    task is performed exactly once, even if it is named more than once.
+
+    Workers are threads, tasks are expected to spend their time waiting on
+    the tools they shell out to.
+
+    @type module: module
+    @type logging: Logger
+    @type requested: list of (Task, args, kwargs)
+    @type jobs: int
+    @rtype: set Task
+    @return: Set of completed tasks.
+    """
+    arguments = {}
+    for task, args, kwargs in requested:
+        arguments.setdefault(task, (args, kwargs))
+    graph = _build_graph(requested)
+
+    waiting_on = {task: set(dependencies) for task, dependencies in graph.items()}
+    dependents = {task: set() for task in graph}
+    for task, dependencies in graph.items():
+        for dependency in dependencies:
+            dependents[dependency].add(task)
+
+    ready = [task for task, dependencies in waiting_on.items() if not dependencies]
+    completed_tasks = set()
+    running = {}
+    failure = None
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while ready or running:
+            if failure is None:
+                # Name order keeps the start order stable between runs.
+                for task in sorted(ready, key=lambda task: task.name):
+                    args, kwargs = arguments.get(task, (None, None))
+                    future = executor.submit(
+                        _execute, module, logger, task, args, kwargs
+                    )
+                    running[future] = task
+            ready = []
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                # BaseException, tasks are allowed to sys.exit()
+                try:
+                    future.result()
+                except BaseException as ex:  # noqa: B001
+                    if failure is None:
+                        failure = ex
+                    continue
+                completed_tasks.add(task)
+                for dependent in dependents[task]:
+                    waiting_on[dependent].discard(task)
+                    if not waiting_on[dependent]:
+                        ready.append(dependent)
+
+    if failure is not None:
+        raise failure
     return completed_tasks
 
 
@@ -269,6 +442,18 @@ def _create_parser():
         default="build.py",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=(
+            "Run up to this many independent tasks at the same time. "
+            "Each task still runs only once and only after its dependencies"
+        ),
+        metavar="N",
+        type=int,
+        default=1,
+    )
+
     return parser
 
 
@@ -308,6 +493,8 @@ class Task:
         self.doc = inspect.getdoc(func) or ""
         self.dependencies = dependencies
         self.ignored = bool(options.get("ignore", False))
+        # changes files other tasks read, never run alongside other tasks
+        self.mutates = bool(options.get("mutates", False))
 
     def __call__(self, *args, **kwargs):
         self.func.__call__(*args, **kwargs)
@@ -0,0 +1,39 @@
+import time
+
+from navio.builder import task
+
+tasks_run = []
+
+
+@task()
+def clean():
+    tasks_run.append("clean")
+
+
+@task(clean)
+def lint():
+    time.sleep(0.05)
+    tasks_run.append("lint")
+
+
+@task(clean)
+def tests():
+    time.sleep(0.05)
+    tasks_run.append("tests")
+
+
+@task(lint, mutates=True)
+def formatting():
+    "Changes source, so nothing else may run meanwhile."
+    time.sleep(0.05)
+    tasks_run.append("formatting")
+
+
+@task(mutates=True)
+def jiggle_version():
+    tasks_run.append("jiggle_version")
+
+
+@task(tests, lint, formatting, jiggle_version)
+def package():
+    tasks_run.append("package")
@@ -352,3 +352,57 @@ class TestPushd:
 
         with pushd("."):
             pass
+
+
+class TestParallelJobs:
+    def setup_method(self, method):
+        from .build_scripts import build_with_params
+
+        self._mod = build_with_params
+
+    def test_parsing_jobs(self):
+        assert 1 == _nb._create_parser().parse_args([]).jobs
+        assert 4 == _nb._create_parser().parse_args(["-j", "4"]).jobs
+        assert 4 == _nb._create_parser().parse_args(["--jobs", "4"]).jobs
+
+    def test_shared_dependency_is_run_only_once(self):
+        mod = build(self._mod, ["-j", "4", "html", "start_server[8080]", "co[a,b]"])
+        assert "clean[/tmp]" == mod.tasks_run[0]
+        assert sorted(
+            ["clean[/tmp]", "html", "start_server[8080,True]", "copy_file[a,b,True]"]
+        ) == sorted(mod.tasks_run)
+
+    def test_ignored_tasks(self):
+        from .build_scripts import options as module
+
+        module = build(module, ["-j", "3", "android"])
+        assert ["clean", "html", "android"] == module.tasks_run
+
+    def test_stop_on_exception(self):
+        from .build_scripts import runtime_error as re
+
+        with pytest.raises(IOError):
+            build(re, ["-j", "2", "android"])
+        mod = simulate_dynamic_module_load(re)
+        assert mod.ran_images
+        assert not hasattr(mod, "ran_android")
+
+    def test_default_task(self):
+        from .build_scripts import default_task_and_import_dependencies
+
+        mod = build(default_task_and_import_dependencies, ["-j", "2"])
+        assert "task_with_imported_dependencies" in mod.tasks_run
+
+    def test_mutating_tasks_run_alone_and_first(self):
+        from .build_scripts import mutating
+
+        mod = build(mutating, ["-j", "4", "package"])
+        # lint is needed by formatting, so it goes first, tests has to wait
+        assert [
+            "clean",
+            "lint",
+            "formatting",
+            "jiggle_version",
+            "tests",
+            "package",
+        ] == mod.tasks_run
@@ -9,27 +9,31 @@ Strategies
 - file changed
 - list of files changed
 
+Source tree hashes come from an incremental per file index, see source_index.py
+
+Each skip_if_no_change task also remembers the file digests it last succeeded
+against, so tools that work file by file can be handed just the delta.
+
 Is it worse is lint counting. Move to different module?
 """
 import functools
 import hashlib
+import json
 import os
 import shutil
 import sys
 import time
-from typing import Any, Callable, Optional, TypeVar, cast
-
-from checksumdir import dirhash
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, TypeVar, cast
 
 from navio_tasks import settings as settings
 from navio_tasks.settings import PROJECT_NAME, SRC
+from navio_tasks.source_index import forget_tree_digests, tree_digest, tree_files
 from navio_tasks.utils import inform
 
 # pylint: disable=invalid-name
 FuncType = Callable[..., Any]
 # pylint: disable=invalid-name
 F = TypeVar("F", bound=FuncType)
-CURRENT_HASH = None
 
 # bash to find what has change recently
 # find src/ -type f -print0 | xargs -0 stat -f "%m %N" | sort -rn | head -10 |
@@ -69,36 +73,25 @@ class BuildState:
         If a task succeeds & is re-run and didn't change, we might not
         want to re-run it if it depends *only* on source code
         """
-        # pylint: disable=global-statement
-        global CURRENT_HASH
-        directory = self.directory
-
-        # if CURRENT_HASH is None:
-        # inform("hashing " + directory)
-        # inform(os.listdir(directory))
-        CURRENT_HASH = dirhash(
-            directory,
-            "md5",
-            ignore_hidden=True,
-            # changing these exclusions can cause dirhas to skip EVERYTHING
-            # excluded_files=[".coverage", "lint.txt"],
-            excluded_extensions=[".pyc"],
+        # only files with new mtime/size/inode get re-read
+        current_hash = tree_digest(
+            self.directory, f"{settings.CONFIG_FOLDER}/.build_state"
         )
 
         inform("Searching " + self.state_file_name)
         if os.path.isfile(self.state_file_name):
             with open(self.state_file_name, "r+") as file:
                 last_hash = file.read()
-                if last_hash != CURRENT_HASH:
+                if last_hash != current_hash:
                     file.seek(0)
-                    file.write(CURRENT_HASH)
+                    file.write(current_hash)
                     file.truncate()
                     return True
                 return False
 
         # no previous file, by definition not the same.
         with open(self.state_file_name, "w") as file:
-            file.write(CURRENT_HASH)
+            file.write(current_hash)
             return True
 
 
@@ -131,6 +124,69 @@ def has_source_code_tree_changed(
     return state.has_source_code_tree_changed()
 
 
+class FileChanges(NamedTuple):
+    """
+    Files that differ from when a task last succeeded
+    """
+
+    changed: List[str]
+    removed: List[str]
+
+
+def _task_files_state(task_name: str) -> str:
+    """Where the file digests of the last success are kept"""
+    return f"{settings.CONFIG_FOLDER}/.build_state/files_{task_name}.json"
+
+
+def _current_files() -> Dict[str, str]:
+    """
+    Digest of each file in source tree, paths normalized to what tools print
+    """
+    files = tree_files(
+        os.path.join(SRC, PROJECT_NAME), f"{settings.CONFIG_FOLDER}/.build_state"
+    )
+    return {os.path.normpath(path): digest for path, digest in files.items()}
+
+
+def changed_files(task_name: str, extension: str = ".py") -> Optional[FileChanges]:
+    """
+    Files added, changed or removed since task last succeeded.
+
+    None if there is no record of a success, then the whole tree needs checking.
+    """
+    state_file = _task_files_state(task_name)
+    if not os.path.isfile(state_file):
+        return None
+    try:
+        with open(state_file) as file_handle:
+            previous = json.load(file_handle)
+    except ValueError:
+        return None
+    current = _current_files()
+    changed = [
+        path
+        for path, digest in sorted(current.items())
+        if path.endswith(extension) and previous.get(path) != digest
+    ]
+    removed = [
+        path
+        for path in sorted(previous)
+        if path.endswith(extension) and path not in current
+    ]
+    return FileChanges(changed, removed)
+
+
+def record_task_files(task_name: str, files: Dict[str, str]) -> None:
+    """
+    Remember file digests a task succeeded against.
+    """
+    state_file = _task_files_state(task_name)
+    temporary = f"{state_file}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file_handle:
+        json.dump(files, file_handle)
+    os.replace(temporary, state_file)
+
+
 def skip_if_no_change(name: str, expect_files: Optional[str] = None) -> F:
     """
     Don't run decorated task if nothing in the source has changed.
@@ -146,11 +202,19 @@ def skip_if_no_change(name: str, expect_files: Optional[str] = None) -> F:
             if not has_source_code_tree_changed(name, expect_files):
                 inform("Nothing changed, won't re-" + name)
                 return lambda x: None
+            # Files as they were *before* the task, a task that changes files
+            # will see its own changes next time, that is cheap & safe.
+            files_before = dict(_current_files())
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except:  # noqa: B001
                 oh_never_mind(name)
                 raise
+            finally:
+                # task may have changed source (formatters, upgraders)
+                forget_tree_digests()
+            record_task_files(name, files_before)
+            return result
 
         return cast(F, wrapper)
 
@@ -214,6 +278,7 @@ def reset_build_state() -> None:
     """
     if os.path.exists(f"{settings.CONFIG_FOLDER}/.build_state"):
         shutil.rmtree(f"{settings.CONFIG_FOLDER}/.build_state")
+    forget_tree_digests()
     if not os.path.exists(f"{settings.CONFIG_FOLDER}/.build_state"):
         os.makedirs(f"{settings.CONFIG_FOLDER}/.build_state")
 
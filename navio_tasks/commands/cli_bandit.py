@@ -5,14 +5,15 @@ Should break build on any issues.
 Expect few issues
 All issues should be addressable immediately.
 """
-
+from typing import List, Optional
 
 from navio_tasks.cli_commands import check_command_exists, execute, prepinform_simple
+from navio_tasks.utils import inform
 
 
-def do_bandit(is_shell_script_like: bool) -> str:
+def do_bandit(is_shell_script_like: bool, files: Optional[List[str]] = None) -> str:
     """
-    Security Checks
+    Security Checks, of whole project or just these files
 
     Generally returns a small number of problems to fix.
     """
@@ -22,9 +23,16 @@ def do_bandit(is_shell_script_like: bool) -> str:
             "issues on purpose."
         )
 
+    if files is not None and not files:
+        inform("No python files changed, skipping bandit")
+        return "bandit skipped"
+
     command = "bandit"
     check_command_exists(command)
     command = "bandit -r"
-    command = prepinform_simple(command)
+    if files is None:
+        command = prepinform_simple(command)
+    else:
+        command = prepinform_simple(f"{command} {' '.join(files)}", no_project=True)
     execute(*(command.split(" ")))
     return "bandit succeeded"
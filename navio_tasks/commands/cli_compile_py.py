@@ -5,6 +5,7 @@ TODO: Maybe implement vermin, another compilation checker.
 """
 
 import shlex
+from typing import List, Optional
 
 from navio_tasks.cli_commands import (
     config_pythonpath,
@@ -14,12 +15,20 @@ from navio_tasks.cli_commands import (
 from navio_tasks.utils import inform
 
 
-def do_compile_py(python: str) -> str:
+def do_compile_py(python: str, files: Optional[List[str]] = None) -> str:
     """
     Catch only the worst syntax errors in the currently python version
     """
+    if files is not None and not files:
+        inform("No python files changed, skipping compileall")
+        return "compileall skipped"
     command_text = f"{python} -m compileall"
-    command_text = prepinform_simple(command_text)
+    if files is None:
+        command_text = prepinform_simple(command_text)
+    else:
+        command_text = prepinform_simple(
+            f"{command_text} {' '.join(files)}", no_project=True
+        )
     command = shlex.split(command_text)
     result = execute_get_text(command, env=config_pythonpath())
     for line in result.split("\n"):
@@ -7,18 +7,28 @@ All issues should be addressable immediately.
 -------
 Rarely more than 1 or two issues if you have already worked pylint.
 """
+from typing import List, Optional
 
 from navio_tasks import settings as settings
 from navio_tasks.cli_commands import check_command_exists, execute, prepinform_simple
+from navio_tasks.utils import inform
 
 
-def do_flake8() -> str:
+def do_flake8(files: Optional[List[str]] = None) -> str:
     """
-    Flake8 Checks
+    Flake8 Checks, of whole project or just these files
     """
+    if files is not None and not files:
+        inform("No python files changed, skipping flake8")
+        return "flake 8 skipped"
     command = "flake8"
     check_command_exists(command)
     command_text = f"flake8 --config {settings.CONFIG_FOLDER}/.flake8"
-    command_text = prepinform_simple(command_text)
+    if files is None:
+        command_text = prepinform_simple(command_text)
+    else:
+        command_text = prepinform_simple(
+            f"{command_text} {' '.join(files)}", no_project=True
+        )
     execute(*(command_text.split(" ")))
     return "flake 8 succeeded"
@@ -1,13 +1,23 @@
 """
 Lots of code gripes.
+
+Lint for the main project is also kept per file in lint_by_file.json so that
+only changed files need to be re-linted. Checks that span files (duplicate-code,
+cyclic-import) are only up to date after a full run, `nb reset` forces one.
+After a partial run the rating in lint.txt is recomputed from the merged
+messages, with pylint's formula, over every statement in the project.
 """
+import ast
+import json
 import os
+import re
 import shlex
 import subprocess
 import sys
-from typing import List
+from typing import Dict, List, Optional
 
 from navio_tasks import settings as settings
+from navio_tasks.build_state import FileChanges
 from navio_tasks.cli_commands import check_command_exists, config_pythonpath
 from navio_tasks.output import say_and_exit
 from navio_tasks.pure_reports.cli_pygount import total_loc
@@ -16,23 +26,55 @@ from navio_tasks.settings import (
     IS_GITLAB,
     PROBLEMS_FOLDER,
     PROJECT_NAME,
+    SRC,
     VENV_SHELL,
 )
 from navio_tasks.utils import inform
 
+LINT_BY_FILE = f"{PROBLEMS_FOLDER}/lint_by_file.json"
+
+# path:line:column: C0114: message (symbol)
+MESSAGE_PATTERN = re.compile(r"^(?P<path>[^*\s][^:]*):\d+:")
+MESSAGE_CATEGORY = re.compile(r":\s\[?(?P<category>[CRWEF])\d{4}")
+
+
+def lint_folder(folder_type: str) -> str:
+    """
+    What pylint is run on. The main project is SRC/PROJECT_NAME, the same base
+    build_state keys files by, so per file lint & changed files match.
+    """
+    if folder_type == PROJECT_NAME:
+        return os.path.normpath(os.path.join(SRC, PROJECT_NAME))
+    return folder_type
+
 
-def do_lint(folder_type: str) -> str:
+def do_lint(folder_type: str, changes: Optional[FileChanges] = None) -> str:
     """
     Execute pylint
+
+    If changes are passed, only lint those files & merge into previous results.
     """
     # pylint: disable=too-many-locals
     check_command_exists("pylint")
+    folder = lint_folder(folder_type)
     if folder_type == PROJECT_NAME:
         pylintrc = f"{settings.CONFIG_FOLDER}/.pylintrc"
         lint_output_file_name = f"{PROBLEMS_FOLDER}/lint.txt"
     else:
         pylintrc = f"{settings.CONFIG_FOLDER}/.pylintrc_{folder_type}"
         lint_output_file_name = f"{PROBLEMS_FOLDER}/lint_{folder_type}.txt"
+        # only main project has a per file cache
+        changes = None
+
+    if changes is not None and not os.path.isfile(LINT_BY_FILE):
+        # nothing to merge into
+        changes = None
+
+    if changes is not None and not changes.changed:
+        inform("No python files changed, re-using previous lint")
+        return write_merged_lint(
+            lint_output_file_name, changes, {}, count_statements(folder)
+        )
 
     if os.path.isfile(lint_output_file_name):
         os.remove(lint_output_file_name)
@@ -42,9 +84,14 @@ def do_lint(folder_type: str) -> str:
     else:
         django_bits = ""
 
+    if changes is not None:
+        targets = " ".join(changes.changed)
+    else:
+        targets = folder
+
     # pylint: disable=pointless-string-statement
     command_text = (
-        f"{VENV_SHELL} pylint {django_bits} " f"--rcfile={pylintrc} {folder_type} "
+        f"{VENV_SHELL} pylint {django_bits} " f"--rcfile={pylintrc} {targets} "
     )
 
     command_text += " "
@@ -57,6 +104,99 @@ def do_lint(folder_type: str) -> str:
     with open(lint_output_file_name, "w") as outfile:
         env = config_pythonpath()
         subprocess.call(command, stdout=outfile, env=env)
+
+    if folder_type != PROJECT_NAME:
+        return lint_output_file_name
+
+    with open(lint_output_file_name) as file_handle:
+        output = file_handle.read()
+    by_file = lint_by_file(output)
+    if changes is None:
+        # full run, replaces whatever was cached
+        with open(LINT_BY_FILE, "w") as file_handle:
+            json.dump(by_file, file_handle)
+        return lint_output_file_name
+    return write_merged_lint(
+        lint_output_file_name, changes, by_file, count_statements(folder)
+    )
+
+
+def lint_by_file(output: str) -> Dict[str, List[str]]:
+    """
+    Group pylint text output by the file each message is about
+    """
+    by_file: Dict[str, List[str]] = {}
+    for line in output.split("\n"):
+        match = MESSAGE_PATTERN.match(line)
+        if match:
+            path = os.path.normpath(match.group("path"))
+            by_file.setdefault(path, []).append(line)
+    return by_file
+
+
+def count_statements(folder: str) -> int:
+    """
+    Statements in every python file under folder, what pylint's rating is per
+    """
+    total = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+            with open(os.path.join(root, name), "rb") as file_handle:
+                source = file_handle.read()
+            try:
+                tree = ast.parse(source)
+            except (SyntaxError, ValueError):
+                continue
+            total += sum(isinstance(node, ast.stmt) for node in ast.walk(tree))
+    return total
+
+
+def rating(by_file: Dict[str, List[str]], statements: int) -> str:
+    """
+    Rating line as pylint would print it for these messages, default formula
+    10 - (5 * error + warning + refactor + convention) / statement * 10
+    """
+    counts = {category: 0 for category in "CRWEF"}
+    for lines in by_file.values():
+        for line in lines:
+            match = MESSAGE_CATEGORY.search(line)
+            if match:
+                counts[match.group("category")] += 1
+    if not statements:
+        return "Your code has been rated at 0.00/10 (no statements)"
+    penalty = 5 * counts["E"] + counts["W"] + counts["R"] + counts["C"]
+    score = 0.0 if counts["F"] else max(0.0, 10.0 - penalty * 10.0 / statements)
+    return f"Your code has been rated at {score:.2f}/10"
+
+
+def write_merged_lint(
+    lint_output_file_name: str,
+    changes: FileChanges,
+    new_results: Dict[str, List[str]],
+    statements: int,
+) -> str:
+    """
+    Replace cached lint for changed files, drop removed files, rewrite lint.txt
+    """
+    with open(LINT_BY_FILE) as file_handle:
+        by_file: Dict[str, List[str]] = json.load(file_handle)
+    for path in changes.changed + changes.removed:
+        by_file.pop(path, None)
+    by_file.update(new_results)
+    with open(LINT_BY_FILE, "w") as file_handle:
+        json.dump(by_file, file_handle)
+
+    with open(lint_output_file_name, "w") as outfile:
+        for path in sorted(by_file):
+            if not by_file[path]:
+                continue
+            outfile.write(f"************* Module {path}\n")
+            for line in by_file[path]:
+                outfile.write(line + "\n")
+        outfile.write("\n" + "-" * 66 + "\n")
+        outfile.write(rating(by_file, statements) + "\n")
     return lint_output_file_name
 
 
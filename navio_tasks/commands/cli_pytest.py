@@ -13,9 +13,9 @@ from navio_tasks.cli_commands import (
     config_pythonpath,
     execute_with_environment,
 )
+from navio_tasks.network import is_internal_network
 from navio_tasks.settings import (
     IS_GITLAB,
-    IS_INTERNAL_NETWORK,
     MINIMUM_TEST_COVERAGE,
     PROJECT_NAME,
     REPORTS_FOLDER,
@@ -25,17 +25,23 @@ from navio_tasks.settings import (
 from navio_tasks.utils import inform
 
 
+def fast_tests_only() -> bool:
+    """
+    Integration tests need the internal network, skip them if we are not on it
+    """
+    #  Somedays VPN just isn't there.
+    if RUN_ALL_TESTS_REGARDLESS_TO_NETWORK:
+        return False
+    return not is_internal_network()
+
+
 def do_pytest() -> None:
     """
     Pytest and coverage, which replaces nose tests
     """
     check_command_exists("pytest")
 
-    #  Somedays VPN just isn't there.
-    if IS_INTERNAL_NETWORK or RUN_ALL_TESTS_REGARDLESS_TO_NETWORK:
-        fast_only = False
-    else:
-        fast_only = True
+    fast_only = fast_tests_only()
     if fast_only:
         test_folder = "test/test_fast"
         minimum_coverage = 48
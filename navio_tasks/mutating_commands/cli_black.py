@@ -7,7 +7,7 @@ If code needs to be modified and we are on a build server, maybe break build.
 
 import shlex
 import sys
-from typing import Dict
+from typing import Dict, List, Optional
 
 from navio_tasks.cli_commands import (
     check_command_exists,
@@ -20,9 +20,13 @@ from navio_tasks.system_info import is_windows
 from navio_tasks.utils import inform
 
 
-def do_formatting(check: str, state: Dict[str, bool]) -> None:
+def do_formatting(
+    check: str, state: Dict[str, bool], files: Optional[List[str]] = None
+) -> None:
     """
     Format with black - this will not modify code if check is --check
+
+    Formats whole project or just these files.
     """
 
     # check & format should be merged & use an arg
@@ -33,11 +37,13 @@ def do_formatting(check: str, state: Dict[str, bool]) -> None:
     if sys.version_info < (3, 6):
         inform("Black doesn't work on python 2")
         return
+    if files is not None and not files:
+        inform("No python files changed, skipping black")
+        return
     check_command_exists("black")
 
-    command_text = f"{VENV_SHELL} black {PROJECT_NAME} {check}".strip().replace(
-        "  ", " "
-    )
+    targets = PROJECT_NAME if files is None else " ".join(files)
+    command_text = f"{VENV_SHELL} black {targets} {check}".strip().replace("  ", " ")
     inform(command_text)
     command = shlex.split(command_text)
     if check:
@@ -3,23 +3,29 @@ Reformat code to use py3 patterns when possible
 """
 
 import glob
+from typing import List, Optional
 
 from navio_tasks.cli_commands import check_command_exists, execute
 from navio_tasks.settings import PROJECT_NAME, VENV_SHELL
 from navio_tasks.utils import inform
 
 
-def do_pyupgrade(is_interactive: bool, minimum_python: str) -> str:
-    """Update syntax to most recent variety."""
+def do_pyupgrade(
+    is_interactive: bool, minimum_python: str, files: Optional[List[str]] = None
+) -> str:
+    """Update syntax to most recent variety, of whole project or just these files"""
     if not is_interactive:
         inform("Not an interactive session, skipping pyupgrade wihch changes files.")
         return "Skipping"
+    if files is not None and not files:
+        inform("No python files changed, skipping pyupgrade")
+        return "Skipping"
     command = "pyupgrade"
     check_command_exists(command)
 
-    all_files = " ".join(
-        f for f in glob.glob(f"{PROJECT_NAME}/**/*.py", recursive=True)
-    )
+    if files is None:
+        files = glob.glob(f"{PROJECT_NAME}/**/*.py", recursive=True)
+    all_files = " ".join(files)
 
     # as of 2021, still doesn't appear to support recursive globs natively.
     command = (
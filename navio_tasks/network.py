@@ -1,22 +1,32 @@
 """
 Builds fail when they're not on VPN or can't reach remote servers
+
+Nothing here runs at import time. The answer to "are we on the internal
+network" is cached in .build_state for a while, because asking costs a
+round trip to a remote server.
 """
-import ifaddr
-import requests
+import json
+import os
+import time
+
+from navio_tasks import settings as settings
 
 
-def check_public_ip(ipify: str = "https://api64.ipify.org/") -> str:
+def check_public_ip(
+    ipify: str = "https://api64.ipify.org/", timeout: float = 2
+) -> str:
     """
-    Try to get the elastic IP for this machine
+    Try to get the elastic IP for this machine, empty string if we can't
     """
-    # BUG: When this fails, it doesn't fail fast.
+    # pylint: disable=import-outside-toplevel
+    import requests
 
     # pylint: disable=bare-except,broad-except
     # noinspection PyBroadException
     try:
         # https://api.ipify.org # fails on VPN.
         # pylint: disable=invalid-name
-        ip = requests.get(ipify).text
+        ip = requests.get(ipify, timeout=timeout).text
         return ip
     except BaseException:  # noqa
         return ""
@@ -24,6 +34,8 @@ def check_public_ip(ipify: str = "https://api64.ipify.org/") -> str:
 
 def is_known_network(prefix: str) -> bool:
     """Are we on a known network"""
+    # pylint: disable=import-outside-toplevel
+    import ifaddr
 
     adapters = ifaddr.get_adapters()
     for adapter in adapters:
@@ -32,3 +44,39 @@ def is_known_network(prefix: str) -> bool:
             if str(ip.ip).startswith(prefix):
                 return True
     return False
+
+
+def is_internal_network() -> bool:
+    """
+    Are we on the known network, checked at most once per NETWORK_CHECK_TTL
+    """
+    state_file = f"{settings.CONFIG_FOLDER}/.build_state/network.json"
+    if os.path.isfile(state_file):
+        try:
+            with open(state_file) as file_handle:
+                state = json.load(file_handle)
+            if (
+                state["prefix"] == settings.KNOWN_IP_PREFIX
+                and time.time() - state["checked"] < settings.NETWORK_CHECK_TTL
+            ):
+                return bool(state["is_internal"])
+        except (ValueError, KeyError):
+            pass
+
+    # local adapters first, no need to go to a remote server if this answers it
+    is_internal = is_known_network(settings.KNOWN_IP_PREFIX) or check_public_ip(
+        timeout=settings.NETWORK_CHECK_TIMEOUT
+    ).startswith(settings.KNOWN_IP_PREFIX)
+
+    if not os.path.exists(f"{settings.CONFIG_FOLDER}/.build_state"):
+        os.makedirs(f"{settings.CONFIG_FOLDER}/.build_state")
+    with open(state_file, "w") as file_handle:
+        json.dump(
+            {
+                "prefix": settings.KNOWN_IP_PREFIX,
+                "checked": time.time(),
+                "is_internal": is_internal,
+            },
+            file_handle,
+        )
+    return is_internal
@@ -1,27 +1,52 @@
 """
 Complexity reports
-"""
 
-import shlex
+Uses the shared single parse in cheese_grader.source_analysis instead of a
+second flake8 run over the whole project, results are cached by file digest.
+
+So the build depends on the product it builds. cheese_grader is imported only
+when checking, a broken product module fails this task with a message, it
+doesn't stop every other task from importing.
+"""
+from typing import Any
 
 from navio_tasks import settings as settings
-from navio_tasks.cli_commands import check_command_exists, execute, prepinform_simple
-from navio_tasks.settings import COMPLEXITY_CUT_OFF
+from navio_tasks.output import say_and_exit
+from navio_tasks.settings import COMPLEXITY_CUT_OFF, PROJECT_NAME
+from navio_tasks.source_index import walk_source_files
+from navio_tasks.utils import inform
+
+
+def _source_analysis() -> Any:
+    """cheese_grader.source_analysis, or exit the build saying why it won't import"""
+    # pylint: disable=import-outside-toplevel,broad-except
+    try:
+        import cheese_grader.source_analysis as source_analysis
+    except Exception as ex:
+        say_and_exit(f"Can't import cheese_grader.source_analysis: {ex}", "mccabe")
+        raise
+    return source_analysis
 
 
 def do_mccabe() -> str:
     """
     Complexity Checker
     """
-
-    check_command_exists("flake8")  # yes, flake8, this is a plug in.
-    # mccabe doesn't have a direct way to run it
-
-    command_text = (
-        f"flake8 --max-complexity {COMPLEXITY_CUT_OFF} "
-        f"--config {settings.CONFIG_FOLDER}/.flake8"
+    inform(f"Checking complexity of {PROJECT_NAME}, max {COMPLEXITY_CUT_OFF}")
+    source_analysis = _source_analysis()
+    cache = source_analysis.AnalysisCache(
+        f"{settings.CONFIG_FOLDER}/.build_state/analysis.json"
     )
-    command_text = prepinform_simple(command_text)
-    command = shlex.split(command_text)
-    execute(*command)
+    paths = [_ for _ in walk_source_files(PROJECT_NAME) if _.endswith(".py")]
+    analyses = source_analysis.analyze_files(paths, cache)
+
+    too_complex = [
+        found
+        for found in source_analysis.complexities(analyses)
+        if found[3] > int(COMPLEXITY_CUT_OFF)
+    ]
+    for path, function, line, complexity in too_complex:
+        inform(f"{path}:{line}: C901 '{function}' is too complex ({complexity})")
+    if too_complex:
+        say_and_exit(f"{len(too_complex)} functions are too complex", "mccabe")
     return "mccabe succeeded"
@@ -1,14 +1,20 @@
 """
 Lines fo code counting
+
+Counted in process by cheese_grader.line_counts, pygount is no longer needed.
+Per file counts are cached by digest in the build state folder.
+
+So the build depends on the product it builds. cheese_grader is imported only
+when counting, a broken product module fails this task with a message, it
+doesn't stop every other task from importing.
 """
 import os
-import shlex
-import subprocess
+from typing import Any
 
 from navio_tasks import settings as settings
-from navio_tasks.cli_commands import check_command_exists, prepinform_simple
 from navio_tasks.output import say_and_exit
-from navio_tasks.settings import REPORTS_FOLDER
+from navio_tasks.settings import PROJECT_NAME, REPORTS_FOLDER
+from navio_tasks.source_index import walk_source_files
 from navio_tasks.utils import inform
 
 
@@ -34,26 +40,47 @@ def total_loc() -> int:
     return int(total_loc_value)
 
 
+def _line_counts() -> Any:
+    """cheese_grader.line_counts, or exit the build saying why it won't import"""
+    # pylint: disable=import-outside-toplevel,broad-except
+    try:
+        import cheese_grader.line_counts as line_counts
+    except Exception as ex:
+        say_and_exit(f"Can't import cheese_grader.line_counts: {ex}", "pygount")
+        raise
+    return line_counts
+
+
 def do_count_lines_of_code() -> None:
     """
     Scale failure cut offs based on Lines of Code
     """
-    command_name = "pygount"
-    check_command_exists(command_name)
-    command_text = prepinform_simple(command_name)
+    inform(f"Counting lines of code in {PROJECT_NAME}")
+    line_counts = _line_counts()
+    cache = line_counts.LineCountCache(
+        f"{settings.CONFIG_FOLDER}/.build_state/line_counts.json"
+    )
+    counts = line_counts.count_files(walk_source_files(PROJECT_NAME), cache)
 
     # keep out of src tree, causes extraneous change detections
     if not os.path.exists(f"{REPORTS_FOLDER}"):
         os.makedirs(f"{REPORTS_FOLDER}")
     output_file_name = f"{REPORTS_FOLDER}/line_counts.txt"
-    command = shlex.split(command_text)
     with open(output_file_name, "w") as outfile:
-        subprocess.call(command, stdout=outfile)
-
-    with open(output_file_name) as file_handle:
-        lines = sum(int(line.split("\t")[0]) for line in file_handle if line != "\n")
+        for path, counted in sorted(counts.items()):
+            lines = counted.lines
+            outfile.write(
+                f"{lines.code}\t{counted.language}\t{lines.comment}\t"
+                f"{lines.docstring}\t{lines.blank}\t{path}\n"
+            )
 
-    total_loc_local = lines
+    totals = line_counts.by_language(counts.values())
+    for language, lines in sorted(totals.items()):
+        inform(
+            f"{language}: {lines.code} code, {lines.comment} comment, "
+            f"{lines.docstring} docstring, {lines.blank} blank"
+        )
+    total_loc_local = line_counts.total_code(counts.values())
     if not os.path.exists(f"{settings.CONFIG_FOLDER}/.build_state"):
         os.makedirs(f"{settings.CONFIG_FOLDER}/.build_state")
     with open(
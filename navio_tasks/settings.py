@@ -7,8 +7,6 @@ import configparser
 import os
 import platform
 
-from navio_tasks.network import check_public_ip, is_known_network
-
 CONFIG_FOLDER = ".config"
 
 
@@ -86,15 +84,14 @@ VENDOR_LIBS = ":"
 # so that formatting doesn't run after check done once
 FORMATTING_CHECK_DONE = False
 
-# network call
-PUBLIC_IP = check_public_ip()
+# No network calls here! see network.is_internal_network()
 KNOWN_IP_PREFIX = SECTION["KNOWN_IP_PREFIX"]
 RUN_ALL_TESTS_REGARDLESS_TO_NETWORK = (
     SECTION["RUN_ALL_TESTS_REGARDLESS_TO_NETWORK"] == "True"
 )
-IS_INTERNAL_NETWORK = is_known_network(KNOWN_IP_PREFIX) or PUBLIC_IP.startswith(
-    KNOWN_IP_PREFIX
-)
+# seconds
+NETWORK_CHECK_TTL = int(SECTION.get("NETWORK_CHECK_TTL", "3600"))
+NETWORK_CHECK_TIMEOUT = float(SECTION.get("NETWORK_CHECK_TIMEOUT", "2"))
 IS_INTERACTIVE = not (IS_GITLAB or IS_JENKINS)
 
 SPEAK_WHEN_BUILD_FAILS = SECTION["SPEAK_WHEN_BUILD_FAILS"] == "True"
@@ -0,0 +1,167 @@
+"""
+Remember what each file in the source tree looked like last time it was hashed,
+so a build only re-reads the files that were touched since.
+
+The index is a json file keyed by path, each entry is
+[mtime_ns, size, inode, digest]. If the stat part still matches, the digest
+is trusted without opening the file.
+
+Tree digests are computed from the per file digests and kept for the life
+of the process. Tasks that change source (black, isort, pyupgrade...) must
+call forget_tree_digests() so the next check sees the new tree.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+INDEX_FILE_NAME = "source_index.json"
+
+# Files modified this recently might be modified again within the same mtime
+# tick, so don't trust their stat info next time. Same problem as git's
+# "racily clean" index entries.
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+_LOCK = threading.RLock()
+_TREE_DIGESTS: Dict[str, str] = {}
+_TREE_FILES: Dict[str, Dict[str, str]] = {}
+
+
+def hash_file(path: str) -> str:
+    """
+    Hash a single file without reading it all into memory
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file_handle:
+        for block in iter(lambda: file_handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def walk_source_files(directory: str) -> List[str]:
+    """
+    Files in tree, skipping hidden files & folders and bytecode
+    """
+    found = []
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = list(os.scandir(current))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+            elif entry.is_file() and not entry.name.endswith(".pyc"):
+                found.append(entry.path.replace("\\", "/"))
+    return sorted(found)
+
+
+class SourceIndex:
+    """
+    Persistent path -> (mtime_ns, size, inode, digest) map
+    """
+
+    def __init__(self, state_folder: str) -> None:
+        """
+        Load index from state folder, a missing or corrupt index is an empty one
+        """
+        self.file_name = os.path.join(state_folder, INDEX_FILE_NAME)
+        self.entries: Dict[str, List] = {}
+        self.dirty = False
+        if os.path.isfile(self.file_name):
+            try:
+                with open(self.file_name) as file_handle:
+                    self.entries = json.load(file_handle)
+            except ValueError:
+                self.entries = {}
+
+    def digest(self, path: str, now_ns: Optional[int] = None) -> str:
+        """
+        Digest of one file, only re-hashed if the stat info changed
+        """
+        stat = os.stat(path)
+        key = [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+        entry = self.entries.get(path)
+        if entry and entry[:3] == key and entry[3]:
+            return str(entry[3])
+
+        digest = hash_file(path)
+        now_ns = now_ns or time.time_ns()
+        racy = now_ns - stat.st_mtime_ns < RACY_WINDOW_NS
+        self.entries[path] = key + [None if racy else digest]
+        self.dirty = True
+        return digest
+
+    def scan(self, directory: str) -> Dict[str, str]:
+        """
+        Digest of every file in the tree, drops files that no longer exist
+        """
+        now_ns = time.time_ns()
+        digests = {}
+        for path in walk_source_files(directory):
+            try:
+                digests[path] = self.digest(path, now_ns)
+            except FileNotFoundError:
+                # deleted while we were walking
+                continue
+
+        prefix = directory.replace("\\", "/").rstrip("/") + "/"
+        for path in [_ for _ in self.entries if _.startswith(prefix)]:
+            if path not in digests:
+                del self.entries[path]
+                self.dirty = True
+        return digests
+
+    def save(self) -> None:
+        """
+        Write index, replacing the old one in one step
+        """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.file_name) or ".", exist_ok=True)
+        temporary = f"{self.file_name}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file_handle:
+            json.dump(self.entries, file_handle)
+        os.replace(temporary, self.file_name)
+        self.dirty = False
+
+
+def tree_files(directory: str, state_folder: str) -> Dict[str, str]:
+    """
+    path -> digest for every file in tree, computed once per process
+    """
+    with _LOCK:
+        if directory not in _TREE_FILES:
+            index = SourceIndex(state_folder)
+            _TREE_FILES[directory] = index.scan(directory)
+            index.save()
+        return _TREE_FILES[directory]
+
+
+def tree_digest(directory: str, state_folder: str) -> str:
+    """
+    One digest for whole tree, computed once per process
+    """
+    with _LOCK:
+        if directory not in _TREE_DIGESTS:
+            combined = hashlib.sha256()
+            for path, digest in sorted(tree_files(directory, state_folder).items()):
+                relative = os.path.relpath(path, directory).replace("\\", "/")
+                combined.update(f"{relative}\0{digest}\n".encode("utf-8"))
+            _TREE_DIGESTS[directory] = combined.hexdigest()
+        return _TREE_DIGESTS[directory]
+
+
+def forget_tree_digests() -> None:
+    """
+    Source may have changed, next tree_digest call must look at the disk again
+    """
+    with _LOCK:
+        _TREE_DIGESTS.clear()
+        _TREE_FILES.clear()
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""
+Build task tests run against synthetic settings, not the repo's .config/.pynt
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+PYNT = """[DEFAULT]
+PROJECT_NAME = pkg
+SRC = .
+PROBLEMS_FOLDER = problems
+REPORTS_FOLDER = reports
+IS_SHELL_SCRIPT_LIKE = false
+COMPLEXITY_CUT_OFF = 10
+MINIMUM_TEST_COVERAGE = 10
+SMALL_CODE_BASE_CUTOFF = 10
+MAXIMUM_LINT = 10
+MAXIMUM_MYPY = 10
+MAXIMUM_DEAD_CODE = 10
+MAXIMUM_MANIFEST_ERRORS = 10
+VENV_SHELL =
+PACKAGE_WITH = none
+KNOWN_IP_PREFIX = 10.
+RUN_ALL_TESTS_REGARDLESS_TO_NETWORK = False
+SPEAK_WHEN_BUILD_FAILS = False
+"""
+
+VENV_VARIABLES = ("PIPENV_ACTIVE", "POETRY_ACTIVE", "VIRTUAL_ENV", "TOX_PACKAGE")
+
+
+@pytest.fixture
+def navio_settings(tmp_path, monkeypatch):
+    """
+    navio_tasks.settings, read once from a synthetic .config/.pynt, with
+    CONFIG_FOLDER moved under tmp_path. navio_tasks modules must be imported
+    after this, settings are read on import.
+    """
+    if "navio_tasks.settings" not in sys.modules:
+        home = tmp_path / "settings"
+        (home / ".config").mkdir(parents=True)
+        (home / ".config" / ".pynt").write_text(PYNT)
+        monkeypatch.chdir(home)
+        if not any(_ in os.environ for _ in VENV_VARIABLES):
+            # settings refuse to load outside a virtual env
+            monkeypatch.setenv("VIRTUAL_ENV", sys.prefix)
+        importlib.import_module("navio_tasks.settings")
+    settings = sys.modules["navio_tasks.settings"]
+    config = tmp_path / "config"
+    (config / ".build_state").mkdir(parents=True)
+    monkeypatch.setattr(settings, "CONFIG_FOLDER", str(config))
+    return settings
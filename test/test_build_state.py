@@ -0,0 +1,55 @@
+# coding=utf-8
+"""
+Which files changed since a task last succeeded
+"""
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def build_state(navio_settings, tmp_path, monkeypatch):
+    # navio_tasks reads its settings on import
+    module = importlib.import_module("navio_tasks.build_state")
+    monkeypatch.setattr(module, "SRC", str(tmp_path / "src"))
+    monkeypatch.setattr(module, "PROJECT_NAME", "pkg")
+    module.forget_tree_digests()
+    yield module
+    module.forget_tree_digests()
+
+
+@pytest.fixture
+def project(build_state, tmp_path):
+    source = tmp_path / "src" / "pkg"
+    source.mkdir(parents=True)
+    return source
+
+
+def test_changed_files(build_state, project):
+    (project / "same.py").write_text("a = 1\n")
+    (project / "edited.py").write_text("b = 1\n")
+    (project / "gone.py").write_text("c = 1\n")
+    (project / "notes.txt").write_text("not python\n")
+    # never succeeded, everything needs checking
+    assert build_state.changed_files("lint") is None
+
+    build_state.record_task_files("lint", build_state._current_files())
+    (project / "edited.py").write_text("b = 2\n")
+    (project / "added.py").write_text("d = 1\n")
+    (project / "notes.txt").write_text("still not python\n")
+    os.remove(project / "gone.py")
+    build_state.forget_tree_digests()
+
+    changes = build_state.changed_files("lint")
+    assert [os.path.basename(_) for _ in changes.changed] == ["added.py", "edited.py"]
+    assert [os.path.basename(_) for _ in changes.removed] == ["gone.py"]
+    assert build_state.changed_files("lint", ".txt").changed[0].endswith("notes.txt")
+
+
+def test_corrupt_record_means_full_run(build_state, project):
+    (project / "a.py").write_text("a = 1\n")
+    build_state.record_task_files("lint", build_state._current_files())
+    with open(build_state._task_files_state("lint"), "w") as file_handle:
+        file_handle.write("{not json")
+    assert build_state.changed_files("lint") is None
@@ -0,0 +1,19 @@
+# coding=utf-8
+"""
+Complexity gate for the build, measured by the product
+"""
+import importlib
+import sys
+
+import pytest
+
+
+def test_broken_product_fails_only_the_task(navio_settings, monkeypatch):
+    # navio_tasks reads its settings on import
+    cli_mccabe = importlib.import_module(
+        "navio_tasks.non_breaking_commands.cli_mccabe"
+    )
+    # a None entry makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "cheese_grader.source_analysis", None)
+    with pytest.raises(SystemExit):
+        cli_mccabe.do_mccabe()
@@ -0,0 +1,33 @@
+# coding=utf-8
+"""
+Lines of code for the build, counted by the product
+"""
+import importlib
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def cli_pygount(navio_settings, monkeypatch):
+    # navio_tasks reads its settings on import
+    module = importlib.import_module("navio_tasks.pure_reports.cli_pygount")
+    monkeypatch.setattr(module, "REPORTS_FOLDER", navio_settings.CONFIG_FOLDER)
+    monkeypatch.setattr(module, "PROJECT_NAME", "pkg")
+    return module
+
+
+def test_counts_into_build_state(cli_pygount, tmp_path, monkeypatch):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("x = 1\n")
+    (tmp_path / "pkg" / "README").write_text("prose\n")
+    monkeypatch.chdir(tmp_path)
+    cli_pygount.do_count_lines_of_code()
+    assert cli_pygount.total_loc() == 1
+
+
+def test_broken_product_fails_only_the_task(cli_pygount, monkeypatch):
+    # a None entry makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "cheese_grader.line_counts", None)
+    with pytest.raises(SystemExit):
+        cli_pygount.do_count_lines_of_code()
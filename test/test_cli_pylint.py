@@ -0,0 +1,78 @@
+# coding=utf-8
+"""
+Merging per file lint from a partial pylint run
+"""
+import importlib
+import json
+
+import pytest
+
+pytest.importorskip("psutil")
+
+
+@pytest.fixture
+def cli_pylint(navio_settings):
+    # navio_tasks reads its settings on import
+    return importlib.import_module("navio_tasks.commands.cli_pylint")
+
+
+OLD = {
+    "pkg/a.py": ["pkg/a.py:1:0: C0114: Missing module docstring (missing-docstring)"],
+    "pkg/b.py": ["pkg/b.py:3:4: E0602: Undefined variable 'x' (undefined-variable)"],
+    "pkg/c.py": ["pkg/c.py:2:0: W0611: Unused import os (unused-import)"],
+}
+
+
+def test_merge_replaces_changed_and_drops_removed(cli_pylint, tmp_path, monkeypatch):
+    by_file = str(tmp_path / "lint_by_file.json")
+    monkeypatch.setattr(cli_pylint, "LINT_BY_FILE", by_file)
+    with open(by_file, "w") as file_handle:
+        json.dump(OLD, file_handle)
+
+    # b.py fixed, c.py deleted, a.py untouched
+    output = "************* Module pkg.b\n\n" + "-" * 66 + "\n"
+    output += "Your code has been rated at 10.00/10\n"
+    new = cli_pylint.lint_by_file(output)
+    assert new == {}
+    changes = cli_pylint.FileChanges(["pkg/b.py"], ["pkg/c.py"])
+    lint_txt = str(tmp_path / "lint.txt")
+    cli_pylint.write_merged_lint(lint_txt, changes, new, statements=20)
+
+    with open(by_file) as file_handle:
+        assert json.load(file_handle) == {"pkg/a.py": OLD["pkg/a.py"]}
+    with open(lint_txt) as file_handle:
+        text = file_handle.read()
+    assert OLD["pkg/a.py"][0] in text and "E0602" not in text
+    # whole project rating, one convention message in 20 statements
+    assert "Your code has been rated at 9.50/10" in text
+
+
+def test_lint_keys_match_changed_files(cli_pylint, tmp_path, monkeypatch):
+    build_state = importlib.import_module("navio_tasks.build_state")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "a.py").write_text("import os\n")
+    monkeypatch.chdir(tmp_path)
+    for module in (build_state, cli_pylint):
+        monkeypatch.setattr(module, "SRC", "src")
+        monkeypatch.setattr(module, "PROJECT_NAME", "pkg")
+    build_state.forget_tree_digests()
+
+    folder = cli_pylint.lint_folder("pkg")
+    assert cli_pylint.lint_folder("test") == "test"
+    assert cli_pylint.count_statements(folder) == 1
+    # pylint names files by the path it was given
+    message = f"{folder}/a.py:1:0: W0611: Unused import os (unused-import)"
+    assert list(cli_pylint.lint_by_file(message)) == list(build_state._current_files())
+    build_state.forget_tree_digests()
+
+
+def test_rating_like_pylint(cli_pylint):
+    assert cli_pylint.rating(OLD, 10).endswith(" 3.00/10")
+    fatal = {"x.py": ["x.py:1:0: F0001: No module named x (fatal)"]}
+    assert cli_pylint.rating(fatal, 10).endswith(" 0.00/10")
+
+
+def test_count_statements(cli_pylint, tmp_path):
+    (tmp_path / "a.py").write_text("import os\n\n\ndef f():\n    return os\n")
+    (tmp_path / "broken.py").write_text("print 'py2'\n")
+    assert cli_pylint.count_statements(str(tmp_path)) == 3
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""
+Lockfile reading & transitive dependency graph
+"""
+import json
+
+from cheese_grader.dependency_graph import DependencyGraph
+from cheese_grader.lockfiles import Pin, read_lockfile
+
+RELEASES = {
+    ("app", "1.0"): ["requests>=2", "six ; python_version < '3'"],
+    ("lib", "2.0"): ["requests", "click[colors]"],
+    ("requests", "2.1"): ["urllib3<2", "idna"],
+    ("requests", "2.0"): [],
+    ("urllib3", "1.9"): [],
+    ("urllib3", "2.0"): [],
+    ("idna", "3.0"): [],
+    ("click", "8.0"): ["colorama ; extra == 'colors'"],
+    ("colorama", "0.4"): [],
+}
+
+CALLS = []
+
+
+def project(name):
+    CALLS.append(("project", name))
+    versions = [version for (key, version) in RELEASES if key == name]
+    if not versions:
+        return None
+    return {"releases": {version: [{}] for version in versions}}
+
+
+def release(name, version):
+    CALLS.append(("release", name, version))
+    return {"info": {"requires_dist": RELEASES[(name, version)]}}
+
+
+def test_shared_subtrees_resolved_once():
+    del CALLS[:]
+    graph = DependencyGraph(project, release, {"python_version": "3.8"})
+    nodes = list(graph.walk([Pin("app", "1.0"), Pin("lib", "2.0"), Pin("gone", None)]))
+    found = {(node.name, node.version) for node in nodes}
+    assert found == {
+        ("app", "1.0"),
+        ("lib", "2.0"),
+        ("gone", None),
+        ("requests", "2.1"),
+        ("urllib3", "1.9"),
+        ("idna", "3.0"),
+        ("click", "8.0"),
+        ("colorama", "0.4"),
+    }
+    assert len(nodes) == len(found)
+    assert CALLS.count(("release", "requests", "2.1")) == 1
+    assert CALLS.count(("project", "requests")) == 1
+    by_name = {node.name: node for node in nodes}
+    assert by_name["requests"].requires == [("urllib3", "1.9"), ("idna", "3.0")]
+    assert by_name["colorama"].depth == 2
+
+
+def test_read_lockfiles(tmp_path):
+    base = tmp_path / "base.txt"
+    base.write_text("Django==3.2 --hash=sha256:abc\n")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text(
+        "# comment\n-r base.txt\nrequests[socks]>=2\n-e .\nsome_thing===1.0\n"
+    )
+    assert read_lockfile(str(requirements)) == [
+        Pin("django", "3.2"),
+        Pin("requests", None, frozenset(["socks"])),
+        Pin("some-thing", "1.0"),
+    ]
+
+    pipfile_lock = tmp_path / "Pipfile.lock"
+    pipfile_lock.write_text(
+        json.dumps(
+            {
+                "default": {"docopt": {"version": "==0.6.2"}},
+                "develop": {"pytest": {"version": "==6.0.1"}},
+            }
+        )
+    )
+    assert read_lockfile(str(pipfile_lock)) == [Pin("docopt", "0.6.2")]
+    assert len(read_lockfile(str(pipfile_lock), include_dev=True)) == 2
+
+    poetry_lock = tmp_path / "poetry.lock"
+    poetry_lock.write_text(
+        '[[package]]\nname = "Click"\nversion = "8.0.1"\ncategory = "main"\n'
+        '[[package]]\nname = "pytest"\nversion = "6.0"\ncategory = "dev"\n'
+    )
+    assert read_lockfile(str(poetry_lock)) == [Pin("click", "8.0.1")]
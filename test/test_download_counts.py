@@ -0,0 +1,82 @@
+# coding=utf-8
+"""
+Persistent download count cache
+"""
+import time
+
+import pytest
+
+from cheese_grader.storage.download_counts import (
+    DownloadCountCache,
+    Offline,
+    PackageNotFound,
+    RateLimited,
+)
+
+
+class FakeStats:
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_cached_across_instances_by_normalized_name(tmp_path):
+    path = str(tmp_path / "counts.sqlite")
+    stats = FakeStats([100])
+    assert DownloadCountCache(path).get("Foo_Bar", stats) == 100
+    assert DownloadCountCache(path).get("foo.bar", stats) == 100
+    assert stats.calls == ["foo-bar"]
+
+
+def test_not_found_is_cached(tmp_path):
+    cache = DownloadCountCache(str(tmp_path / "counts.sqlite"))
+    stats = FakeStats([PackageNotFound()])
+    assert cache.get("nope", stats) is None
+    assert cache.get("nope", stats) is None
+    assert len(stats.calls) == 1
+
+
+def test_rate_limit_retried(tmp_path):
+    cache = DownloadCountCache(str(tmp_path / "counts.sqlite"), backoff=0.01)
+    stats = FakeStats([RateLimited(), RateLimited(), 7])
+    assert cache.get("busy", stats) == 7
+
+
+def test_rate_limit_never_becomes_none(tmp_path):
+    cache = DownloadCountCache(str(tmp_path / "c.sqlite"), retries=1, backoff=0.01)
+    with pytest.raises(RateLimited):
+        cache.get("busy", FakeStats([RateLimited(), RateLimited()]))
+
+
+def test_stale_while_revalidate(tmp_path):
+    cache = DownloadCountCache(str(tmp_path / "counts.sqlite"), ttl=0.1)
+    assert cache.get("pkg", FakeStats([1])) == 1
+    time.sleep(0.2)
+    stats = FakeStats([2])
+    assert cache.get("pkg", stats) == 1
+    cache.wait_for_refreshes()
+    assert cache.get("pkg", stats) == 2
+
+
+def test_offline_keeps_cached_count(tmp_path):
+    path = str(tmp_path / "counts.sqlite")
+    assert DownloadCountCache(path, ttl=0.1).get("pkg", FakeStats([5])) == 5
+    time.sleep(0.2)
+    # stale, so revalidated in the background, then expired, so fetched
+    for cache in (DownloadCountCache(path, ttl=0.1), DownloadCountCache(path, 0, 0)):
+        assert cache.get("pkg", FakeStats([Offline()] * 2)) == 5
+        cache.wait_for_refreshes()
+    assert DownloadCountCache(path, 0, 0).get("pkg", FakeStats([6])) == 6
+
+    # nothing cached, nothing written
+    cache = DownloadCountCache(path)
+    with pytest.raises(Offline):
+        cache.get("other", FakeStats([Offline()]))
+    assert cache.get("other", FakeStats([7])) == 7
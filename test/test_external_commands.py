@@ -0,0 +1,52 @@
+# coding=utf-8
+"""
+Read only analyzers, run concurrently, some in a warm pool
+"""
+import functools
+
+import pytest
+
+from cheese_grader.cli_clients import external_commands
+from cheese_grader.cli_clients.warm_pool import WarmPool, run_entry_point
+
+
+def test_run_analyzers(tmp_path):
+    (tmp_path / "test_one.py").write_text("def test_one():\n    pass\n")
+    results = external_commands.run_analyzers(
+        str(tmp_path), ["pytest_detect", "vermin"], timeout=60
+    )
+    assert sorted(results) == ["pytest_detect", "vermin"]
+    assert "test_one" in results["pytest_detect"].output
+    # not installed here, reported, not raised
+    assert results["vermin"].error in ("", "missing")
+
+
+def test_run_analyzers_warm(tmp_path):
+    # any entry point will do, json.tool rejects isort's arguments
+    tools = {"isort": functools.partial(run_entry_point, "json.tool:main")}
+    with WarmPool(tools, max_workers=1, preload=[]) as pool:
+        results = external_commands.run_analyzers(
+            str(tmp_path), ["isort"], timeout=60, pool=pool
+        )
+    assert results["isort"].error == ""
+    assert results["isort"].return_code == 2
+
+
+def test_run_analyzers_warm_relative_folder(tmp_path, monkeypatch):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("x = 1\n")
+    monkeypatch.chdir(tmp_path)
+    # tabnanny -v names every file it checks
+    analyzers = external_commands.READ_ONLY_ANALYZERS
+    monkeypatch.setitem(analyzers, "isort", lambda folder: ["isort", "-v", folder])
+    tools = {"isort": functools.partial(run_entry_point, "tabnanny:main")}
+    with WarmPool(tools, max_workers=1, preload=[]) as pool:
+        results = external_commands.run_analyzers(
+            "pkg", ["isort"], timeout=60, pool=pool
+        )
+    assert "'./a.py': Clean bill of health." in results["isort"].output
+
+
+def test_unknown_analyzer(tmp_path):
+    with pytest.raises(ValueError):
+        external_commands.run_analyzers(str(tmp_path), ["black", "rm"])
@@ -0,0 +1,169 @@
+# coding=utf-8
+"""
+Bulk grading against a local stub PyPI
+"""
+import hashlib
+import io
+import json
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+# pylint: disable=wrong-import-position
+from cheese_grader.grading import (  # noqa: E402
+    UNKNOWN,
+    GradeOptions,
+    grade_stream,
+)
+from cheese_grader.lockfiles import Pin  # noqa: E402
+from cheese_grader.signals import REJECT, Tier  # noqa: E402
+from cheese_grader.storage.name_index import NameIndex  # noqa: E402
+
+
+def make_sdist() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, text in (
+            ("good-1.0/good/__init__.py", "def hello():\n    return 1\n"),
+            ("good-1.0/README.md", "# good\n"),
+        ):
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+SDIST = make_sdist()
+
+
+class StubPyPI(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, data):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path == "/files/good-1.0.tar.gz":
+            self.reply(200, SDIST)
+        elif self.path == "/pypi/good/json":
+            file = {
+                "filename": "good-1.0.tar.gz",
+                "packagetype": "sdist",
+                "url": f"{base}/files/good-1.0.tar.gz",
+                "digests": {"sha256": hashlib.sha256(SDIST).hexdigest()},
+            }
+            body = {
+                "info": {"name": "good", "version": "1.0", "author": "Ann"},
+                "releases": {"1.0": [dict(file, upload_time="2020-01-01T00:00:00")]},
+                "urls": [file],
+            }
+            self.reply(200, json.dumps(body).encode("utf-8"))
+        elif self.path.startswith("/api/packages/good/"):
+            rows = [{"category": "without_mirrors", "downloads": 1000}]
+            self.reply(200, json.dumps({"data": rows}).encode("utf-8"))
+        else:
+            self.reply(404, b"{}")
+
+
+@pytest.fixture
+def options(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHEESE_GRADER_CACHE", str(tmp_path))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubPyPI)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield GradeOptions(Tier.MEDIUM, pypi_url=url, pypistats_url=url)
+    httpd.shutdown()
+
+
+def test_grade_stream(options):
+    pins = [Pin("good", None), Pin("missing", None), Pin("good", "1.0")]
+    records = {_["name"]: _ for _ in grade_stream(pins, options, workers=2)}
+    assert sorted(records) == ["good", "missing"]
+    assert records["missing"]["decision"] == REJECT
+    good = records["good"]
+    assert good["error"] == "" and good["version"] == "1.0"
+    assert good["signals"]["has_readme"]["score"] == 1.0
+    assert good["cached"] == []
+
+    # second run, in process, source signals come from the score cache
+    again = list(grade_stream([Pin("good", "1.0")], options, workers=1))
+    assert "has_readme" in again[0]["cached"]
+    assert again[0]["score"] == good["score"]
+
+
+def test_name_index_used_when_built(options):
+    pins = [Pin("good", "1.0")]
+    record = next(grade_stream(pins, options._replace(use_cache=False)))
+    assert record["signals"]["typosquat"]["reason"] == "no name index"
+
+    index = NameIndex()
+    index.update([("goods", 10**9), ("good", 1000)])
+    index.save()
+    record = next(grade_stream(pins, options._replace(use_cache=False)))
+    assert record["signals"]["typosquat"]["reason"] == "1 edit from goods"
+
+
+def test_offline_without_mirror_is_unknown(options):
+    pins = [Pin("good", "1.0"), Pin("missing", None)]
+    records = list(grade_stream(pins, options._replace(offline=True)))
+    # nothing mirrored yet, that isn't "not on PyPI"
+    assert [_["decision"] for _ in records] == [UNKNOWN, UNKNOWN]
+    assert records[0]["error"].startswith("offline: ")
+
+    # an online run fills the mirror, then offline has metadata to grade with
+    list(grade_stream(pins, options))
+    records = list(grade_stream(pins, options._replace(offline=True)))
+    assert records[0]["error"] == "" and records[0]["version"] == "1.0"
+
+
+def test_cli_writes_ndjson(options, tmp_path, monkeypatch):
+    pytest.importorskip("docopt")
+    from cheese_grader import grading, lockfiles, main
+
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("good==1.0\n# comment\nmissing\n")
+    pins = lockfiles.read_sources([str(requirements), "good", "other===2.0"])
+    assert pins == [
+        Pin("good", "1.0"),
+        Pin("missing", None),
+        Pin("good", None),
+        Pin("other", "2.0"),
+    ]
+
+    # point the CLI's default options at the stub
+    monkeypatch.setattr(
+        grading, "GradeOptions", lambda **kwargs: options._replace(**kwargs)
+    )
+    output = tmp_path / "grades.ndjson"
+    arguments = {
+        "grade": True,
+        "<source>": [str(requirements)],
+        "--workers": "1",
+        "--tier": "cheap",
+        "--offline": False,
+        "--no-cache": True,
+        "--population": None,
+        "--dev": False,
+        "--output": str(output),
+    }
+    assert main.process_docopts(arguments) == 0
+    lines = [json.loads(_) for _ in output.read_text().splitlines()]
+    assert [_["name"] for _ in lines] == ["good", "missing"]
+    assert "has_readme" not in lines[0]["signals"]
+
+    for workers in ("0", "abc", "-2"):
+        with pytest.raises(SystemExit, match="--workers must be a number"):
+            main.process_docopts(dict(arguments, **{"--workers": workers}))
@@ -0,0 +1,133 @@
+# coding=utf-8
+"""
+Incremental index mirror against a local stub index
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+# pylint: disable=wrong-import-position
+from cheese_grader.api_clients.pypi_batch import MetadataFetcher  # noqa: E402
+from cheese_grader.storage.download_counts import Offline  # noqa: E402
+from cheese_grader.storage.index_mirror import IndexMirror  # noqa: E402
+
+SERIALS = {}
+HITS = []
+
+
+def document(path):
+    """(etag, body) for a path, None if no such page"""
+    if path == "/simple/":
+        projects = [{"name": k, "_last-serial": v} for k, v in SERIALS.items()]
+        body = {"meta": {"api-version": "1.1"}, "projects": projects}
+    else:
+        parts = path.strip("/").split("/")
+        name = parts[1]
+        if name not in SERIALS:
+            return None
+        serial = SERIALS[name]
+        if parts[0] == "simple":
+            body = {"meta": {"_last-serial": serial}, "name": name, "files": []}
+        else:
+            version = parts[2] if len(parts) == 4 else f"1.{serial}"
+            body = {"info": {"name": name, "version": version}, "releases": {}}
+    data = json.dumps(body).encode("utf-8")
+    return f'"{hash(data)}"', data
+
+
+class StubIndex(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        HITS.append(self.path)
+        found = document(self.path)
+        if found is None:
+            status, etag, data = 404, None, b""
+        elif self.headers.get("If-None-Match") == found[0]:
+            status, etag, data = 304, found[0], b""
+        else:
+            status, (etag, data) = 200, found
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server():
+    del HITS[:]
+    SERIALS.clear()
+    SERIALS.update({"alpha": 1, "beta": 2})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubIndex)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_incremental_sync(server, tmp_path):
+    mirror = IndexMirror(str(tmp_path / "mirror.sqlite"), server, max_workers=2)
+    first = mirror.sync()
+    assert (first.checked, first.fetched, first.failed) == (2, 4, [])
+    assert mirror.project_json("Alpha")["info"]["version"] == "1.1"
+
+    del HITS[:]
+    assert mirror.sync().checked == 0
+    assert HITS == ["/simple/"]
+
+    SERIALS["beta"] = 3
+    del HITS[:]
+    again = mirror.sync()
+    assert again.checked == 1
+    assert sorted(HITS) == ["/pypi/beta/json", "/simple/", "/simple/beta/"]
+    assert mirror.release_json("beta", "1.3")["info"]["version"] == "1.3"
+    assert mirror.release_json("beta", "1.2") is None
+
+    # named projects are asked for conditionally
+    named = mirror.sync(["alpha", "gone"])
+    assert (named.unchanged, named.missing) == (2, 2)
+    assert not mirror.exists("gone")
+
+
+def test_offline_fetcher(server, tmp_path):
+    mirror = IndexMirror(str(tmp_path / "mirror.sqlite"), server)
+    mirror.sync(["alpha"])
+    assert mirror.exists("alpha") and not mirror.exists("beta")
+
+    # nothing listens on the discard port, any network use would fail
+    fetcher = MetadataFetcher("http://127.0.0.1:9", mirror=mirror, offline=True)
+    info = fetcher.fetch_one("alpha")
+    assert info.metadata["info"]["name"] == "alpha" and info.error == ""
+    # not mirrored isn't the same as not on PyPI
+    with pytest.raises(Offline):
+        fetcher.find_project("beta")
+    with pytest.raises(Offline):
+        fetcher.fetch_release("alpha", "0.1")
+    assert fetcher.fetch_one("beta").error
+    with pytest.raises(Offline):
+        fetcher.fetch_downloads("alpha")
+    wheel = {
+        "filename": "alpha-1.0-py3-none-any.whl",
+        "url": "http://127.0.0.1:9/alpha-1.0-py3-none-any.whl",
+        "digests": {"sha256": "0" * 64},
+    }
+    with pytest.raises(Offline):
+        fetcher.fetch_wheel_metadata(wheel)
+
+
+def test_fetcher_writes_through(server, tmp_path):
+    mirror = IndexMirror(str(tmp_path / "mirror.sqlite"), server)
+    fetcher = MetadataFetcher(server, mirror=mirror)
+    fetcher.fetch_release("beta", "0.9")
+    del HITS[:]
+    assert fetcher.fetch_release("beta", "0.9")["info"]["version"] == "0.9"
+    assert not HITS
@@ -0,0 +1,68 @@
+# coding=utf-8
+"""
+In process line counting
+"""
+from cheese_grader.line_counts import (
+    LineCount,
+    LineCountCache,
+    by_language,
+    count_files,
+    count_python,
+    count_sources,
+    total_code,
+)
+
+SOURCE = b'''"""Module docstring
+spans lines
+"""
+# a comment
+import os  # trailing comments don't make a comment line
+
+x = [
+    1,
+
+    2,
+]
+
+
+def f():
+    """doc"""
+    text = """a string,
+not a docstring"""
+    return text
+'''
+
+
+def test_count_python():
+    assert count_python(SOURCE) == LineCount(code=9, comment=1, docstring=4, blank=4)
+    # python 2 falls back to text counting rather than failing
+    assert count_python(b'print "x"\n# c\n') == LineCount(1, 1, 0, 0)
+
+
+def test_languages_binaries_and_cache(tmp_path):
+    files = {
+        "a.py": SOURCE,
+        "b.yml": b"# comment\nkey: value\n\n",
+        "c.bin": b"\0\1\2",
+        "README": b"Prose, not code\n",
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    paths = [str(tmp_path / name) for name in files]
+    cache_file = str(tmp_path / "cache.json")
+    counts = count_files(paths, LineCountCache(cache_file))
+    assert str(tmp_path / "c.bin") not in counts
+    totals = by_language(counts.values())
+    assert totals["yaml"] == LineCount(1, 1, 0, 1)
+    assert totals["text"].code == 1
+    assert total_code(counts.values()) == 10
+
+    cache = LineCountCache(cache_file)
+    assert len(cache.entries) == 3
+    assert count_files(paths, cache) == counts
+    assert not cache.dirty
+
+
+def test_pool_gives_same_answers():
+    sources = [(f"m{number}.py", SOURCE + b"y = 1\n" * number) for number in range(250)]
+    assert count_sources(sources, workers=2) == count_sources(sources, workers=1)
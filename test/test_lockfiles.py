@@ -0,0 +1,35 @@
+# coding=utf-8
+"""
+requirements.txt includes & constraints
+"""
+import pytest
+
+from cheese_grader.lockfiles import Pin, read_lockfile, read_requirements_txt
+
+
+def test_constraints_only_pin(tmp_path):
+    (tmp_path / "constraints.txt").write_text("six==1.16.0\nurllib3==1.26.0\n")
+    (tmp_path / "base.txt").write_text("six\n")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("-r base.txt\n-c constraints.txt\nrequests==2.25.1\n")
+    # urllib3 is only constrained, nothing installs it
+    assert read_requirements_txt(str(requirements)) == [
+        Pin("six", "1.16.0"),
+        Pin("requests", "2.25.1"),
+    ]
+
+
+def test_missing_include(tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("-r nope.txt\n")
+    with pytest.raises(ValueError, match="requirements.txt includes missing file"):
+        read_requirements_txt(str(requirements))
+
+
+def test_include_cycle(tmp_path):
+    (tmp_path / "a.txt").write_text("-r b.txt\nsix\n")
+    (tmp_path / "b.txt").write_text("-r a.txt\nsix\nattrs\n")
+    assert read_lockfile(str(tmp_path / "a.txt")) == [
+        Pin("six", None),
+        Pin("attrs", None),
+    ]
@@ -0,0 +1,60 @@
+# coding=utf-8
+"""
+Local metadata store
+"""
+from cheese_grader.storage import metadata_store
+from cheese_grader.storage.metadata_store import MetadataStore
+
+
+def sample(name, versions=("1.0", "1.1")):
+    return {
+        "info": {
+            "name": name,
+            "version": versions[-1],
+            "author": "Ann",
+            "author_email": "ann@example.com",
+            "maintainer_email": "bob@example.com",
+            "classifiers": ["Development Status :: 5 - Production/Stable"],
+            "requires_dist": ["requests>=2"],
+            "project_urls": {"Homepage": "https://example.com"},
+        },
+        "releases": {
+            version: [{"upload_time_iso_8601": f"2020-0{i + 1}-01T00:00:00Z"}]
+            for i, version in enumerate(versions)
+        },
+    }
+
+
+def test_upsert_and_query(tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.sqlite"))
+    assert store.upsert_many([(sample("Foo_Bar"), 10), (sample("baz", ("0.1",)), 2)])
+    row = store.package("foo.bar")
+    assert row["release_count"] == 2
+    assert row["maintainer_count"] == 2
+    assert row["homepage"] == "https://example.com"
+    assert row["last_upload"].startswith("2020-02")
+    assert row["downloads"] == 10
+    assert store.raw("foo-bar")["info"]["name"] == "Foo_Bar"
+    assert sorted(store.packages(["FOO-BAR", "baz", "nope"])) == ["baz", "foo-bar"]
+    stable = store.query(
+        "SELECT name FROM classifiers WHERE classifier LIKE ?", ["%Stable%"]
+    )
+    assert len(stable) == 2
+
+
+def test_upsert_keeps_downloads(tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.sqlite"))
+    store.upsert_many([(sample("foo"), 10)])
+    store.upsert_many([(sample("foo", ("1.0", "1.1", "1.2")), None)])
+    assert store.package("foo")["downloads"] == 10
+    assert store.package("foo")["release_count"] == 3
+
+
+def test_reprocess_after_normalizer_change(tmp_path, monkeypatch):
+    store = MetadataStore(str(tmp_path / "meta.sqlite"))
+    store.upsert_many([(sample("foo"), 10)])
+    assert store.reprocess() == 0
+    monkeypatch.setattr(metadata_store, "NORMALIZER_VERSION", 2)
+    assert store.reprocess() == 1
+    assert store.package("foo")["normalizer"] == 2
+    assert store.package("foo")["downloads"] == 10
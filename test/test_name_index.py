@@ -0,0 +1,70 @@
+# coding=utf-8
+"""
+Near name lookups over PyPI names
+"""
+from cheese_grader.signals import Engine, PackageContext, Tier
+from cheese_grader.storage.name_index import NameIndex, edit_distance
+
+SNAPSHOT = [
+    ("requests", 500_000_000),
+    ("Django", 100_000_000),
+    ("numpy", 400_000_000),
+    ("reqeusts", 50),
+    ("obscure_thing", 10),
+    ("no-count", None),
+]
+
+
+def test_edit_distance():
+    assert edit_distance("reqeusts", "requests", 2) == 1
+    assert edit_distance("request", "requests", 2) == 1
+    assert edit_distance("numpy", "django", 2) == 3
+
+
+def test_near_popular_names(tmp_path):
+    index = NameIndex(str(tmp_path / "names.tsv.gz"), popular=3)
+    assert index.update(SNAPSHOT) == 6
+    assert index.exists("DJANGO")
+    assert index.near("reqeusts")[0].name == "requests"
+    assert [_.name for _ in index.near("djang0")] == ["django"]
+    assert index.near("obscure-thing") == []
+    # only popular names are targets
+    assert index.near("obscure-thin") == []
+
+    index.save()
+    loaded = NameIndex(index.path, popular=3)
+    assert loaded.names == index.names
+    assert loaded.popular == {"requests", "django", "numpy"}
+
+
+def test_two_edits_only_for_longer_names(tmp_path):
+    index = NameIndex(str(tmp_path / "names.tsv.gz"), popular=3)
+    index.update(SNAPSHOT)
+    assert index.near("reqeustz")[0].distance == 2
+    # numpy is too short for two edits to mean anything
+    assert index.near("nupmx") == []
+    assert index.near("nupmy")[0].name == "numpy"
+
+
+def test_incremental_update(tmp_path):
+    index = NameIndex(str(tmp_path / "names.tsv.gz"), popular=3)
+    index.update(SNAPSHOT)
+    assert index.near("djang0")
+    # pushes django out of the top 3, no count keeps the old one
+    assert index.update([("pandas", 450_000_000), ("numpy", None)]) == 1
+    assert not index.near("djang0")
+    assert index.near("nunpy")
+    assert index.near("panda")[0].name == "pandas"
+
+
+def test_typosquat_signal(tmp_path):
+    index = NameIndex(str(tmp_path / "names.tsv.gz"), popular=3)
+    index.update(SNAPSHOT)
+    engine = Engine(max_tier=Tier.CHEAP)
+    metadata = {"info": {}, "releases": {"1.0": [{"upload_time": "2020-01-01"}]}}
+    context = PackageContext(
+        "reqeusts", metadata=metadata, downloads=50, name_index=index
+    )
+    assert engine.grade(context).signals["typosquat"].reason == "1 edit from requests"
+    context = PackageContext("requests", metadata=metadata, name_index=index)
+    assert engine.grade(context).signals["typosquat"].score is None
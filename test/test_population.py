@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+Population percentiles & inverse frequency weights
+"""
+import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+# pylint: disable=wrong-import-position
+from cheese_grader.population import Population  # noqa: E402
+from cheese_grader.signals import Engine, PackageContext  # noqa: E402
+from cheese_grader.storage.metadata_store import MetadataStore  # noqa: E402
+
+
+def test_percentiles_and_weights():
+    # most packages are barely downloaded
+    downloads = [0] * 50 + [10] * 40 + [1000] * 9 + [10 ** 6]
+    population = Population([f"p{_}" for _ in range(100)], {"downloads": downloads})
+    ranks = population.rank({"downloads": [0, 10, 10 ** 6, None]})
+    assert np.allclose(ranks.percentiles["downloads"][:3], [0.25, 0.7, 0.995])
+    assert np.isnan(ranks.percentiles["downloads"][3])
+    # bottom half of PyPI is not remarkable, nothing below it at all is
+    weights = population.weights("downloads", [0, 10, -1])
+    assert weights[0] < 0.2 and weights[1] < weights[0] and weights[2] == 1.0
+    approximate = population.approximate_percentiles("downloads", [0, 10, 10 ** 6])
+    assert np.allclose(approximate, [0.25, 0.7, 0.995], atol=0.01)
+    assert population.percentile("age_days", 3) is None
+
+
+def test_from_store_save_load(tmp_path):
+    store = MetadataStore(str(tmp_path / "meta.sqlite"))
+    rows = []
+    for i in range(5):
+        upload = {"upload_time": f"2020-01-0{i + 1}T00:00:00"}
+        metadata = {"info": {"name": f"pkg{i}"}, "releases": {"1.0": [upload]}}
+        rows.append((metadata, i * 100))
+    store.upsert_many(rows)
+    now = datetime.datetime(2020, 1, 11, tzinfo=datetime.timezone.utc)
+    population = Population.from_store(store, now)
+    assert len(population) == 5
+    assert sorted(population.columns["age_days"]) == [6, 7, 8, 9, 10]
+
+    population.save(str(tmp_path / "population.npz"))
+    loaded = Population.load(str(tmp_path / "population.npz"))
+    assert list(loaded.names) == list(population.names)
+    assert loaded.percentile("downloads", 200) == 0.5
+
+
+def test_signals_rank_against_population():
+    population = Population(["a", "b", "c", "d"], {"downloads": [1, 2, 3, 4]})
+    metadata = {"info": {}, "releases": {"1.0": [{"upload_time": "2020-01-01"}]}}
+    grade = Engine().grade(
+        PackageContext("pkg", metadata=metadata, downloads=3, population=population)
+    )
+    # 62.5% percentile, but a quarter of packages are as low, so not 0.625
+    assert grade.signals["downloads"].score == pytest.approx(0.922, abs=0.001)
+    assert grade.signals["age"].reason.startswith("first upload")
+
+    # being at the bottom costs more when hardly anyone else is there
+    common = Population(["a", "b", "c", "d"], {"downloads": [1, 1, 1, 4]})
+    rare = Population(["a", "b", "c", "d"], {"downloads": [1, 4, 4, 4]})
+    scores = [
+        Engine()
+        .grade(PackageContext("pkg", metadata=metadata, downloads=1, population=_))
+        .signals["downloads"]
+        .score
+        for _ in (common, rare)
+    ]
+    assert scores[0] > scores[1]
@@ -0,0 +1,90 @@
+# coding=utf-8
+"""
+Batched metadata fetching against a local stub server
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+# pylint: disable=wrong-import-position
+from cheese_grader.api_clients.pypi_batch import MetadataFetcher  # noqa: E402
+from cheese_grader.storage import download_counts  # noqa: E402
+
+HITS = []
+
+
+class StubIndex(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        HITS.append(self.path)
+        if self.path == "/pypi/busy/json" and HITS.count(self.path) == 1:
+            self.reply(429, {}, {"Retry-After": "0"})
+        elif self.path.startswith("/api/packages/slow/") and HITS.count(self.path) == 1:
+            self.reply(429, {}, {"Retry-After": "3600"})
+        elif self.path.startswith("/pypi/missing/"):
+            self.reply(404, {})
+        elif self.path.startswith("/pypi/"):
+            name = self.path.split("/")[2]
+            self.reply(200, {"info": {"name": name}})
+        else:
+            rows = [
+                {"category": "without_mirrors", "downloads": 5},
+                {"category": "without_mirrors", "downloads": 6},
+                {"category": "with_mirrors", "downloads": 100},
+            ]
+            self.reply(200, {"data": rows})
+
+
+@pytest.fixture
+def server():
+    del HITS[:]
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubIndex)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_fetch_many(server):
+    with MetadataFetcher(server, server, max_workers=3, backoff=0.01) as fetcher:
+        results = {
+            info.name: info
+            for info in fetcher.fetch_many(["Foo", "foo", "busy", "missing"])
+        }
+    assert sorted(results) == ["busy", "foo", "missing"]
+    assert results["foo"].metadata == {"info": {"name": "foo"}}
+    assert results["foo"].downloads == 11
+    assert results["busy"].downloads == 11
+    assert results["missing"].metadata is None
+    assert HITS.count("/pypi/foo/json") == 1
+    assert HITS.count("/pypi/busy/json") == 2
+
+
+def test_counts_retried_in_one_layer(server, tmp_path):
+    slept = []
+    counts = download_counts.DownloadCountCache(
+        str(tmp_path / "counts.sqlite"), retries=2, backoff=0.01, sleep=slept.append
+    )
+    with MetadataFetcher(server, server, retries=3, backoff=0.01) as fetcher:
+        assert fetcher.fetch_one("slow", counts=counts).downloads == 11
+    # one request per cache attempt, and an hour's Retry-After isn't obeyed
+    assert len([_ for _ in HITS if _.startswith("/api/packages/slow/")]) == 2
+    assert len(slept) == 1
+    assert slept[0] <= download_counts.MAX_RETRY_AFTER + 0.01
@@ -0,0 +1,80 @@
+# coding=utf-8
+"""
+Stdlib & popular package shadowing, from archive listings
+"""
+import zipfile
+
+from cheese_grader.archives import open_archive
+from cheese_grader.shadowing import (
+    BACKPORT,
+    POPULAR,
+    STDLIB,
+    STDLIB_BY_VERSION,
+    check_modules,
+    conflicts,
+    top_level_modules,
+)
+
+
+def write_wheel(path, files):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, text in files.items():
+            archive.writestr(name, text)
+
+
+def test_stdlib_tables():
+    assert "tomllib" in STDLIB_BY_VERSION["3.11"]
+    assert "tomllib" not in STDLIB_BY_VERSION["3.10"]
+    assert "asyncore" in STDLIB_BY_VERSION["3.11"]
+    assert "asyncore" not in STDLIB_BY_VERSION["3.12"]
+    assert "ConfigParser" in STDLIB_BY_VERSION["2.7"]
+    assert "asyncio" not in STDLIB_BY_VERSION["2.7"]
+
+
+def test_top_level_from_record_and_listing(tmp_path):
+    wheel = str(tmp_path / "evil-1.0-py3-none-any.whl")
+    write_wheel(
+        wheel,
+        {
+            "email/__init__.py": "",
+            "yaml.py": "",
+            "_speedups.cpython-311-x86_64-linux-gnu.so": "",
+            "evil-1.0.dist-info/METADATA": "",
+            "evil-1.0.dist-info/RECORD": "email/__init__.py,,\nyaml.py,,\n"
+            "_speedups.cpython-311-x86_64-linux-gnu.so,,\n"
+            "evil-1.0.dist-info/RECORD,,\n",
+        },
+    )
+    with open_archive(wheel) as tree:
+        assert top_level_modules(tree) == {"email", "yaml", "_speedups"}
+
+    sdist = str(tmp_path / "plain.zip")
+    write_wheel(
+        sdist,
+        {
+            "plain-1.0/setup.py": "",
+            "plain-1.0/src/plain/__init__.py": "",
+            "plain-1.0/tests/__init__.py": "",
+        },
+    )
+    with open_archive(sdist) as tree:
+        assert top_level_modules(tree) == {"plain"}
+
+
+def test_check_modules():
+    shadows = check_modules("evil", ["email", "yaml", "evil", "asyncore"])
+    assert [(_.module, _.kind) for _ in shadows] == [
+        ("asyncore", STDLIB),
+        ("email", STDLIB),
+        ("yaml", POPULAR),
+    ]
+    assert shadows[0].detail == "2.7, 3.6-3.11"
+    # only matters for the pythons actually supported
+    assert check_modules("evil", ["asyncore"], versions=["3.12"]) == []
+    assert check_modules("PyYAML", ["yaml"]) == []
+    assert check_modules("enum34", ["enum"])[0].kind == BACKPORT
+
+
+def test_lockfile_conflicts():
+    installs = {"a": {"utils", "a"}, "b": {"utils", "b"}, "c": {"c"}}
+    assert conflicts(installs) == {"utils": ["a", "b"]}
@@ -0,0 +1,157 @@
+# coding=utf-8
+"""
+Cost tiered signal engine
+"""
+from cheese_grader.signals import EVALUATORS, Engine, PackageContext, REJECT
+from cheese_grader.signals.engine import Evaluator, Signal, Tier
+from cheese_grader.storage.score_cache import ScoreCache
+
+RAN = []
+
+
+def make(name, tier, signal, depends_on=()):
+    def func(context):
+        RAN.append(name)
+        return signal
+
+    return Evaluator(name, func, tier, tuple(depends_on), 1.0, "1")
+
+
+def test_cheap_first_and_short_circuit():
+    del RAN[:]
+    engine = Engine(
+        [
+            make("lint", Tier.EXPENSIVE, Signal(1.0)),
+            make("loc", Tier.MEDIUM, Signal(0.0, "no code", REJECT)),
+            make("name", Tier.CHEAP, Signal(1.0)),
+            make("compiles", Tier.MEDIUM, Signal(1.0)),
+            make("tests", Tier.CHEAP, Signal(1.0), depends_on=["lint"]),
+        ]
+    )
+    grade = engine.grade(PackageContext("junk"))
+    assert RAN == ["name", "compiles", "loc"]
+    assert grade.decision == REJECT
+    assert grade.score == 0.0
+    assert set(grade.skipped) == {"lint", "tests"}
+
+
+def test_source_only_loaded_if_needed():
+    loaded = []
+
+    def load_source(context):
+        loaded.append(context.name)
+        return "/tmp/src"
+
+    engine = Engine(
+        [
+            make("parked", Tier.CHEAP, Signal(0.0, "parked", REJECT)),
+            Evaluator(
+                "uses_source",
+                lambda context: Signal(1.0, context["source"]),
+                Tier.MEDIUM,
+                (),
+                1.0,
+                "1",
+            ),
+        ]
+    )
+    engine.grade(PackageContext("parked", loaders={"source": load_source}))
+    assert loaded == []
+
+
+def test_metadata_signals():
+    assert "parked" in EVALUATORS
+    missing = Engine().grade(PackageContext("nope", metadata=None))
+    assert missing.decision == REJECT
+    assert missing.signals["on_pypi"].reason == "not on PyPI"
+    # dependents of a rejected signal don't run, so don't fail either
+    assert missing.skipped["parked"] == "needs on_pypi"
+    assert not [_ for _ in missing.skipped.values() if _.startswith("error:")]
+    assert "downloads" not in missing.signals
+
+    metadata = {
+        "info": {
+            "summary": "This name is parked to prevent typosquatting",
+            "author_email": "a@example.com",
+        },
+        "releases": {"0.0.1": [{"upload_time": "2020-01-01T00:00:00"}]},
+    }
+    parked = Engine().grade(PackageContext("pkg", metadata=metadata, downloads=3))
+    assert parked.decision == REJECT
+    assert "downloads" in parked.signals
+
+    metadata["info"]["summary"] = "Useful thing"
+    metadata["releases"]["0.0.2"] = [{"upload_time": "2021-01-01T00:00:00"}]
+    good = Engine().grade(PackageContext("pkg", metadata=metadata, downloads=10**6))
+    assert good.decision == ""
+    assert good.signals["release_count"].score == 0.5
+    assert good.signals["downloads"].score == 1.0
+    assert 0 < good.score < 1
+
+
+def test_parked_needs_summary_or_no_code():
+    releases = {"1.0": [{"upload_time": "2020-01-01T00:00:00", "size": 2000}]}
+    info = {"summary": "Fast thing", "description": "Use {name} as a placeholder"}
+    metadata = {"info": info, "releases": releases}
+    stub = Engine().grade(PackageContext("pkg", metadata=metadata, downloads=3))
+    assert stub.decision == REJECT
+
+    releases["1.0"][0]["size"] = 200_000
+    real = Engine().grade(PackageContext("pkg", metadata=metadata, downloads=3))
+    assert real.decision == ""
+    assert real.signals["parked"].score == 0.3
+
+
+def test_score_cache(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    evaluators = [
+        make("name", Tier.CHEAP, Signal(1.0)),
+        make("compiles", Tier.MEDIUM, Signal(1.0)),
+        make("lint", Tier.EXPENSIVE, Signal(0.5)),
+    ]
+    del RAN[:]
+    first = Engine(evaluators, cache=cache).grade(
+        PackageContext("Pkg", "1.0", digest="abc")
+    )
+    again = Engine(evaluators, cache=cache).grade(
+        PackageContext("pkg", "1.0", digest="abc")
+    )
+    # cheap signals always re-run, the rest came from the cache
+    assert RAN == ["name", "compiles", "lint", "name"]
+    assert again.cached == ("compiles", "lint")
+    assert again.score == first.score
+
+    # a new lint only invalidates lint
+    del RAN[:]
+    evaluators[2] = evaluators[2]._replace(version="2")
+    bumped = Engine(evaluators, cache=cache).grade(
+        PackageContext("pkg", "1.0", digest="abc")
+    )
+    assert RAN == ["name", "lint"]
+    assert bumped.cached == ("compiles",)
+
+    # other artifact, nothing cached
+    other = Engine(evaluators, cache=cache).grade(
+        PackageContext("pkg", "1.0", digest="def")
+    )
+    assert other.cached == ()
+
+
+def test_dependency_bump_invalidates_dependents(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    evaluators = [
+        make("archive", Tier.MEDIUM, Signal(1.0)),
+        make("compiles", Tier.MEDIUM, Signal(1.0), ["archive"]),
+        make("lint", Tier.MEDIUM, Signal(0.5), ["compiles"]),
+        make("readme", Tier.MEDIUM, Signal(1.0)),
+    ]
+    Engine(evaluators, cache=cache).grade(PackageContext("pkg", "1.0", digest="a"))
+
+    # lint depends on archive only through compiles, still re-run
+    evaluators[0] = evaluators[0]._replace(version="2")
+    del RAN[:]
+    again = Engine(evaluators, cache=cache).grade(
+        PackageContext("pkg", "1.0", digest="a")
+    )
+    assert RAN == ["archive", "compiles", "lint"]
+    assert again.cached == ("readme",)
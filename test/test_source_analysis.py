@@ -0,0 +1,101 @@
+# coding=utf-8
+"""
+One parse, many answers
+"""
+from cheese_grader.source_analysis import (
+    AnalysisCache,
+    analyze_sources,
+    complexities,
+    dead_definitions,
+    import_graph,
+    module_name,
+    shadowing_modules,
+)
+
+FILES = {
+    "pkg/__init__.py": b"from . import core\nfrom .util import helper\n",
+    "pkg/core.py": b"""import os
+from .util import helper
+
+
+def list():
+    pass
+
+
+class Thing:
+    def used(self):
+        if os and helper:
+            for _ in range(3):
+                pass
+
+    def unused(self):
+        return 1
+
+
+def main():
+    Thing().used()
+""",
+    "pkg/util.py": b"""def helper():
+    try:
+        pass
+    except ValueError:
+        pass
+    except KeyError:
+        pass
+""",
+    "email.py": b"print 'python 2'\n",
+}
+
+
+def test_one_pass_answers():
+    analyses = analyze_sources(FILES.items())
+    assert module_name("src/pkg/__init__.py") == "pkg"
+    assert not analyses["email.py"].syntax.valid
+    assert analyses["email.py"].lines.code == 1
+    assert analyses["pkg/core.py"].shadowed_builtins == ["list"]
+
+    # same numbers as mccabe: `and` doesn't count, a try is handlers + 1
+    assert complexities(analyses)[:2] == [
+        ("pkg/util.py", "helper", 1, 4),
+        ("pkg/core.py", "Thing.used", 10, 3),
+    ]
+    assert import_graph(analyses)["pkg"] == {"pkg.core", "pkg.util"}
+    assert import_graph(analyses)["pkg.core"] == {"pkg.util"}
+    dead = [found.qualified_name for _, found in dead_definitions(analyses)]
+    assert dead == ["list", "Thing.unused"]
+    assert shadowing_modules(analyses) == ["email"]
+
+
+def test_complexity_like_mccabe():
+    source = b"""def outer(a):
+    def inner():
+        if a:
+            pass
+    match a:
+        case 1:
+            pass
+    return a or inner()
+
+
+class C:
+    def method(self):
+        return 1
+"""
+    analyses = analyze_sources([("m.py", source)])
+    found = {_[1]: _[3] for _ in complexities(analyses)}
+    # the closure & its if are folded into outer, match doesn't count
+    assert found["outer"] == 3
+    # and not reported again on its own, flake8 wouldn't
+    assert sorted(found) == ["C.method", "outer"]
+
+
+def test_cache_by_digest(tmp_path):
+    path = str(tmp_path / "analysis.json")
+    first = analyze_sources(FILES.items(), AnalysisCache(path))
+    cache = AnalysisCache(path)
+    assert analyze_sources(FILES.items(), cache) == first
+    assert not cache.dirty
+    # same bytes under another name, still a cache hit
+    moved = analyze_sources([("other/util.py", FILES["pkg/util.py"])], cache)
+    assert moved["other/util.py"].module == "other.util"
+    assert not cache.dirty
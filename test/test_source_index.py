@@ -0,0 +1,84 @@
+# coding=utf-8
+"""
+Stat cached file digests for the build
+"""
+import importlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def source_index(navio_settings):
+    # navio_tasks reads its settings on import
+    return importlib.import_module("navio_tasks.source_index")
+
+
+def counting_hashes(source_index, monkeypatch):
+    hashed = []
+    hash_file = source_index.hash_file
+
+    def hash_and_count(path):
+        hashed.append(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(source_index, "hash_file", hash_and_count)
+    return hashed
+
+
+def test_touch_without_change(source_index, tmp_path, monkeypatch):
+    hashed = counting_hashes(source_index, monkeypatch)
+    later = source_index.RACY_WINDOW_NS * 10
+    path = str(tmp_path / "a.py")
+    with open(path, "w") as file_handle:
+        file_handle.write("x = 1\n")
+    stat = os.stat(path)
+    index = source_index.SourceIndex(str(tmp_path / "state"))
+    first = index.digest(path, stat.st_mtime_ns + later)
+    assert index.digest(path, stat.st_mtime_ns + later) == first
+    assert len(hashed) == 1
+
+    # new mtime, same bytes, hashed again, same answer
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert index.digest(path, stat.st_mtime_ns + later) == first
+    assert len(hashed) == 2
+
+
+def test_same_size_edit_in_racy_window(source_index, tmp_path):
+    later = source_index.RACY_WINDOW_NS * 10
+    path = str(tmp_path / "a.py")
+    with open(path, "w") as file_handle:
+        file_handle.write("x = 1\n")
+    stat = os.stat(path)
+    index = source_index.SourceIndex(str(tmp_path / "state"))
+    # hashed right after the write, so the digest isn't kept
+    first = index.digest(path, stat.st_mtime_ns + 1)
+    assert index.entries[path][3] is None
+
+    # same size, same mtime tick, different bytes
+    with open(path, "w") as file_handle:
+        file_handle.write("x = 2\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    second = index.digest(path, stat.st_mtime_ns + later)
+    assert second != first
+    assert second == source_index.hash_file(path)
+
+
+def test_deleted_file_dropped(source_index, tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "keep.py").write_text("x = 1\n")
+    (source / "gone.py").write_text("y = 2\n")
+    state = str(tmp_path / "state")
+    index = source_index.SourceIndex(state)
+    assert len(index.scan(str(source))) == 2
+    index.save()
+
+    os.remove(source / "gone.py")
+    index = source_index.SourceIndex(state)
+    digests = index.scan(str(source))
+    assert [os.path.basename(_) for _ in digests] == ["keep.py"]
+    assert index.dirty
+    index.save()
+    entries = source_index.SourceIndex(state).entries
+    assert [os.path.basename(_) for _ in entries] == ["keep.py"]
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""
+Streaming subprocess runner
+"""
+import subprocess
+import sys
+import time
+
+import pytest
+
+from cheese_grader.cli_clients.subprocess_utils import (
+    execute_many,
+    execute_stream_lines,
+    execute_to_file,
+)
+
+
+def test_stream_lines():
+    code = "import sys;print('a');print('b', file=sys.stderr)"
+    command = [sys.executable, "-c", code]
+    assert sorted(execute_stream_lines(command)) == ["a", "b"]
+
+
+def test_stream_lines_truncated():
+    command = [sys.executable, "-c", "for i in range(1000): print('x' * 9)"]
+    lines = list(execute_stream_lines(command, max_bytes=100))
+    assert lines[:10] == ["x" * 9] * 10
+    assert "truncated after 100 bytes, 9900 bytes not shown" in lines[-1]
+    assert len(lines) == 11
+
+
+def test_stream_lines_no_hole_after_truncation():
+    code = "print('a' * 5);print('b' * 40);print('c' * 5)"
+    command = [sys.executable, "-c", code]
+    lines = list(execute_stream_lines(command, max_bytes=20))
+    assert lines == [
+        "aaaaa",
+        "[output truncated after 20 bytes, 47 bytes not shown]",
+    ]
+
+
+def test_stream_lines_long_line_in_pieces(monkeypatch):
+    from cheese_grader.cli_clients import subprocess_utils
+
+    monkeypatch.setattr(subprocess_utils, "LINE_LIMIT", 10)
+    command = [sys.executable, "-c", "print('x' * 25)"]
+    assert list(execute_stream_lines(command)) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_stream_lines_timeout():
+    code = "import time;print('a', flush=True);time.sleep(30)"
+    command = [sys.executable, "-c", code]
+    with pytest.raises(subprocess.TimeoutExpired):
+        assert list(execute_stream_lines(command, timeout=1)) == ["a"]
+
+
+def test_stream_lines_error():
+    command = [sys.executable, "-c", "print('a');raise SystemExit(3)"]
+    with pytest.raises(subprocess.CalledProcessError):
+        list(execute_stream_lines(command))
+    assert list(execute_stream_lines(command, ignore_error=True)) == ["a"]
+
+
+def test_to_file(tmp_path):
+    output = tmp_path / "out.txt"
+    command = [sys.executable, "-c", "print('hello')"]
+    assert execute_to_file(command, str(output)) == 0
+    assert output.read_text().strip() == "hello"
+
+
+def test_execute_many_runs_at_the_same_time():
+    sleep = [sys.executable, "-c", "import time;time.sleep(1);print('done')"]
+    start = time.perf_counter()
+    results = execute_many(
+        {"one": sleep, "two": sleep, "three": sleep, "missing": ["not_a_command_x"]},
+        max_concurrency=3,
+    )
+    assert time.perf_counter() - start < 2.5
+    assert results["one"].output.strip() == "done"
+    assert results["one"].return_code == 0
+    assert results["missing"].error == "missing"
+
+
+def test_execute_many_timeout_and_cap():
+    results = execute_many(
+        {
+            "slow": [sys.executable, "-c", "import time;time.sleep(30)"],
+            "loud": [sys.executable, "-c", "print('x' * 1000)"],
+        },
+        timeout=1,
+        max_bytes=10,
+    )
+    assert results["slow"].error == "timeout"
+    assert results["slow"].return_code is None
+    assert results["loud"].output.startswith("x" * 10 + "\n[output truncated")
@@ -0,0 +1,39 @@
+# coding=utf-8
+"""
+In process syntax check
+"""
+from cheese_grader.syntax_check import (
+    check_files,
+    check_source,
+    check_sources,
+    summarize,
+)
+
+
+def test_minimum_version():
+    assert check_source(b"x = 1\n").minimum == (3, 4)
+    assert check_source(b"if (x := 1):\n    pass\n").minimum == (3, 8)
+    assert check_source(b"def f(a, /):\n    pass\n").minimum == (3, 8)
+
+
+def test_errors_are_per_file():
+    result = check_source(b"print 'hello'\n", "old.py")
+    assert not result.valid
+    assert result.line == 1
+    # parses, but compile rejects it
+    assert not check_source(b"return 1\n").valid
+    assert not check_source(b"x = 1\0\n").valid
+
+
+def test_pool_gives_same_answers(tmp_path):
+    paths = []
+    for number in range(250):
+        path = tmp_path / f"m{number}.py"
+        path.write_text("x = 1\n" if number % 50 else "print 'x'\n")
+        paths.append(str(path))
+    serial = check_files(paths, workers=1)
+    assert check_files(paths, workers=2) == serial
+    summary = summarize(serial)
+    assert (summary.files, summary.valid) == (250, 245)
+    assert summary.minimum == (3, 4)
+    assert summarize(check_sources([("a.py", b"async def f(): pass\n")])).valid == 1
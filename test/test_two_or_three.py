@@ -0,0 +1,84 @@
+# coding=utf-8
+"""
+Python 2 vs 3 from tokens
+"""
+import os
+import tokenize
+
+from cheese_grader.two_or_three import (
+    POLYGLOT,
+    PY2,
+    PY3,
+    classify_file,
+    classify_files,
+    classify_source,
+)
+
+HERE = os.path.dirname(__file__)
+
+
+def test_sample_is_clearly_python2():
+    path = os.path.join(HERE, "..", "samples", "bad", "clearly_python2", "main.py")
+    with open(path, "rb") as file_handle:
+        result = classify_source(file_handle.read())
+    assert result.kind == PY2
+    assert result.confidence == 1.0
+
+
+def test_conclusive_syntax():
+    for source in [
+        b"try:\n    pass\nexcept X, e:\n    pass\n",
+        b"x = `a`\n",
+        b"x = ur'a'\n",
+        b"x = 0777\n",
+        b"x = 10L\n",
+        b"if a <> b: pass\n",
+        b"x = 1\nprint x\n",
+    ]:
+        assert classify_source(source).kind == PY2, source
+    for source in [
+        b"x = f'{a}'\n",
+        b"def f(a, *, b): pass\n",
+        b"def f(x) -> int: pass\n",
+        b"raise E('m') from e\n",
+    ]:
+        assert classify_source(source).kind == PY3, source
+    # valid in both
+    for source in [b"print('a', 'b')\n", b"x = 00\n", b"obj.print('x')\n"]:
+        assert classify_source(source).kind == POLYGLOT, source
+
+
+def test_py2_characters_when_tokenizer_gives_up(monkeypatch):
+    # what python 3.12's tokenizer does with a backtick
+    def refuse(readline):
+        raise tokenize.TokenError("invalid character '`'", (1, 4))
+
+    monkeypatch.setattr(tokenize, "tokenize", refuse)
+    assert classify_source(b"x = `a`\n").evidence == ["backticks (line 1)"]
+    assert classify_source(b"x = 1\nif a <> b: pass\n").kind == PY2
+    quoted = b"x = '`<>'  # `\ny = '''\n<>\n'''\n"
+    assert classify_source(quoted).evidence == ["could not tokenize"]
+
+
+def test_stops_at_first_conclusive_token():
+    source = b"print 'a'\nprint 'b'\n"
+    assert len(classify_source(source).evidence) == 1
+    assert len(classify_source(source, stop_early=False).evidence) == 2
+
+
+def test_hints_and_fallback():
+    source = b"for i in xrange(3):\n    print(i)\n"
+    assert classify_file("a.py", source, fallback=False).confidence < 0.6
+    assert classify_file("a.py", source).kind == PY2
+    future = b"from __future__ import print_function\nprint('x')\n"
+    assert classify_source(future).kind == POLYGLOT
+
+
+def test_package_verdict():
+    files = [(f"m{number}.py", b"print 'x'\n") for number in range(10)]
+    verdict, seen = classify_files(files + [("late.py", b"x = f'{y}'\n")])
+    assert verdict.kind == PY2
+    # enough conclusive files, the rest aren't read
+    assert len(seen) == 5
+    verdict, _ = classify_files([("a.py", b"print 'x'\n"), ("b.py", b"f'{x}'\n")])
+    assert verdict.confidence == 0.5
@@ -0,0 +1,38 @@
+# coding=utf-8
+"""
+Tools run in already warm worker processes
+"""
+import functools
+import json
+
+from cheese_grader.cli_clients.warm_pool import ToolJob, WarmPool, run_entry_point
+
+TOOLS = {"json": functools.partial(run_entry_point, "json.tool:main")}
+
+
+def test_jobs_are_isolated_by_folder(tmp_path):
+    good = tmp_path / "good"
+    bad = tmp_path / "bad"
+    for folder, text in [(good, json.dumps({"a": 1})), (bad, "{oops")]:
+        folder.mkdir()
+        (folder / "data.json").write_text(text)
+
+    with WarmPool(TOOLS, max_workers=1, preload=["json.tool"]) as pool:
+        # same relative path, different package folder
+        passed = pool.run("json", ["data.json"], cwd=str(good))
+        failed = pool.run("json", ["data.json"], cwd=str(bad))
+        again = list(pool.run_many([ToolJob("json", ["data.json"], str(good))] * 3))
+
+    assert passed.return_code == 0
+    assert json.loads(passed.output) == {"a": 1}
+    assert failed.return_code == 1
+    assert "Expecting property name" in failed.output
+    assert [_.output for _ in again] == [passed.output] * 3
+
+
+def test_missing_tool(tmp_path):
+    tools = {"nope": functools.partial(run_entry_point, "not_installed_tool:main")}
+    with WarmPool(tools, max_workers=1, preload=[]) as pool:
+        result = pool.run("nope", [], cwd=str(tmp_path))
+    assert result.error == "missing"
+    assert result.return_code is None
@@ -0,0 +1,144 @@
+# coding=utf-8
+"""
+Wheel METADATA via PEP 658, range requests and full download, against a
+local stub server
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+# pylint: disable=wrong-import-position
+from cheese_grader.api_clients.wheel_metadata import (  # noqa: E402
+    RemoteNotExtracted,
+    fetch_wheel_metadata,
+    open_remote_wheel,
+    requires_dist,
+)
+from cheese_grader.shadowing import top_level_modules  # noqa: E402
+from cheese_grader.storage.artifacts import ArtifactStore  # noqa: E402
+from cheese_grader.storage.download_counts import Offline  # noqa: E402
+
+METADATA = b"Metadata-Version: 2.1\nName: big\nVersion: 1.0\nRequires-Dist: six\n"
+
+
+def make_wheel() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        # incompressible, so the wheel really is big
+        archive.writestr("big/blob.bin", os.urandom(2 * 1024 * 1024))
+        archive.writestr("big/__init__.py", "")
+        archive.writestr("big-1.0.dist-info/METADATA", METADATA)
+        archive.writestr("big-1.0.dist-info/top_level.txt", "big\n")
+        archive.writestr("big-1.0.dist-info/RECORD", "")
+    return buffer.getvalue()
+
+
+WHEEL = make_wheel()
+SENT = []
+
+
+class StubFiles(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, data, headers=None):
+        SENT.append(len(data))
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.endswith(".metadata"):
+            self.reply(200, METADATA)
+            return
+        requested = self.headers.get("Range")
+        if self.path.startswith("/norange/") or not requested:
+            self.reply(200, WHEEL)
+            return
+        start, end = re.match(r"bytes=(\d*)-(\d*)", requested).groups()
+        if not start:
+            start, end = max(len(WHEEL) - int(end), 0), len(WHEEL) - 1
+        start, end = int(start), min(int(end or len(WHEEL) - 1), len(WHEEL) - 1)
+        content_range = f"bytes {start}-{end}/{len(WHEEL)}"
+        self.reply(206, WHEEL[start : end + 1], {"Content-Range": content_range})
+
+
+@pytest.fixture
+def server():
+    del SENT[:]
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubFiles)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def file_entry(url, **extra):
+    entry = {"url": url, "filename": "big-1.0-py3-none-any.whl"}
+    entry.update(extra)
+    return entry
+
+
+def test_pep658_first(server):
+    digest = hashlib.sha256(METADATA).hexdigest()
+    file = file_entry(f"{server}/big.whl", **{"core-metadata": {"sha256": digest}})
+    found = fetch_wheel_metadata(file)
+    assert found.source == "pep658"
+    assert requires_dist(found.metadata) == ["six"]
+    assert sum(SENT) == len(METADATA)
+
+
+def test_bad_pep658_digest_falls_back_to_ranges(server):
+    file = file_entry(f"{server}/big.whl", **{"core-metadata": {"sha256": "0" * 64}})
+    assert fetch_wheel_metadata(file).source == "range"
+
+
+def test_range_requests(server):
+    file = file_entry(f"{server}/big.whl")
+    found = fetch_wheel_metadata(file, members=("METADATA", "top_level.txt"))
+    assert found.source == "range"
+    assert found.members["top_level.txt"] == b"big\n"
+    assert found.metadata.encode("utf-8") == METADATA
+    assert found.bytes_transferred == sum(SENT)
+    assert found.bytes_transferred < len(WHEEL) / 10
+
+
+def test_download_when_no_ranges(server):
+    found = fetch_wheel_metadata(file_entry(f"{server}/norange/big.whl"))
+    assert found.source == "download"
+    assert found.metadata.encode("utf-8") == METADATA
+
+
+def test_offline_only_from_store(server, tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digest = hashlib.sha256(WHEEL).hexdigest()
+    file = file_entry(f"{server}/big.whl", digests={"sha256": digest})
+    with pytest.raises(Offline):
+        fetch_wheel_metadata(file, store=store, offline=True)
+    assert not SENT
+    store.put(io.BytesIO(WHEEL), digest)
+    found = fetch_wheel_metadata(file, store=store, offline=True)
+    assert (found.source, found.metadata.encode("utf-8")) == ("store", METADATA)
+    assert not SENT
+
+
+def test_remote_tree(server):
+    tree, remote = open_remote_wheel(f"{server}/big.whl")
+    with tree:
+        assert top_level_modules(tree) == {"big"}
+        with pytest.raises(RemoteNotExtracted):
+            tree.real_path()
+    assert remote.bytes_transferred < len(WHEEL) / 10